@@ -22,20 +22,44 @@
 
 import wx
 import proxy
+import backend
+import codegen
 import exceptions
 import const
-import platform
-import thread
+import instrument
+import scheduler
+import struct
+import winevents
 
 properties = {}
 
+#worker threads for the properties and the objects tree updates
+WORKERS = 4
+#worker threads and batch size for the visibility/actionability probes
+PROBE_WORKERS = 8
+PROBE_BATCH = 16
+
 def create(parent):
     return Frame1(parent)
 
 [wxID_FRAME1, wxID_FRAME1LISTCTRL1_PROPERTIES, wxID_FRAME1STATICBOX_EDITOR, 
  wxID_FRAME1STATICBOX_OBJECTSBROWSER, wxID_FRAME1STATICBOX_PROPRTIES, 
- wxID_FRAME1TEXTCTRL_EDITOR, wxID_FRAME1TREECTRL_OBJECTSBROWSER
-] = [wx.NewId() for _init_ctrls in range(7)]
+ wxID_FRAME1TEXTCTRL_EDITOR, wxID_FRAME1TREECTRL_OBJECTSBROWSER,
+ wxID_FRAME1STATICBOX_DIAGNOSTICS, wxID_FRAME1LISTCTRL_DIAGNOSTICS
+] = [wx.NewId() for _init_ctrls in range(9)]
+
+#properties menu ids
+ID_PROPERTIES_REFRESH = 204
+
+#file menu ids
+[ID_FILE_OPEN_SNAPSHOT, ID_FILE_SAVE_SNAPSHOT, ID_FILE_LIVE] = range(401, 404)
+
+#code menu ids
+[ID_CODE_GENERATE, ID_CODE_CLEAR, ID_CODE_GENERATE_FAST, ID_CODE_SAVE_REPLAY] = range(501, 505)
+
+#diagnostics menu ids
+[ID_DIAGNOSTICS_RECORD, ID_DIAGNOSTICS_SHOW, ID_DIAGNOSTICS_RESET,
+ ID_DIAGNOSTICS_EXPORT] = range(301, 305)
 
 class Frame1(wx.Frame):
     """
@@ -47,14 +71,35 @@ class Frame1(wx.Frame):
         #-----Main frame-----
         wx.Frame.__init__(self, id=wxID_FRAME1, name='', parent=prnt, 
               style=wx.MINIMIZE_BOX | wx.MAXIMIZE_BOX | wx.SYSTEM_MENU | wx.CAPTION | wx.CLOSE_BOX | wx.CLIP_CHILDREN | wx.RESIZE_BORDER,
-              title='SWAPY - Simple Windows Automation on Python v. %s. pywinauto v. %s. %s' % (const.VERSION,
-                                                                                                proxy.pywinauto.__version__,
-                                                                                                platform.architecture()[0]))
-        self.SetIcon(wx.Icon(proxy.resource_path("swapy_dog_head.ico"),
-              wx.BITMAP_TYPE_ICO))
+              title=self._get_title())
               
         self.Bind(wx.EVT_MENU, self.menu_action) # - make action
         #----------
+        
+        #-----Menu bar-----
+        file_menu = wx.Menu()
+        file_menu.Append(ID_FILE_OPEN_SNAPSHOT, 'Open snapshot...')
+        file_menu.Append(ID_FILE_SAVE_SNAPSHOT, 'Save snapshot of the selected object...')
+        file_menu.AppendSeparator()
+        file_menu.Append(ID_FILE_LIVE, 'Show live windows')
+        code_menu = wx.Menu()
+        code_menu.Append(ID_CODE_GENERATE, 'Generate script of the recorded actions')
+        code_menu.Append(ID_CODE_GENERATE_FAST, 'Generate script with cached lookups')
+        code_menu.Append(ID_CODE_SAVE_REPLAY, 'Save the recorded actions for replay...')
+        code_menu.Append(ID_CODE_CLEAR, 'Clear the recorded actions')
+        diagnostics_menu = wx.Menu()
+        diagnostics_menu.AppendCheckItem(ID_DIAGNOSTICS_RECORD, 'Record backend calls')
+        diagnostics_menu.AppendCheckItem(ID_DIAGNOSTICS_SHOW, 'Show diagnostics')
+        diagnostics_menu.AppendSeparator()
+        diagnostics_menu.Append(ID_DIAGNOSTICS_RESET, 'Reset counters')
+        diagnostics_menu.Append(ID_DIAGNOSTICS_EXPORT, 'Export JSON...')
+        self.menuBar = wx.MenuBar()
+        self.menuBar.Append(file_menu, 'File')
+        self.menuBar.Append(code_menu, 'Code')
+        self.menuBar.Append(diagnostics_menu, 'Diagnostics')
+        self.SetMenuBar(self.menuBar)
+        self.CreateStatusBar()
+        #----------
               
         #-----Static Boxes-----
         self.staticBox_ObjectsBrowser = wx.StaticBox(id=wxID_FRAME1STATICBOX_OBJECTSBROWSER,
@@ -66,6 +111,9 @@ class Frame1(wx.Frame):
               
         self.staticBox_Proprties = wx.StaticBox(id=wxID_FRAME1STATICBOX_PROPRTIES,
               label='Properties', name='staticBox_Proprties', parent=self)
+              
+        self.staticBox_Diagnostics = wx.StaticBox(id=wxID_FRAME1STATICBOX_DIAGNOSTICS,
+              label='Diagnostics', name='staticBox_Diagnostics', parent=self)
         #----------
               
         #-----ObjectsBrowser-----
@@ -76,6 +124,9 @@ class Frame1(wx.Frame):
               self.OnTreeCtrl1TreeSelChanged, id=wxID_FRAME1TREECTRL_OBJECTSBROWSER)
               
         self.treeCtrl_ObjectsBrowser.Bind(wx.EVT_TREE_ITEM_RIGHT_CLICK, self.ObjectsBrowserRight_Click)
+        
+        self.treeCtrl_ObjectsBrowser.Bind(wx.EVT_SCROLLWIN, self.ObjectsBrowserScroll)
+        self.treeCtrl_ObjectsBrowser.Bind(wx.EVT_MOUSEWHEEL, self.ObjectsBrowserScroll)
         #----------
         
         #-----Editor-----
@@ -101,6 +152,18 @@ class Frame1(wx.Frame):
         #self.listCtrl_Properties.Bind(wx.EVT_LEFT_DCLICK, self.Refresh, id=wxID_FRAME1LISTCTRL1_PROPERTIES)
         #----------
         
+        #-----Diagnostics-----
+        self.listCtrl_Diagnostics = wx.ListCtrl(id=wxID_FRAME1LISTCTRL_DIAGNOSTICS, name='listCtrl_Diagnostics',
+              parent=self, style=wx.LC_REPORT)
+              
+        for col, heading in enumerate(['Operation', 'Call', 'Count', 'Total, ms', 'Avg, ms']):
+            self.listCtrl_Diagnostics.InsertColumn(col=col, format=wx.LIST_FORMAT_LEFT,
+                  heading=heading, width=-1)
+                  
+        self.diagnostics_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnDiagnosticsTimer, self.diagnostics_timer)
+        #----------
+        
         #-----Sizers-----
         staticBox_ObjectsBrowser_sizer = wx.StaticBoxSizer(self.staticBox_ObjectsBrowser)
         staticBox_ObjectsBrowser_sizer.Add(self.treeCtrl_ObjectsBrowser, 1, wx.EXPAND, 2)
@@ -111,6 +174,9 @@ class Frame1(wx.Frame):
         staticBox_Proprties_sizer = wx.StaticBoxSizer(self.staticBox_Proprties)
         staticBox_Proprties_sizer.Add(self.listCtrl_Properties, 1, wx.EXPAND, 2)
         
+        self.staticBox_Diagnostics_sizer = wx.StaticBoxSizer(self.staticBox_Diagnostics)
+        self.staticBox_Diagnostics_sizer.Add(self.listCtrl_Diagnostics, 1, wx.EXPAND, 2)
+        
         sizer_h = wx.BoxSizer(wx.HORIZONTAL)
         sizer_v = wx.BoxSizer(wx.VERTICAL)
                 
@@ -118,25 +184,87 @@ class Frame1(wx.Frame):
         sizer_h.Add(sizer_v, 1, wx.EXPAND|wx.ALL, 2)
         sizer_v.Add(staticBox_Editor_sizer, 1, wx.EXPAND, 2)
         sizer_v.Add(staticBox_Proprties_sizer, 1, wx.EXPAND, 2)
+        sizer_v.Add(self.staticBox_Diagnostics_sizer, 1, wx.EXPAND, 2)
         
         self.SetSizerAndFit(sizer_h)
+        sizer_v.Hide(self.staticBox_Diagnostics_sizer, recursive=True)
+        self.sizer_v = sizer_v
         #----------
 
     def __init__(self, parent):
         self._init_ctrls(parent)
+        #snapshot file shown instead of the live windows
+        self.snapshot_file = None
+        #background work, results are handed over to the GUI thread
+        self.scheduler = scheduler.LatestWinsScheduler(scheduler.WorkerPool(WORKERS),
+                                                       deliver=wx.CallAfter)
+        self.prop_updater = prop_viewer_updater(self.listCtrl_Properties, self.scheduler)
+        self.tree_updater = tree_updater(self.treeCtrl_ObjectsBrowser, self.scheduler,
+                                         scheduler.WorkerPool(PROBE_WORKERS, name='swapy-probe'))
         self._init_windows_tree()   
-        self.textCtrl_Editor.AppendText('import pywinauto\n\n')
-        self.textCtrl_Editor.AppendText('pwa_app = pywinauto.application.Application()\n')
-        self.prop_updater = prop_viewer_updater(self.listCtrl_Properties)
-        self.tree_updater = tree_updater(self.treeCtrl_ObjectsBrowser)
+        #the frame is shown first: the icon, the backend (pywinauto import)
+        #and the change tracking come later
+        self.change_tracker = None
+        wx.CallAfter(self._load_icon)
+        self.scheduler.submit('backend', lambda token: backend.get_backend(),
+                              self._on_backend_ready)
+        self.textCtrl_Editor.AppendText(const.CODE_HEADER)
+        #actions done in the session, for the whole script generation
+        self.recorder = codegen.Recorder()
+        
+    def _get_title(self, backend_version=None):
+        title = 'SWAPY - Simple Windows Automation on Python v. %s.' % const.VERSION
+        if backend_version is not None:
+            title += ' pywinauto v. %s.' % backend_version
+        return '%s %dbit' % (title, struct.calcsize('P') * 8)
+        
+    def _load_icon(self):
+        self.SetIcon(wx.Icon(proxy.resource_path("swapy_dog_head.ico"),
+              wx.BITMAP_TYPE_ICO))
+        
+    def _on_backend_ready(self, window_system):
+        self.SetTitle(self._get_title(window_system.version))
+        self._init_change_tracking()
+        
+    def _init_change_tracking(self):
+        '''
+        Update the tree and the caches by the windows change events
+        if the backend reports them
+        '''
+        self.change_tracker = None
+        source = backend.get_backend().get_event_source()
+        if source is None:
+            return
+        self.change_tracker = winevents.ChangeTracker(source, deliver=wx.CallAfter)
+        proxy.track_changes(self.change_tracker)
+        self.change_tracker.add_listener(self.OnWindowsChanged)
+        try:
+            self.change_tracker.start()
+        except Exception as exc:
+            #no hooks, changes are found by the existence checks only
+            self.change_tracker = None
+            proxy.access_names_cache.trusted = False
+            self.SetStatusText('Windows change events are off: %s' % exc)
+            
+    def OnWindowsChanged(self, events):
+        if self.snapshot_file is not None:
+            return #an offline snapshot is shown
+        self.tree_updater.windows_changed(events)
+        tree_item = self.treeCtrl_ObjectsBrowser.GetSelection()
+        if tree_item.IsOk():
+            obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
+            handle = self.tree_updater.keys.get(obj)
+            if handle is not None and handle in [event.handle for event in events
+                                                 if event.kind == winevents.RENAME]:
+                self.prop_updater.props_update(obj)
         
     def OnTreeCtrl1TreeSelChanged(self, event):
         tree_item = event.GetItem()
         obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
-        if not obj._check_existence():
-          self._init_windows_tree()
-          tree_item = self.treeCtrl_ObjectsBrowser.GetRootItem()
-          obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
+        with instrument.operation('select node'):
+            exists = obj._check_existence()
+        if not exists:
+          tree_item, obj = self._get_existing_ancestor(tree_item)
         self.prop_updater.props_update(obj)
         self.tree_updater.tree_update(tree_item, obj)
         obj.Highlight_control()
@@ -148,12 +276,16 @@ class Frame1(wx.Frame):
         obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
         self.GLOB_last_rclick_tree_obj = obj
         #self.treeCtrl_ObjectsBrowser.SelectItem(tree_item)
-        if obj._check_existence():       
-          actions = obj.Get_actions()
+        with instrument.operation('right-click'):
+            exists = obj._check_existence()
+            if exists:
+                actions = obj.Get_actions()
+                is_actionable = obj._check_actionable()
+        if exists:       
           if actions:
               for id, action_name in actions:
                   menu.Append(id, action_name)
-                  if not obj._check_actionable():
+                  if not is_actionable:
                       menu.Enable(id, False)
           else:
               menu.Append(0, 'No actions')
@@ -161,11 +293,43 @@ class Frame1(wx.Frame):
           self.PopupMenu(menu)     
           menu.Destroy()
         else:
-          self._init_windows_tree()
-          tree_item = self.treeCtrl_ObjectsBrowser.GetRootItem()
-          obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
+          tree_item, obj = self._get_existing_ancestor(tree_item)
           self.prop_updater.props_update(obj)
           self.tree_updater.tree_update(tree_item, obj)
+          
+    def _get_existing_ancestor(self, tree_item):
+        '''
+        Return the nearest ancestor of a dead tree item which still exists.
+        Refreshing it prunes the dead subtree only, the rest of the tree is kept.
+        '''
+        tree = self.treeCtrl_ObjectsBrowser
+        with instrument.operation('select node'):
+            while True:
+                parent_item = tree.GetItemParent(tree_item)
+                if not parent_item.IsOk():
+                    break #the root always exists
+                tree_item = parent_item
+                obj = tree.GetItemData(tree_item).GetData()
+                if obj._check_existence():
+                    break
+        return tree_item, tree.GetItemData(tree_item).GetData()
+    
+    def ObjectsBrowserScroll(self, event):
+        event.Skip()
+        wx.CallAfter(self._load_visible_pages)
+        
+    def _load_visible_pages(self):
+        '''
+        Load the next page of virtual items when its placeholder is scrolled into view
+        '''
+        tree = self.treeCtrl_ObjectsBrowser
+        tree_item = tree.GetFirstVisibleItem()
+        while tree_item.IsOk() and tree.IsVisible(tree_item):
+            obj = tree.GetItemData(tree_item).GetData()
+            if isinstance(obj, proxy.virtual_more_items):
+                self.tree_updater.tree_update(tree_item, obj)
+                break
+            tree_item = tree.GetNextVisible(tree_item)
     
     def OnlistCtrl_PropertiesListItemRightClick(self, event):
         self.GLOB_prop_item_index = event.GetIndex()
@@ -174,6 +338,8 @@ class Frame1(wx.Frame):
         menu.AppendSeparator()
         menu.Append(202, 'Copy property')
         menu.Append(203, 'Copy value')
+        menu.AppendSeparator()
+        menu.Append(ID_PROPERTIES_REFRESH, 'Refresh')
         self.PopupMenu(menu)     
         menu.Destroy() 
 
@@ -183,9 +349,20 @@ class Frame1(wx.Frame):
         if 99 < id < 200:
             #object browser menu
             self.make_action(id)
+        elif id == ID_PROPERTIES_REFRESH:
+            self.refresh_properties()
         elif 199 < id < 300:
             #properties viewer menu
             self.clipboard_action(id)
+        elif 299 < id < 400:
+            #diagnostics menu
+            self.diagnostics_action(id)
+        elif 399 < id < 500:
+            #file menu
+            self.file_action(id)
+        elif 499 < id < 600:
+            #code menu
+            self.code_action(id)
         else:
             #Unknown menu id
             pass
@@ -218,105 +395,502 @@ class Frame1(wx.Frame):
         wx.TheClipboard.Close()
     
     
+    def refresh_properties(self):
+        '''
+        Reload the properties of the selected object bypassing the cache
+        '''
+        self.GLOB_prop_item_index = None
+        tree_item = self.treeCtrl_ObjectsBrowser.GetSelection()
+        if tree_item.IsOk():
+            obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
+            self.prop_updater.props_update(obj, refresh=True)
+            
     def make_action(self, menu_id):
         #tree_item = self.treeCtrl_ObjectsBrowser.GetSelection()
         #obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
         obj = self.GLOB_last_rclick_tree_obj
-        self.textCtrl_Editor.AppendText(obj.Get_code(menu_id))
-        obj.Exec_action(menu_id)
+        with instrument.operation('generate code'):
+            code = obj.Get_code(menu_id)
+            self.recorder.record(obj, menu_id)
+        self.textCtrl_Editor.AppendText(code)
+        with instrument.operation('execute action'):
+            obj.Exec_action(menu_id)
+        
+    def code_action(self, menu_id):
+        if menu_id == ID_CODE_GENERATE:
+            with instrument.operation('generate code'):
+                script = codegen.generate(self.recorder.steps)
+            self.textCtrl_Editor.SetValue(script)
+        elif menu_id == ID_CODE_GENERATE_FAST:
+            with instrument.operation('generate code'):
+                script = codegen.generate_fast(self.recorder.steps)
+            self.textCtrl_Editor.SetValue(script)
+        elif menu_id == ID_CODE_SAVE_REPLAY:
+            import replay
+            try:
+                steps = replay.from_recording(self.recorder.steps)
+            except ValueError as exc:
+                wx.MessageBox(str(exc), 'Save for replay', wx.OK | wx.ICON_ERROR, self)
+                return
+            dialog = wx.FileDialog(self, 'Save for replay', wildcard='JSON files (*.json)|*.json',
+                                   style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+            if dialog.ShowModal() == wx.ID_OK:
+                replay.save_steps(dialog.GetPath(), steps)
+            dialog.Destroy()
+        elif menu_id == ID_CODE_CLEAR:
+            self.recorder.clear()
+            self.textCtrl_Editor.SetValue(const.CODE_HEADER)
+        
+    def diagnostics_action(self, menu_id):
+        if menu_id == ID_DIAGNOSTICS_RECORD:
+            if self.menuBar.IsChecked(ID_DIAGNOSTICS_RECORD):
+                instrument.enable()
+            else:
+                instrument.disable()
+        elif menu_id == ID_DIAGNOSTICS_SHOW:
+            show = self.menuBar.IsChecked(ID_DIAGNOSTICS_SHOW)
+            self.sizer_v.Show(self.staticBox_Diagnostics_sizer, show, recursive=True)
+            self.sizer_v.Layout()
+            if show:
+                self._update_diagnostics()
+                self.diagnostics_timer.Start(1000)
+            else:
+                self.diagnostics_timer.Stop()
+        elif menu_id == ID_DIAGNOSTICS_RESET:
+            instrument.stats.reset()
+            proxy.properties_cache.reset_stats()
+            self._update_diagnostics()
+        elif menu_id == ID_DIAGNOSTICS_EXPORT:
+            dialog = wx.FileDialog(self, 'Export backend calls', wildcard='JSON files (*.json)|*.json',
+                                   style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+            if dialog.ShowModal() == wx.ID_OK:
+                instrument.stats.export_json(dialog.GetPath())
+            dialog.Destroy()
+            
+    def file_action(self, menu_id):
+        import snapshot
+        if menu_id == ID_FILE_OPEN_SNAPSHOT:
+            dialog = wx.FileDialog(self, 'Open snapshot', wildcard='SWAPY snapshots (*.swapy)|*.swapy',
+                                   style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+            if dialog.ShowModal() == wx.ID_OK:
+                try:
+                    root_obj = proxy.open_snapshot(dialog.GetPath())
+                except (IOError, snapshot.SnapshotFormatError) as exc:
+                    wx.MessageBox(str(exc), 'Open snapshot', wx.OK | wx.ICON_ERROR, self)
+                else:
+                    self._init_windows_tree(root_obj)
+            dialog.Destroy()
+        elif menu_id == ID_FILE_SAVE_SNAPSHOT:
+            tree_item = self.treeCtrl_ObjectsBrowser.GetSelection()
+            if not tree_item.IsOk():
+                return
+            obj = self.treeCtrl_ObjectsBrowser.GetItemData(tree_item).GetData()
+            name = self.treeCtrl_ObjectsBrowser.GetItemText(tree_item)
+            dialog = wx.FileDialog(self, 'Save snapshot', wildcard='SWAPY snapshots (*.swapy)|*.swapy',
+                                   style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+            if dialog.ShowModal() == wx.ID_OK:
+                path = dialog.GetPath()
+                self.SetStatusText('Crawling %s...' % name)
+                self.scheduler.submit('snapshot', lambda token: self._save_snapshot(obj, name, path),
+                                      self._snapshot_saved)
+            dialog.Destroy()
+        elif menu_id == ID_FILE_LIVE:
+            self._init_windows_tree()
+            
+    def _save_snapshot(self, obj, name, path):
+        #worker thread
+        import crawler
+        import snapshot
+        crawled = crawler.Crawler().crawl(obj, name)
+        snapshot.save(crawled, path)
+        return crawled, path
         
-    def _init_windows_tree(self):
+    def _snapshot_saved(self, result):
+        crawled, path = result
+        errors = len(crawled.get_errors())
+        self.SetStatusText('%d objects saved to %s, %d incomplete' % (len(crawled), path, errors))
+        
+    def OnDiagnosticsTimer(self, event):
+        self._update_diagnostics()
+        
+    def _update_diagnostics(self):
+        '''
+        Show the backend calls counters, the slowest calls of every operation first
+        '''
+        self.listCtrl_Diagnostics.DeleteAllItems()
+        for operation_name, call_name, count, seconds in instrument.stats.get_rows():
+            index = self.listCtrl_Diagnostics.InsertStringItem(self.listCtrl_Diagnostics.GetItemCount(), operation_name)
+            self.listCtrl_Diagnostics.SetStringItem(index, 1, call_name)
+            self.listCtrl_Diagnostics.SetStringItem(index, 2, str(count))
+            self.listCtrl_Diagnostics.SetStringItem(index, 3, '%.1f' % (seconds * 1000))
+            self.listCtrl_Diagnostics.SetStringItem(index, 4, '%.3f' % (seconds * 1000 / count))
+        cache_stats = proxy.properties_cache.get_stats()
+        for name in ('hits', 'misses', 'evictions', 'size'):
+            index = self.listCtrl_Diagnostics.InsertStringItem(self.listCtrl_Diagnostics.GetItemCount(), 'properties cache')
+            self.listCtrl_Diagnostics.SetStringItem(index, 1, name)
+            self.listCtrl_Diagnostics.SetStringItem(index, 2, str(cache_stats[name]))
+        
+    def _init_windows_tree(self, root_obj=None):
+        '''
+        Show the live windows or, if root_obj is proxy.Offline_system,
+        an opened snapshot
+        '''
+        self.tree_updater.reset()
         self.treeCtrl_ObjectsBrowser.DeleteAllItems()
+        #the file of a previous snapshot is unmapped when its last node is gone
+        self.snapshot_file = None
         item_data = wx.TreeItemData()
-        root_obj = proxy.PC_system(None)
+        if root_obj is None:
+            root_obj = proxy.PC_system(None)
+            root_label = root_obj.Get_pc_name()
+        else:
+            self.snapshot_file = root_obj.snapshot_file
+            root_label = 'Snapshot: %s' % self.snapshot_file.title
         item_data.SetData(root_obj)
-        self.treeCtrl_ObjectsBrowser.AddRoot(root_obj.GetProperties()['PC name'], data = item_data)
+        self.treeCtrl_ObjectsBrowser.AddRoot(root_label, data = item_data)
         #self.treeCtrl_ObjectsBrowser.AddRoot('PC name')
         del item_data
         #the_root = self.treeCtrl_ObjectsBrowser.GetRootItem()
         #self.treeCtrl_ObjectsBrowser.Expand(self.treeCtrl_ObjectsBrowser.GetRootItem())
 
 class prop_viewer_updater(object):
-    def __init__(self, listctrl):
+    '''
+    Fills the properties list. Properties are collected by a worker thread,
+    a newer object supersedes the one still being updated. The cheap
+    properties are shown first, the expensive ones (access names, the
+    full pywinauto properties) replace them when they are ready.
+    '''
+    def __init__(self, listctrl, scheduler):
         self.listctrl = listctrl
-        self.updating = False
-        self.queue = []
+        self.scheduler = scheduler
+        #the object the properties are shown for, results of the others are dropped
+        self.current = None
         
-    def props_update(self, obj):
-        self.queue.append(obj)
-        if self.updating:
-            return 0 
-        else:
-            thread.start_new_thread(self._update,())
-            
-    def _update(self):
-        self.updating = True
-        obj = self.queue[-1]
+    def props_update(self, obj, refresh=False):
+        '''
+        Show the cheap properties at once, the others when they are ready.
+        refresh - bypass the properties cache
+        '''
+        self.current = obj
         self.listctrl.DeleteAllItems()
         index = self.listctrl.InsertStringItem(0, 'Updating...')
         self.listctrl.SetStringItem(index, 1, '')
+        self.scheduler.submit('properties', lambda token: self._get_quick_properties(obj, refresh),
+                              lambda result: self._update_quick(obj, result))
+        
+    def _get_quick_properties(self, obj, refresh):
+        #worker thread
+        with instrument.operation('select node'):
+            if refresh:
+                obj.Refresh_properties()
+            cached = obj.Get_cached_properties()
+            if cached is not None:
+                return cached, True
+            return obj.Get_quick_properties(), False
+            
+    def _get_properties(self, obj):
+        #worker thread
+        with instrument.operation('select node'):
+            return obj.GetProperties()
+            
+    def _update_quick(self, obj, result):
+        #GUI thread
+        if obj is not self.current:
+            return #delivered after another object has been selected
+        obj_properties, complete = result
+        self._update(obj_properties, complete)
+        if not complete:
+            self.scheduler.submit('properties', lambda token: self._get_properties(obj),
+                                  lambda obj_properties: self._update_full(obj, obj_properties))
+            
+    def _update_full(self, obj, obj_properties):
+        #GUI thread
+        if obj is self.current:
+            self._update(obj_properties)
+            
+    def _update(self, obj_properties, complete=True):
+        #GUI thread
         global properties
-        properties = obj.GetProperties()
+        properties = obj_properties
         param_names = properties.keys()
         param_names.sort(key=lambda name: name.lower(), reverse=True)
         
-        if obj == self.queue[-1]:
-            self.listctrl.DeleteAllItems()
-            for p_name in param_names:
-                p_name_str = str(p_name)
-                try:
-                    p_values_str = str(properties[p_name])
-                except exceptions.UnicodeEncodeError:
-                    p_values_str = properties[p_name].encode('CP1251','replace')
-                index = self.listctrl.InsertStringItem(0, p_name_str)
-                self.listctrl.SetStringItem(index, 1, p_values_str)
-            self.queue = []
-            self.updating = False
-        
-        else:
-            self._update()
-            #there is the newer object for properties view.
-            #Do not update listctrl
-            #run _update again
+        self.listctrl.DeleteAllItems()
+        for p_name in param_names:
+            p_name_str = str(p_name)
+            try:
+                p_values_str = str(properties[p_name])
+            except exceptions.UnicodeEncodeError:
+                p_values_str = properties[p_name].encode('CP1251','replace')
+            index = self.listctrl.InsertStringItem(0, p_name_str)
+            self.listctrl.SetStringItem(index, 1, p_values_str)
+        if not complete:
+            index = self.listctrl.InsertStringItem(0, 'Updating...')
+            self.listctrl.SetStringItem(index, 1, '')
         
+def _is_handle(key):
+    '''
+    Identities of the windows and controls are their handles
+    '''
+    return isinstance(key, (int, long))
+    
 class tree_updater(object):
-    def __init__(self, treectrl):
+    '''
+    Fills the objects tree. Children are collected by a worker thread,
+    a newer node supersedes the one still being expanded.
+    Children are shown at once, their visibility and actionability are
+    probed in parallel afterwards and inactive ones are greyed as the
+    probes come back.
+    Windows change events refresh the affected expanded nodes in place.
+    '''
+    def __init__(self, treectrl, scheduler, probe_pool):
         self.treectrl = treectrl
-        self.updating = False
-        self.queue = []
+        self.scheduler = scheduler
+        self.probe_pool = probe_pool
+        #"N more items..." placeholders in the tree, virtual_more_items -> tree item
+        self.placeholders = {}
+        #items waiting for the probes, swapy_obj -> tree item
+        self.probing = {}
+        #identities of the objects in the tree, swapy_obj -> Get_identity()
+        self.keys = {}
+        #tree items of the windows and controls, handle -> tree item
+        self.handle_items = {}
+        
+    def reset(self):
+        '''
+        Forget the tree items, called before the tree is rebuilt
+        '''
+        self.scheduler.cancel('children')
+        for obj in self.placeholders.keys():
+            self.scheduler.cancel(('page', id(obj)))
+        self.placeholders = {}
+        self.probing = {}
+        self.keys = {}
+        self.handle_items = {}
         
     def tree_update(self, tree_item, obj):
-        self.queue.append((tree_item, obj))
-        if self.updating:
-            return 0 
+        if isinstance(obj, proxy.virtual_more_items):
+            if obj.loaded or obj not in self.placeholders:
+                return #the page is already loaded by a previous request
+            obj.loaded = True
+            self.scheduler.submit(('page', id(obj)), lambda token: self._get_page(obj),
+                                  lambda page: self._update_page(obj, page),
+                                  lambda exc: self._page_failed(obj, exc))
         else:
-            thread.start_new_thread(self._update,())
+            loaded = self._count_loaded_items(tree_item)
+            self.scheduler.submit('children', lambda token: self._get_children(obj, loaded),
+                                  lambda subitems: self._update_children(tree_item, subitems))
+            
+    def refresh(self, tree_item):
+        '''
+        Update the children of an already expanded tree item
+        '''
+        obj = self.treectrl.GetItemData(tree_item).GetData()
+        loaded = self._count_loaded_items(tree_item)
+        self.scheduler.submit(('refresh', id(obj)), lambda token: self._get_children(obj, loaded),
+                              lambda subitems: self._refresh_children(tree_item, obj, subitems))
+                              
+    def _count_loaded_items(self, tree_item):
+        '''
+        Return number of the virtual items (list view rows, ...) shown
+        under the tree item, the pages loaded so far are fetched again
+        '''
+        #GUI thread
+        count = 0
+        child, cookie = self.treectrl.GetFirstChild(tree_item)
+        while child.IsOk():
+            obj = self.treectrl.GetItemData(child).GetData()
+            if (isinstance(obj, proxy.VirtualSWAPYObject) and
+                    not isinstance(obj, proxy.virtual_more_items)):
+                count += 1
+            child, cookie = self.treectrl.GetNextChild(tree_item, cookie)
+        return count
+                              
+    def windows_changed(self, events):
+        '''
+        Refresh the tree items affected by winevents.WindowEvent list
+        '''
+        #GUI thread
+        root_item = self.treectrl.GetRootItem()
+        to_refresh = {} #swapy_obj -> tree item
+        for event in events:
+            tree_item = self.handle_items.get(event.handle)
+            if tree_item is not None:
+                #destroyed, renamed or moved away
+                parent_item = self.treectrl.GetItemParent(tree_item)
+                if parent_item.IsOk():
+                    to_refresh[self.treectrl.GetItemData(parent_item).GetData()] = parent_item
+            if event.kind in (winevents.CREATE, winevents.REPARENT):
+                if event.parent is None:
+                    parent_item = root_item
+                else:
+                    parent_item = self.handle_items.get(event.parent)
+                #a node which has never been expanded is filled when it is
+                if parent_item is not None and self.treectrl.GetChildrenCount(parent_item, False):
+                    to_refresh[self.treectrl.GetItemData(parent_item).GetData()] = parent_item
+        for tree_item in to_refresh.values():
+            self.refresh(tree_item)
+            
+    def _refresh_children(self, tree_item, obj, subitems):
+        #GUI thread
+        if obj in self.keys or tree_item == self.treectrl.GetRootItem():
+            self._update_children(tree_item, subitems)
+        #else the tree item has been deleted meanwhile
+            
+    def _get_children(self, obj, loaded=0):
+        #worker thread
+        with instrument.operation('expand node'):
+            if loaded and isinstance(obj, proxy.PagedSWAPYObject):
+                subitems = obj.Get_subitems(loaded)
+            else:
+                subitems = obj.Get_subitems()
+            return [(i_name, i_obj, i_obj.Get_identity()) for i_name, i_obj in subitems]
+            
+    def _get_page(self, obj):
+        #worker thread
+        with instrument.operation('expand node'):
+            return [(i_name, i_obj, i_obj.Get_identity()) for i_name, i_obj in obj.Get_page()]
+            
+    def _probe(self, objs):
+        #probe pool thread
+        results = []
+        with instrument.operation('expand node'):
+            for i_obj in objs:
+                if i_obj not in self.probing:
+                    continue #the item has been deleted meanwhile
+                is_active = i_obj._check_visibility() and i_obj._check_actionable()
+                results.append((i_obj, is_active))
+        self.scheduler.deliver(self._update_states, results)
+        
+    def _start_probes(self, objs):
+        '''
+        Probe the items in parallel batches
+        '''
+        for start in range(0, len(objs), PROBE_BATCH):
+            self.probe_pool.submit(self._probe, objs[start:start + PROBE_BATCH])
+            
+    def _update_states(self, results):
+        #GUI thread
+        for i_obj, is_active in results:
+            item_id = self.probing.pop(i_obj, None)
+            if item_id is not None:
+                if is_active:
+                    self.treectrl.SetItemTextColour(item_id,'black')
+                else:
+                    self.treectrl.SetItemTextColour(item_id,'gray')
             
-    def _update(self):
-        self.updating = True
-        tree_item, obj = self.queue[-1]
-        self.treectrl.DeleteChildren(tree_item)
-        subitems = obj.Get_subitems()
-        for i_name, i_obj in subitems:
-          item_data = wx.TreeItemData()
-          item_data.SetData(i_obj)
-          try:
-            item_id = self.treectrl.AppendItem(tree_item,i_name,data = item_data)
-            if (not i_obj._check_visibility()) or (not i_obj._check_actionable()):
-                self.treectrl.SetItemTextColour(item_id,'gray')
-          except wx._core.PyAssertionError:
-              pass
-              #Ignore tree item creation error when parent is not exists
-          finally:
-              del item_data
+    def _add_item(self, parent_item, previous_item, i_name, i_obj, key):
+        '''
+        Insert a tree item for i_obj after previous_item,
+        or as the first child if previous_item is None
+        '''
+        item_data = wx.TreeItemData()
+        item_data.SetData(i_obj)
+        item_id = None
+        try:
+          if previous_item is None:
+            item_id = self.treectrl.PrependItem(parent_item,i_name,data = item_data)
+          else:
+            item_id = self.treectrl.InsertItem(parent_item, previous_item, i_name, data = item_data)
+          self.probing[i_obj] = item_id
+          self.keys[i_obj] = key
+          if _is_handle(key):
+              self.handle_items[key] = item_id
+          if isinstance(i_obj, proxy.virtual_more_items):
+              self.placeholders[i_obj] = item_id
+        except wx._core.PyAssertionError:
+            pass
+            #Ignore tree item creation error when parent is not exists
+        finally:
+            del item_data
+        return item_id
+        
+    def _forget_item(self, tree_item):
+        '''
+        Forget the tree item and its subtree, they are about to be deleted
+        '''
+        obj = self.treectrl.GetItemData(tree_item).GetData()
+        self.probing.pop(obj, None)
+        key = self.keys.pop(obj, None)
+        if _is_handle(key) and self.handle_items.get(key) == tree_item:
+            del self.handle_items[key]
+        if obj in self.placeholders:
+            del self.placeholders[obj]
+            self.scheduler.cancel(('page', id(obj)))
+        child, cookie = self.treectrl.GetFirstChild(tree_item)
+        while child.IsOk():
+            self._forget_item(child)
+            child, cookie = self.treectrl.GetNextChild(tree_item, cookie)
+            
+    def _update_children(self, tree_item, subitems):
+        '''
+        Bring the children of the tree item in line with subitems.
+        Children are matched by Get_identity(): matched items are kept
+        with their subtrees, expanded state and selection, only the text
+        is updated. Other items are inserted or deleted.
+        '''
+        #GUI thread
+        old_items = {} #identity -> (tree item, swapy_obj, position)
+        old_children = []
+        child, cookie = self.treectrl.GetFirstChild(tree_item)
+        while child.IsOk():
+            obj = self.treectrl.GetItemData(child).GetData()
+            key = self.keys.get(obj)
+            if key is not None and key not in old_items:
+                old_items[key] = (child, obj, len(old_children))
+            old_children.append(child)
+            child, cookie = self.treectrl.GetNextChild(tree_item, cookie)
+            
+        kept_positions = set()
+        last_position = -1
+        previous_item = None
+        probe_objs = []
+        for i_name, i_obj, key in subitems:
+            old_item = None
+            if key is not None:
+                old_item = old_items.pop(key, None)
+            if old_item is not None and old_item[2] > last_position:
+                #keep the item, its order among the kept ones is the same
+                previous_item, i_obj, last_position = old_item
+                kept_positions.add(last_position)
+                if self.treectrl.GetItemText(previous_item) != i_name:
+                    self.treectrl.SetItemText(previous_item, i_name)
+                self.probing[i_obj] = previous_item
+            else:
+                previous_item = self._add_item(tree_item, previous_item, i_name, i_obj, key) or previous_item
+            probe_objs.append(i_obj)
+            
+        for position, child in enumerate(old_children):
+            if position not in kept_positions:
+                self._forget_item(child)
+                self.treectrl.Delete(child)
         self.treectrl.Expand(self.treectrl.GetRootItem())
+        self._start_probes(probe_objs)
         
-        if (tree_item, obj) == self.queue[-1]:
-          self.queue = []
-          self.updating = False
+    def _page_failed(self, obj, exc):
+        '''
+        Let the "N more items..." placeholder be loaded again
+        '''
+        #GUI thread
+        obj.loaded = False
+        self.treectrl.GetTopLevelParent().SetStatusText('Loading of the items failed: %s' % exc)
         
-        else:
-            self._update()
-            #there is the newer object for tree view.
-            #Do not update treeCtrl
-            #run _update again
\ No newline at end of file
+    def _update_page(self, obj, page):
+        '''
+        Replace the "N more items..." placeholder by the next page of items
+        '''
+        #GUI thread
+        tree_item = self.placeholders.get(obj)
+        if tree_item is None:
+            return #the placeholder has been deleted meanwhile
+        parent_item = self.treectrl.GetItemParent(tree_item)
+        previous_item = tree_item
+        for i_name, i_obj, key in page:
+            previous_item = self._add_item(parent_item, previous_item, i_name, i_obj, key) or previous_item
+        if self.treectrl.IsSelected(tree_item):
+            first_item = self.treectrl.GetNextSibling(tree_item)
+            if first_item.IsOk():
+                self.treectrl.SelectItem(first_item)
+        self._forget_item(tree_item)
+        self.treectrl.Delete(tree_item)
+        self._start_probes([i_obj for i_name, i_obj, key in page])
@@ -0,0 +1,233 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import threading
+import warnings
+
+import winevents
+import winlist
+
+'''
+Window system backends for the proxy module
+'''
+
+
+class Backend(object):
+    '''
+    Window system access used by the proxy module.
+    Control wrappers returned by a backend must provide the pywinauto
+    wrappers interface used by the proxy classes (Texts(), Children(),
+    TopLevelParent(), GetProperties(), ...).
+    '''
+    name = ''
+    version = ''
+    #raised by the wrappers of destroyed windows
+    InvalidWindowHandle = Exception
+
+    def __init__(self):
+        self._enumerator = None
+        self._cache_lock = threading.Lock()
+        self._control_types = None
+
+    def find_windows(self, parent=None, top_level_only=True, **criteria):
+        '''
+        Return handles of the top level windows or, with
+        top_level_only=False, of all the descendants of the parent
+        '''
+        raise NotImplementedError
+
+    def window(self, handle):
+        '''
+        Return an object for the top level window
+        '''
+        raise NotImplementedError
+
+    def wrap_handle(self, handle):
+        '''
+        Return a control wrapper for the handle
+        '''
+        raise NotImplementedError
+
+    def build_unique_dict(self, controls):
+        '''
+        Return {access_name : control} for the controls
+        '''
+        raise NotImplementedError
+
+    def exists(self, handle):
+        '''
+        Return True if the window exists
+        '''
+        raise NotImplementedError
+
+    def wrapper_classes(self):
+        '''
+        Return {type name : wrapper class} of the wrappers with a special
+        proxy. Type names are 'window', 'menu', 'menu_item', 'combobox',
+        'listview', 'tab', 'toolbar', 'toolbar_button', 'tree_view' and
+        'tree_item'.
+        '''
+        raise NotImplementedError
+
+    def wrapper_class(self, obj):
+        '''
+        Return class of the wrapper the proxy class is looked up by
+        '''
+        return type(obj)
+
+    def control_type(self, obj):
+        '''
+        Return type name of the wrapper (see wrapper_classes()) or 'unknown'
+        '''
+        with self._cache_lock:
+            if self._control_types is None:
+                self._control_types = dict((wrapper_class, type_name) for type_name, wrapper_class
+                                           in self.wrapper_classes().items())
+        return self._control_types.get(self.wrapper_class(obj), 'unknown')
+
+    def get_event_source(self):
+        '''
+        Return winevents.EventSource reporting the windows changes
+        or None if the backend can't track them
+        '''
+        return None
+
+    #-----winlist.WindowsEnumerator provider
+    def window_text(self, handle):
+        raise NotImplementedError
+
+    def class_name(self, handle):
+        raise NotImplementedError
+
+    def is_visible(self, handle):
+        raise NotImplementedError
+
+    def taskbar_handle(self):
+        raise NotImplementedError
+    #-----
+
+    def get_windows_enumerator(self):
+        '''
+        Return winlist.WindowsEnumerator on top of this backend.
+        The enumerator keeps the task bar handle between the refreshes.
+        '''
+        with self._cache_lock:
+            if self._enumerator is None:
+                self._enumerator = winlist.WindowsEnumerator(self)
+            return self._enumerator
+
+
+class PwaBackend(Backend):
+    '''
+    pywinauto backend for a live Windows desktop
+    '''
+    name = 'pywinauto'
+
+    #seconds exists() waits for a window, passed to every call instead
+    #of changing the pywinauto wide Timings
+    exists_timeout = 0
+
+    def __init__(self):
+        Backend.__init__(self)
+        import pywinauto
+        import pywinauto.application
+        import pywinauto.controls
+        import pywinauto.findbestmatch
+        import pywinauto.findwindows
+        import pywinauto.handleprops
+        self.pywinauto = pywinauto
+        self.version = pywinauto.__version__
+        self.InvalidWindowHandle = pywinauto.controls.HwndWrapper.InvalidWindowHandle
+        self._app = pywinauto.application.Application()
+
+    def find_windows(self, parent=None, top_level_only=True, **criteria):
+        return self.pywinauto.findwindows.find_windows(parent=parent,
+                                                       top_level_only=top_level_only,
+                                                       **criteria)
+
+    def window(self, handle):
+        return self._app.window_(handle=handle)
+
+    def wrap_handle(self, handle):
+        return self.pywinauto.controls.HwndWrapper.HwndWrapper(handle)
+
+    def build_unique_dict(self, controls):
+        return self.pywinauto.findbestmatch.build_unique_dict(controls)
+
+    def exists(self, handle):
+        spec = self.pywinauto.application.WindowSpecification({'handle': handle})
+        return spec.Exists(timeout=self.exists_timeout)
+
+    def wrapper_classes(self):
+        pywinauto = self.pywinauto
+        return {'window' : pywinauto.application.WindowSpecification,
+                'menu' : pywinauto.controls.menuwrapper.Menu,
+                'menu_item' : pywinauto.controls.menuwrapper.MenuItem,
+                'combobox' : pywinauto.controls.win32_controls.ComboBoxWrapper,
+                'listview' : pywinauto.controls.common_controls.ListViewWrapper,
+                'tab' : pywinauto.controls.common_controls.TabControlWrapper,
+                'toolbar' : pywinauto.controls.common_controls.ToolbarWrapper,
+                'toolbar_button' : pywinauto.controls.common_controls._toolbar_button,
+                'tree_view' : pywinauto.controls.common_controls.TreeViewWrapper,
+                'tree_item' : pywinauto.controls.common_controls._treeview_element,
+                }
+
+    def get_event_source(self):
+        return winevents.WinEventSource()
+
+    def window_text(self, handle):
+        return self.pywinauto.handleprops.text(handle)
+
+    def class_name(self, handle):
+        return self.pywinauto.handleprops.classname(handle)
+
+    def is_visible(self, handle):
+        return self.pywinauto.handleprops.isvisible(handle)
+
+    def taskbar_handle(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning) #ignore future warning in taskbar module
+            from pywinauto import taskbar
+            return taskbar.TaskBarHandle()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    '''
+    Return the current backend, pywinauto one by default
+    '''
+    global _backend
+    current = _backend
+    if current is not None:
+        return current #no locking once the backend is set
+    with _backend_lock:
+        if _backend is None:
+            _backend = PwaBackend()
+        return _backend
+
+def set_backend(new_backend):
+    '''
+    Make new_backend current for the proxy module
+    '''
+    global _backend
+    with _backend_lock:
+        _backend = new_backend
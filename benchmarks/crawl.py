@@ -0,0 +1,73 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the crawler on a large fake window.
+
+Every wrapper call of the fake backend sleeps for the latency, like a
+cross-process call does, so the crawl time shows how well the calls of
+the worker threads overlap.
+'''
+
+import argparse
+import time
+
+import backend
+import crawler
+import fake_backend
+import proxy
+
+
+def run(controls, latency, workers_list):
+    window_system = fake_backend.FakeBackend(windows=1, controls=controls, list_items=50,
+                                             latency=latency)
+    backend.set_backend(window_system)
+    window = [obj for name, obj in proxy.PC_system(None).Get_subitems()
+              if name == 'Fake window 0'][0]
+    results = []
+    for workers in workers_list:
+        proxy.access_names_cache.invalidate()
+        proxy.properties_cache.clear()
+        window_system.reset_calls()
+        start = time.time()
+        snapshot = crawler.Crawler(workers=workers).crawl(window, 'Fake window 0')
+        elapsed = time.time() - start
+        results.append((workers, elapsed, len(snapshot), len(snapshot.get_errors()),
+                        sum(window_system.calls.values())))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--controls', type=int, default=3000,
+                        help='controls in the top level window')
+    parser.add_argument('--latency', type=float, default=0.0002,
+                        help='seconds of every wrapper call')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 16],
+                        help='worker pool sizes to compare')
+    args = parser.parse_args()
+    print('%d controls, %.1f ms per call' % (args.controls, args.latency * 1000))
+    print('%8s %10s %8s %8s %10s' % ('workers', 'seconds', 'nodes', 'errors', 'calls'))
+    for workers, elapsed, nodes, errors, calls in run(args.controls, args.latency, args.workers):
+        print('%8d %10.2f %8d %8d %10d' % (workers, elapsed, nodes, errors, calls))
+
+
+if __name__ == '__main__':
+    main()
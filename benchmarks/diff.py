@@ -0,0 +1,93 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the snapshot diff on large synthetic trees.
+
+The new tree is the old one with a share of the nodes renamed and
+moved, so the diff time shows how it grows with the tree size.
+'''
+
+import argparse
+import random
+import time
+
+import snapshot_diff
+from benchmarks.snapshot_file import make_snapshot
+
+
+def is_in_subtree(nodes, node, subtree_root):
+    while node is not None:
+        if node is subtree_root:
+            return True
+        node = nodes[node.parent] if node.parent is not None else None
+    return False
+
+
+def change_snapshot(crawled, share, seed=0):
+    '''
+    Rename and move the share of the nodes of crawler.Snapshot
+    '''
+    nodes = crawled.nodes
+    rand = random.Random(seed)
+    for i in range(int(len(nodes) * share)):
+        node = nodes[rand.randrange(1, len(nodes))]
+        node.name = 'Renamed %d' % node.index
+        node.properties['Access names'] = ['Renamed%d' % node.index]
+    for i in range(int(len(nodes) * share)):
+        node = nodes[rand.randrange(1, len(nodes))]
+        new_parent = nodes[rand.randrange(0, len(nodes))]
+        if is_in_subtree(nodes, new_parent, node):
+            continue #would make a cycle
+        nodes[node.parent].children.remove(node.index)
+        node.parent = new_parent.index
+        new_parent.children.append(node.index)
+    return crawled
+
+
+def run(sizes, fanout, share):
+    results = []
+    for nodes_count in sizes:
+        old = make_snapshot(nodes_count, fanout)
+        new = change_snapshot(make_snapshot(nodes_count, fanout), share)
+        start = time.time()
+        diff = snapshot_diff.diff_snapshots(old, new)
+        results.append((nodes_count, time.time() - start, diff.get_counts()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000],
+                        help='nodes in the synthetic trees')
+    parser.add_argument('--fanout', type=int, default=20,
+                        help='children of every node')
+    parser.add_argument('--share', type=float, default=0.01,
+                        help='share of the nodes renamed and of the nodes moved')
+    args = parser.parse_args()
+    print('%8s %10s %8s %8s %8s' % ('nodes', 'seconds', 'renamed', 'moved', 'other'))
+    for nodes_count, elapsed, counts in run(args.sizes, args.fanout, args.share):
+        other = sum(counts.values()) - counts['renamed'] - counts['moved']
+        print('%8d %10.2f %8d %8d %8d' % (nodes_count, elapsed, counts['renamed'],
+                                          counts['moved'], other))
+
+
+if __name__ == '__main__':
+    main()
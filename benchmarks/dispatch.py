@@ -0,0 +1,133 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the proxy class dispatch for the children of a node.
+
+Compares the former chains of type and type name comparisons with the
+ProxyRegistry lookup on the wrappers of a fake backend window. The proxy
+objects are not created, only their classes are looked up.
+'''
+
+import argparse
+import time
+
+import backend
+import fake_backend
+import proxy
+
+
+def legacy_type(obj):
+    '''
+    Former _get_pywinobj_type: a chain of type comparisons
+    '''
+    if type(obj) == fake_backend.FakeWindow:
+        return 'window'
+    elif type(obj) == fake_backend.FakeMenu:
+        return 'menu'
+    elif type(obj) == fake_backend.FakeMenuItem:
+        return 'menu_item'
+    elif type(obj) == fake_backend.FakeComboBox:
+        return 'combobox'
+    elif type(obj) == fake_backend.FakeListView:
+        return 'listview'
+    elif type(obj) == fake_backend.FakeTabControl:
+        return 'tab'
+    elif type(obj) == fake_backend.FakeToolbar:
+        return 'toolbar'
+    elif type(obj) == fake_backend.FakeToolbarButton:
+        return 'toolbar_button'
+    elif type(obj) == fake_backend.FakeTreeView:
+        return 'tree_view'
+    elif type(obj) == fake_backend.FakeTreeElement:
+        return 'tree_item'
+    else:
+        return 'unknown'
+
+
+def legacy_proxy(pwa_obj):
+    '''
+    Former _get_swapy_object dispatch: a chain of type name comparisons
+    '''
+    pwa_type = legacy_type(pwa_obj)
+    if pwa_type == 'smt_NEW':
+        return None
+    if pwa_type == 'window':
+        return proxy.Pwa_window
+    if pwa_type == 'menu':
+        return proxy.Pwa_menu
+    if pwa_type == 'menu_item':
+        return proxy.Pwa_menu_item
+    if pwa_type == 'combobox':
+        return proxy.Pwa_combobox
+    if pwa_type == 'listview':
+        return proxy.Pwa_listview
+    if pwa_type == 'tab':
+        return proxy.Pwa_tab
+    if pwa_type == 'toolbar':
+        return proxy.Pwa_toolbar
+    if pwa_type == 'toolbar_button':
+        return proxy.Pwa_toolbar_button
+    if pwa_type == 'tree_view':
+        return proxy.Pwa_tree
+    if pwa_type == 'tree_item':
+        return proxy.Pwa_tree_item
+    else:
+        return proxy.SWAPYObject
+
+
+def run(controls_count, repeat):
+    window_system = fake_backend.FakeBackend(windows=1, controls=controls_count)
+    backend.set_backend(window_system)
+    window = window_system.top_windows[1]
+    controls = window_system._descendants(window)
+    #current _get_swapy_object dispatch: one registry lookup
+    registry_proxy = lambda pwa_obj: proxy.proxy_registry.get_proxy_class(backend.get_backend(), pwa_obj)
+    results = []
+    for name, func in (('type chains', legacy_proxy),
+                       ('registry', registry_proxy)):
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            objs = [func(ctrl) for ctrl in controls]
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results.append((name, best, objs))
+    assert results[0][2] == results[1][2], 'proxy classes differ'
+    return len(controls), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--controls', type=int, default=10000,
+                        help='controls in the top level window')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of every method, the best one is shown')
+    args = parser.parse_args()
+    count, results = run(args.controls, args.repeat)
+    print('%d children' % count)
+    for name, elapsed, classes in results:
+        print('%-12s %10.4f s %8.2f us per child' % (name, elapsed, elapsed * 1e6 / count))
+    print('speedup: %.1fx' % (results[0][1] / max(results[1][1], 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
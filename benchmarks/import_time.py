@@ -0,0 +1,142 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Import time profile of the SWAPY modules.
+
+    python -m benchmarks.import_time _mainframe
+    python -m benchmarks.import_time headless --startup
+
+Imports the module in a new interpreter with a timing import hook and
+prints the slowest imports: the own time of a module excludes the
+modules it imports. With --startup the first use steps are timed as
+well: the backend creation and the root listing.
+'''
+
+import __builtin__
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ImportProfiler(object):
+    '''
+    Wraps __import__ and times the first import of every module
+    '''
+    def __init__(self):
+        self.records = {} #module name -> [total seconds, own seconds]
+        self._stack = []
+        self._original_import = None
+
+    def install(self):
+        self._original_import = __builtin__.__import__
+        __builtin__.__import__ = self._import
+
+    def uninstall(self):
+        __builtin__.__import__ = self._original_import
+
+    def _import(self, name, *args, **kwargs):
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+        frame = [name, time.time(), 0.0] #name, start, time of the nested imports
+        self._stack.append(frame)
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            self._stack.pop()
+            total = time.time() - frame[1]
+            if name in sys.modules and name not in self.records:
+                self.records[name] = [total, total - frame[2]]
+            if self._stack:
+                self._stack[-1][2] += total
+
+
+def profile(module_name, startup):
+    '''
+    Return {'total' : seconds, 'imports' : {name : [total, own]},
+    'steps' : [(step, seconds),...], 'error' : text or None} of the module
+    import in this process
+    '''
+    sys.path.insert(0, ROOT)
+    profiler = ImportProfiler()
+    profiler.install()
+    start = time.time()
+    error = None
+    try:
+        __import__(module_name)
+    except Exception as exc: #e.g. wx is not installed
+        error = '%s: %s' % (type(exc).__name__, exc)
+    finally:
+        profiler.uninstall()
+    result = {'total' : time.time() - start, 'imports' : profiler.records, 'steps' : [],
+              'error' : error}
+    if startup and error is None:
+        import backend
+        import proxy
+        for step, func in [('backend', backend.get_backend),
+                           ('root properties', proxy.PC_system(None).GetProperties),
+                           ('root subitems', proxy.PC_system(None).Get_subitems)]:
+            step_start = time.time()
+            try:
+                func()
+            except Exception as error:
+                step = '%s (%s)' % (step, type(error).__name__)
+            result['steps'].append((step, time.time() - step_start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('module', nargs='?', default='_mainframe', help='module to import')
+    parser.add_argument('--top', type=int, default=15, help='imports to show')
+    parser.add_argument('--startup', action='store_true', help='time the first use steps')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        json.dump(profile(args.module, args.startup), sys.stdout)
+        return 0
+    command = [sys.executable, '-m', 'benchmarks.import_time', args.module, '--child']
+    if args.startup:
+        command.append('--startup')
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        return process.returncode
+    result = json.loads(output)
+    if result['error'] is not None:
+        print('import %s: failed (%s)' % (args.module, result['error']))
+        return 1
+    print('import %s: %.1f ms' % (args.module, result['total'] * 1000))
+    print('%-32s %10s %10s' % ('module', 'own ms', 'total ms'))
+    imports = sorted(result['imports'].items(), key=lambda item: -item[1][1])
+    for name, (total, own) in imports[:args.top]:
+        print('%-32s %10.1f %10.1f' % (name, own * 1000, total * 1000))
+    for step, seconds in result['steps']:
+        print('%-32s %10s %10.1f' % (step, '', seconds * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
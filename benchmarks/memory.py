@@ -0,0 +1,128 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the memory footprint of the proxy objects.
+
+Compares the former proxies, which had a __dict__ with a sort key lambda
+and, for the virtual items, three bound methods of the parent, with the
+current __slots__ proxies. The footprint of a node is the size of the
+object plus the size of everything allocated for it alone.
+'''
+
+import argparse
+import gc
+import sys
+import types
+
+import backend
+import fake_backend
+import proxy
+
+
+class LegacySWAPYObject(object):
+    '''
+    Former SWAPYObject attributes
+    '''
+    def __init__(self, pwa_obj):
+        self.pwa_obj = pwa_obj
+        default_sort_key = lambda name: name[0].lower()
+        self.subitems_sort_key = default_sort_key
+
+    def _check_visibility(self):
+        return True
+
+    def _check_actionable(self):
+        return True
+
+    def _check_existence(self):
+        return True
+
+
+class LegacyVirtualSWAPYObject(LegacySWAPYObject):
+    '''
+    Former VirtualSWAPYObject attributes
+    '''
+    def __init__(self, parent, index, item_data=None):
+        self.parent = parent
+        self.index = index
+        self.item_data = item_data
+        self.pwa_obj = self
+        self._check_visibility = self.parent._check_visibility
+        self._check_actionable = self.parent._check_actionable
+        self._check_existence = self.parent._check_existence
+
+
+def footprint(obj):
+    '''
+    Return bytes allocated for the object alone: the object, its __dict__
+    and the functions and bound methods created for it
+    '''
+    size = sys.getsizeof(obj)
+    obj_dict = getattr(obj, '__dict__', None)
+    if obj_dict is not None:
+        size += sys.getsizeof(obj_dict)
+        for value in obj_dict.values():
+            if isinstance(value, (types.FunctionType, types.MethodType)):
+                size += sys.getsizeof(value)
+    return size
+
+
+def make_nodes(count):
+    '''
+    Return [(node kind, legacy nodes, current nodes),...]
+    '''
+    window_system = fake_backend.FakeBackend(windows=1, controls=1, list_items=0)
+    backend.set_backend(window_system)
+    ctrl = window_system.top_windows[1]
+    legacy_parent = LegacySWAPYObject(ctrl)
+    parent = proxy.Pwa_listview(ctrl)
+    return [
+        ('control', [LegacySWAPYObject(ctrl) for i in range(count)],
+                    [proxy.SWAPYObject(ctrl) for i in range(count)]),
+        ('list view item', [LegacyVirtualSWAPYObject(legacy_parent, i) for i in range(count)],
+                           [proxy.virtual_listview_item(parent, i) for i in range(count)]),
+        ]
+
+
+def run(count):
+    results = []
+    for kind, legacy_nodes, nodes in make_nodes(count):
+        legacy_size = sum(footprint(node) for node in legacy_nodes) / float(count)
+        size = sum(footprint(node) for node in nodes) / float(count)
+        gc.collect()
+        results.append((kind, legacy_size, size))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=10000,
+                        help='nodes of every kind')
+    args = parser.parse_args()
+    print('bytes per node, %d nodes of every kind' % args.nodes)
+    print('%-16s %10s %10s %8s' % ('node', 'before', 'after', 'saved'))
+    for kind, legacy_size, size in run(args.nodes):
+        print('%-16s %10.0f %10.0f %7.0f%%' % (kind, legacy_size, size,
+                                              100 * (1 - size / legacy_size)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the access names index build when a node is expanded.
+
+Times SWAPYObject._get_children of the fake backend's controls with a
+cold access names cache. The eager variant builds the top level window
+names index before listing the children, as the proxies did before;
+the shipped lazy one builds it only on the first child without a text.
+Leaf controls and nodes with named children skip the build.
+'''
+
+import argparse
+import time
+
+import backend
+import fake_backend
+import proxy
+
+
+def find_controls(window):
+    '''
+    Return {case name : fake control} of the synthetic window
+    '''
+    cases = {'window (unnamed children)' : window}
+    stack = list(window.children)
+    while stack:
+        ctrl = stack.pop()
+        stack.extend(ctrl.children)
+        if not ctrl.children and ctrl.class_name == 'Button':
+            cases.setdefault('leaf button', ctrl)
+        elif ctrl.children and all(child.text for child in ctrl.children):
+            cases.setdefault('pane (named children)', ctrl)
+    return cases
+
+
+def expand(fake, ctrl, eager):
+    '''
+    Return (seconds, backend calls) of listing the children of ctrl
+    '''
+    wrapper = fake.wrap_handle(ctrl.handle)
+    obj = proxy.proxy_registry.get_proxy_class(fake, wrapper)(wrapper)
+    top_handle = ctrl.TopLevelParent().handle
+    proxy.access_names_cache.invalidate(top_handle)
+    fake.reset_calls()
+    start = time.time()
+    if eager:
+        proxy.get_access_names_index(top_handle)
+    obj._get_children()
+    return time.time() - start, sum(fake.calls.values())
+
+
+def run(controls_count, fanout, repeat):
+    '''
+    Return [(case name, eager seconds, eager calls, lazy seconds, lazy calls),...]
+    '''
+    fake = fake_backend.FakeBackend(windows=1, controls=controls_count, fanout=fanout)
+    previous_backend = backend._backend
+    backend.set_backend(fake)
+    try:
+        results = []
+        for name, ctrl in sorted(find_controls(fake.top_windows[1]).items()):
+            row = [name]
+            for eager in (True, False):
+                runs = sorted(expand(fake, ctrl, eager) for i in range(repeat))
+                row.extend(runs[len(runs) // 2])
+            results.append(tuple(row))
+        return results
+    finally:
+        backend.set_backend(previous_backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--controls', type=int, default=5000,
+                        help='controls in the top level window')
+    parser.add_argument('--fanout', type=int, default=50,
+                        help='max children of a container control')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print('%d controls, cold access names cache, median of %d runs'
+          % (args.controls, args.repeat))
+    print('%-28s %10s %8s %10s %8s' % ('expanded node', 'eager ms', 'calls', 'lazy ms', 'calls'))
+    for name, eager_time, eager_calls, lazy_time, lazy_calls in run(args.controls, args.fanout,
+                                                                    args.repeat):
+        print('%-28s %10.2f %8d %10.2f %8d' % (name, eager_time * 1000, eager_calls,
+                                               lazy_time * 1000, lazy_calls))
+
+
+if __name__ == '__main__':
+    main()
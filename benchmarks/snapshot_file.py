@@ -0,0 +1,97 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the snapshot files on a large synthetic tree.
+
+Reports the file size, the time to open a snapshot and the time to
+show one expanded node: the children names and the node properties.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import crawler
+import snapshot
+
+
+def make_snapshot(nodes_count, fanout):
+    '''
+    Return crawler.Snapshot of nodes_count nodes, fanout children a node
+    '''
+    nodes = []
+    for index in range(nodes_count):
+        parent = (index - 1) // fanout if index else None
+        depth = nodes[parent].depth + 1 if index else 0
+        node = crawler.Node(index, parent, depth, 'Control %d' % index, 'SWAPYObject',
+                            0x10000 + index)
+        node.properties = {'Class' : 'Button',
+                           'Access names' : ['Control%d' % index, 'Button%d' % index],
+                           'Texts' : [u'Control %d' % index],
+                           'Rectangle' : '(L%d, T0, R100, B20)' % index,
+                           'Is visible' : True}
+        if index:
+            nodes[parent].children.append(index)
+        nodes.append(node)
+    return crawler.Snapshot(nodes)
+
+
+def run(nodes_count, fanout):
+    crawled = make_snapshot(nodes_count, fanout)
+    fd, path = tempfile.mkstemp(suffix='.swapy')
+    os.close(fd)
+    try:
+        start = time.time()
+        snapshot.save(crawled, path)
+        save_time = time.time() - start
+
+        start = time.time()
+        snapshot_file = snapshot.SnapshotFile(path)
+        open_time = time.time() - start
+
+        node = len(snapshot_file) // 2
+        start = time.time()
+        names = [snapshot_file.get_name(child) for child in snapshot_file.get_children(node)]
+        snapshot_file.get_properties(node)
+        expand_time = time.time() - start
+        snapshot_file.close()
+        return os.path.getsize(path), save_time, open_time, expand_time
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=100000,
+                        help='nodes in the synthetic tree')
+    parser.add_argument('--fanout', type=int, default=20,
+                        help='children of every node')
+    args = parser.parse_args()
+    size, save_time, open_time, expand_time = run(args.nodes, args.fanout)
+    print('%d nodes, %.1f MB' % (args.nodes, size / 1024.0 / 1024.0))
+    print('%-12s %10.2f ms' % ('save', save_time * 1000))
+    print('%-12s %10.2f ms' % ('open', open_time * 1000))
+    print('%-12s %10.2f ms' % ('expand node', expand_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
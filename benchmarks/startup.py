@@ -0,0 +1,77 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Startup time of the GUI and the headless entry points.
+
+Every case runs in a new interpreter, so the times include the
+interpreter start. A case failing to run (e.g. wx is not installed)
+is reported as such.
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('interpreter', ['-c', 'pass']),
+    ('GUI import', ['-c', 'import wx, _mainframe']),
+    ('GUI app', ['-c', 'import wx, _mainframe; app = wx.App(0); '
+                       'frame = _mainframe.create(None); frame.Destroy()']),
+    ('headless import', ['-c', 'import headless']),
+    ('headless tree (fake)', ['swapy-cli.py', '--backend', 'fake', 'tree', '--depth', '1']),
+]
+
+
+def run_case(args, repeat):
+    '''
+    Return sorted seconds of the runs or None if the case fails
+    '''
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for i in range(repeat):
+            start = time.time()
+            code = subprocess.call([sys.executable] + args, cwd=ROOT,
+                                   stdout=devnull, stderr=devnull)
+            times.append(time.time() - start)
+            if code != 0:
+                return None
+    return sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs of every case')
+    args = parser.parse_args()
+    print('%-24s %10s %10s' % ('case', 'min ms', 'median ms'))
+    for name, case_args in CASES:
+        times = run_case(case_args, args.repeat)
+        if times is None:
+            print('%-24s %21s' % (name, 'failed'))
+        else:
+            print('%-24s %10.1f %10.1f' % (name, times[0] * 1000, times[len(times) // 2] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark suite for the proxy object model.
+
+Times the hot paths of the proxy classes against a synthetic window tree
+of the fake backend and reports latency percentiles and backend call
+counts per operation. Results can be stored as a JSON baseline and later
+runs compared with it:
+
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --check benchmarks/baseline.json
+
+A check fails (exit code 1) when an operation makes more backend calls
+than in the baseline or its median latency grows over the tolerance.
+Every run also checks that the proxies give the same actions and types
+while the backend calls are recorded, and fails if they do not.
+'''
+
+import argparse
+import collections
+import gc
+import json
+import sys
+import time
+
+import backend
+import cache
+import codegen
+import fake_backend
+import instrument
+import proxy
+import replay
+
+#ids of const.ACTIONS used for Get_code
+CLICK_ACTION_ID = 102
+SELECT_ACTION_ID = 121
+#steps of the generated script
+SCRIPT_STEPS = 500
+#steps of the replay
+REPLAY_STEPS = 100
+
+TREE_OPTIONS = ('windows', 'controls', 'fanout', 'list_items', 'combo_items',
+                'tabs', 'toolbar_buttons', 'tree_roots', 'tree_depth',
+                'menu_items', 'latency')
+
+
+def find_proxy(obj, proxy_class, max_depth=4):
+    '''
+    Return the first descendant of obj of the proxy_class, breadth first
+    '''
+    level = [obj]
+    for depth in range(max_depth):
+        next_level = []
+        for parent in level:
+            for name, child in parent.Get_subitems():
+                if type(child) is proxy_class:
+                    return child
+                next_level.append(child)
+        level = next_level
+    raise LookupError('No %s in the synthetic tree' % proxy_class.__name__)
+
+
+def find_unnamed_control(window):
+    '''
+    Return a proxy of a control without text, it is named by access names
+    '''
+    for name, child in window.Get_subitems():
+        if type(child) is proxy.SWAPYObject and not child.pwa_obj.text:
+            return child
+    raise LookupError('No unnamed control in the synthetic tree')
+
+
+def reset_caches():
+    proxy.access_names_cache.invalidate()
+    proxy.properties_cache.clear()
+
+
+def reset_properties():
+    proxy.properties_cache.clear()
+
+
+def get_cases(root):
+    '''
+    Return [(operation_name, callable, reset),...].
+    reset is called before every run of the callable, out of the timing.
+    '''
+    window = [obj for name, obj in root.Get_subitems() if name == 'Fake window 0'][0]
+    control = find_unnamed_control(window)
+    listview = find_proxy(window, proxy.Pwa_listview)
+    listview_item = listview.Get_subitems()[0][1]
+    combobox = find_proxy(window, proxy.Pwa_combobox)
+    toolbar = find_proxy(window, proxy.Pwa_toolbar)
+    tree = find_proxy(window, proxy.Pwa_tree)
+    menu = find_proxy(window, proxy.Pwa_menu)
+    no_reset = lambda: None
+    def reset_listview():
+        listview.items_snapshot = cache.ItemsSnapshot()
+    def reset_combobox():
+        combobox.items_snapshot = cache.ItemsSnapshot()
+    recorder = codegen.Recorder()
+    for i in range(SCRIPT_STEPS):
+        recorder.record([control, listview_item, window][i % 3],
+                        SELECT_ACTION_ID if i % 3 == 1 else CLICK_ACTION_ID)
+    replay_recorder = codegen.Recorder()
+    for i in range(REPLAY_STEPS):
+        replay_recorder.record([control, window][i % 2], CLICK_ACTION_ID)
+    replay_steps = replay.from_recording(replay_recorder.steps)
+    player = replay.Player()
+    return [
+        ('PC_system.Get_subitems', root.Get_subitems, no_reset),
+        ('GetProperties control (cold)', control.GetProperties, reset_caches),
+        ('GetProperties control (warm)', control.GetProperties, reset_properties),
+        ('GetProperties control (cached)', control.GetProperties, no_reset),
+        ('Get_quick_properties control', control.Get_quick_properties, reset_caches),
+        ('GetProperties window', window.GetProperties, reset_properties),
+        ('GetProperties listview item', listview_item.GetProperties, reset_properties),
+        ('Get_subitems window (cold)', window.Get_subitems, reset_caches),
+        ('Get_subitems window (warm)', window.Get_subitems, no_reset),
+        ('Get_subitems menu', menu.Get_subitems, no_reset),
+        ('Get_subitems toolbar', toolbar.Get_subitems, no_reset),
+        ('Get_subitems tree view', tree.Get_subitems, no_reset),
+        ('Get_subitems listview (cold)', listview.Get_subitems, reset_listview),
+        ('Get_subitems listview (warm)', listview.Get_subitems, no_reset),
+        ('Get_subitems combobox (cold)', combobox.Get_subitems, reset_combobox),
+        ('Get_subitems combobox (warm)', combobox.Get_subitems, no_reset),
+        ('Get_actions control', control.Get_actions, no_reset),
+        ('Get_actions listview item', listview_item.Get_actions, no_reset),
+        ('Exec_action control', lambda: control.Exec_action(CLICK_ACTION_ID), no_reset),
+        ('Get_code control', lambda: control.Get_code(CLICK_ACTION_ID), no_reset),
+        ('Get_code window', lambda: window.Get_code(CLICK_ACTION_ID), no_reset),
+        ('Get_code listview item', lambda: listview_item.Get_code(SELECT_ACTION_ID), no_reset),
+        ('Recorder.record control', lambda: recorder.record(control, CLICK_ACTION_ID), no_reset),
+        ('codegen.generate %d steps' % SCRIPT_STEPS, lambda: codegen.generate(recorder.steps[:SCRIPT_STEPS]),
+         no_reset),
+        ('codegen.generate_fast %d steps' % SCRIPT_STEPS,
+         lambda: codegen.generate_fast(recorder.steps[:SCRIPT_STEPS]), no_reset),
+        ('Player.run %d steps (cold)' % REPLAY_STEPS, lambda: player.run(replay_steps),
+         player.cache.clear),
+        ('Player.run %d steps (warm)' % REPLAY_STEPS, lambda: player.run(replay_steps), no_reset),
+    ]
+
+
+def check_instrumented(root):
+    '''
+    Return list of failure messages: the proxies must work the same with
+    the backend calls recorded (Diagnostics > Record backend calls)
+    '''
+    def get_results():
+        reset_caches()
+        window = [obj for name, obj in root.Get_subitems() if name == 'Fake window 0'][0]
+        control = find_unnamed_control(window)
+        listview_item = find_proxy(window, proxy.Pwa_listview).Get_subitems()[0][1]
+        return [('Get_actions control', control.Get_actions()),
+                ('Get_actions listview item', listview_item.Get_actions()),
+                ('pwa_type control', control.Get_quick_properties()['pwa_type'])]
+    expected = get_results()
+    instrument.enable()
+    try:
+        results = get_results()
+    finally:
+        instrument.disable()
+        reset_caches()
+    return ['%s: %r while recording the calls, %r otherwise' % (name, result, expected_result)
+            for (name, result), (name, expected_result) in zip(results, expected)
+            if result != expected_result]
+
+
+def run_case(fake, func, reset, repeat, warmup):
+    '''
+    Return {'p50', 'p90', 'p99', 'max', 'calls', 'calls_by_type'} of the
+    operation. Latencies are in milliseconds, calls are per run.
+    '''
+    for i in range(warmup):
+        reset()
+        func()
+    timings = []
+    calls = collections.Counter()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            reset()
+            fake.reset_calls()
+            start = time.time()
+            func()
+            timings.append((time.time() - start) * 1000.0)
+            calls.update(fake.calls)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    calls_by_type = dict((name, count / float(repeat)) for name, count in calls.items())
+    return {'p50' : instrument.percentile(timings, 50),
+            'p90' : instrument.percentile(timings, 90),
+            'p99' : instrument.percentile(timings, 99),
+            'max' : max(timings),
+            'calls' : sum(calls.values()) / float(repeat),
+            'calls_by_type' : calls_by_type}
+
+
+def run_suite(tree_options, repeat=30, warmup=2, operations=None):
+    '''
+    Build the synthetic tree and run all the (or selected) operations.
+    Return {'tree' : tree_options, 'results' : {operation : result},
+    'failures' : [message,...]}
+    '''
+    fake = fake_backend.FakeBackend(**tree_options)
+    previous_backend = backend._backend
+    backend.set_backend(fake)
+    try:
+        reset_caches()
+        root = proxy.PC_system(None)
+        failures = check_instrumented(root)
+        results = collections.OrderedDict()
+        for name, func, reset in get_cases(root):
+            if operations and name not in operations:
+                continue
+            results[name] = run_case(fake, func, reset, repeat, warmup)
+    finally:
+        backend.set_backend(previous_backend)
+    return {'tree' : tree_options, 'results' : results, 'failures' : failures}
+
+
+def compare(report, baseline, tolerance):
+    '''
+    Return list of regression messages of the report against the baseline
+    '''
+    if report['tree'] != baseline['tree']:
+        return ['the baseline was recorded for another tree: %r' % (baseline['tree'],)]
+    regressions = []
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]
+        if result['calls'] > base['calls']:
+            regressions.append('%s: %.1f backend calls, baseline %.1f' % (
+                name, result['calls'], base['calls']))
+        if result['p50'] > base['p50'] * (1 + tolerance) + 0.05:
+            regressions.append('%s: p50 %.3f ms, baseline %.3f ms' % (
+                name, result['p50'], base['p50']))
+    return regressions
+
+
+def print_report(report):
+    print('%-32s %9s %9s %9s %9s %9s' % ('operation', 'p50 ms', 'p90 ms',
+                                         'p99 ms', 'max ms', 'calls'))
+    for name, result in report['results'].items():
+        print('%-32s %9.3f %9.3f %9.3f %9.3f %9.1f' % (
+            name, result['p50'], result['p90'], result['p99'], result['max'],
+            result['calls']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--windows', type=int, default=3)
+    parser.add_argument('--controls', type=int, default=500)
+    parser.add_argument('--fanout', type=int, default=50)
+    parser.add_argument('--list-items', type=int, default=5000)
+    parser.add_argument('--combo-items', type=int, default=200)
+    parser.add_argument('--tabs', type=int, default=10)
+    parser.add_argument('--toolbar-buttons', type=int, default=20)
+    parser.add_argument('--tree-roots', type=int, default=10)
+    parser.add_argument('--tree-depth', type=int, default=2)
+    parser.add_argument('--menu-items', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every backend call')
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--operation', action='append', dest='operations',
+                        help='run only this operation, may be repeated')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--save-baseline', help='store the report as a baseline')
+    parser.add_argument('--check', help='compare with the baseline, exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed relative growth of the median latency')
+    args = parser.parse_args(argv)
+
+    tree_options = dict((option, getattr(args, option)) for option in TREE_OPTIONS)
+    report = run_suite(tree_options, args.repeat, args.warmup, args.operations)
+    failures = report.pop('failures')
+    print_report(report)
+    for message in failures:
+        print('FAILED ' + message)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w') as report_file:
+                json.dump(report, report_file, indent=2, sort_keys=True)
+    if args.check:
+        with open(args.check) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print('REGRESSION ' + message)
+        if regressions:
+            return 1
+        print('No regressions against %s' % args.check)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
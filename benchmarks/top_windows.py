@@ -0,0 +1,148 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Benchmark of the top level windows enumeration (PC_system.Get_subitems).
+
+A stand-in window provider charges a fixed latency per window system
+call. The former enumeration is modelled by its calls: the task bar
+lookup on every refresh, a WindowSpecification resolution (IsWindow +
+class name lookup for the wrapper + Texts()) per window and one second
+sleeps on find_windows failures. No find_windows call fails by default,
+so the difference comes from the number of calls; --failures adds the
+retry delays.
+'''
+
+import argparse
+import time
+
+import winlist
+
+
+class StandInProvider(object):
+    '''
+    winlist provider with synthetic windows, per-call latency and a number
+    of failing find_windows calls
+    '''
+    def __init__(self, windows_count, latency, failures=0):
+        self.handles = [0x20000 + i for i in range(windows_count)]
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def find_windows(self):
+        self._call()
+        if self.failures:
+            self.failures -= 1
+            raise OverflowError('array too large')
+        return list(self.handles)
+
+    def window_text(self, handle):
+        self._call()
+        return u'Window %d' % handle
+
+    def class_name(self, handle):
+        self._call()
+        return u'#32770'
+
+    def is_window(self, handle):
+        self._call()
+        return True
+
+    def taskbar_handle(self):
+        #FindWindow of Shell_TrayWnd + child lookup in the taskbar module
+        self._call()
+        self._call()
+        return self.handles[0]
+
+
+def legacy_enum(provider, sleep=1):
+    '''
+    Calls made by the former PC_system.Get_subitems
+    '''
+    for i in range(3):
+        try:
+            handles = provider.find_windows()
+        except (OverflowError, MemoryError):
+            time.sleep(sleep)
+        else:
+            break
+    else:
+        handles = []
+    taskbar_handle = provider.taskbar_handle()
+    titles = []
+    for handle in handles:
+        #WindowSpecification -> WrapperObject() -> Texts()
+        provider.is_window(handle)
+        provider.class_name(handle)
+        if handle == taskbar_handle:
+            titles.append(u'TaskBar')
+        else:
+            titles.append(provider.window_text(handle))
+    return titles
+
+
+def bulk_enum(enumerator):
+    return [info.title for info in enumerator.enum_windows()]
+
+
+def run(windows_count, latency, failures, refreshes):
+    results = []
+    provider = StandInProvider(windows_count, latency, failures)
+    start = time.time()
+    for i in range(refreshes):
+        legacy_titles = legacy_enum(provider)
+    results.append(('legacy', time.time() - start, provider.calls))
+
+    provider = StandInProvider(windows_count, latency, failures)
+    enumerator = winlist.WindowsEnumerator(provider)
+    start = time.time()
+    for i in range(refreshes):
+        bulk_titles = bulk_enum(enumerator)
+    results.append(('bulk', time.time() - start, provider.calls))
+    assert legacy_titles == bulk_titles, 'titles differ'
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--windows', type=int, default=300,
+                        help='top level windows')
+    parser.add_argument('--latency', type=float, default=0.00005,
+                        help='seconds per window system call')
+    parser.add_argument('--failures', type=int, default=0,
+                        help='failing find_windows calls before the first success')
+    parser.add_argument('--refreshes', type=int, default=5,
+                        help='root refreshes')
+    args = parser.parse_args()
+    results = run(args.windows, args.latency, args.failures, args.refreshes)
+    print('%d windows, %d refreshes, %d failing find_windows' % (
+        args.windows, args.refreshes, args.failures))
+    for name, elapsed, calls in results:
+        print('%-8s %10.4f s %10d calls' % (name, elapsed, calls))
+
+
+if __name__ == '__main__':
+    main()
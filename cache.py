@@ -0,0 +1,318 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+import contextlib
+import threading
+import time
+
+'''
+caches for the proxy module
+'''
+
+
+def invert_unique_dict(uniq_names, get_handle):
+    '''
+    Turn {access_name : control} into {handle : [access_name,...]}
+    in a single pass. Names of every control are sorted by length.
+    get_handle - callable(control) -> control handle
+    '''
+    names = {}
+    for uniq_name, ctrl in uniq_names.items():
+        if uniq_name != '':
+            names.setdefault(get_handle(ctrl), []).append(uniq_name)
+    for ctrl_names in names.values():
+        ctrl_names.sort(key=len)
+    return names
+
+
+class AccessNamesIndex(object):
+    '''
+    Access names of all the controls of one top level window.
+    '''
+    def __init__(self, handles, names):
+        '''
+        handles - tuple of the control handles the index was built for
+        names - {handle : [access_name,...]}, names sorted by length
+        '''
+        self.handles = handles
+        self.names = names
+        self._handles_set = None
+
+    def __contains__(self, handle):
+        if self._handles_set is None:
+            self._handles_set = frozenset(self.handles)
+        return handle in self._handles_set
+
+    def get_names(self, handle):
+        '''
+        Return access names of the control, shortest first
+        '''
+        return self.names.get(handle, [])
+
+
+class AccessNamesCache(object):
+    '''
+    AccessNamesIndex objects keyed by the top level window handle.
+    An index is dropped as soon as the window's control set changes.
+
+    When the windows changes are tracked by events (see winevents),
+    trusted is set and get_cached() may be used to skip the control
+    set check, the events invalidate the indexes instead. trust() does
+    the same for one thread, e.g. for a crawler worker.
+
+    Indexes are built out of the lock. A window invalidated while its
+    index is being built bumps the window's generation, and the index
+    built for the former generation is returned but not cached.
+    '''
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.trusted = False
+        #of the windows with an index being built:
+        self._builds = {} #top level handle -> number of the builds
+        self._generations = {} #top level handle -> generation
+        self._building_handles = {} #top level handle -> set of the control handles
+
+    @contextlib.contextmanager
+    def trust(self):
+        '''
+        Trust the cached indexes in the current thread within the block
+        '''
+        trusted = getattr(self._local, 'trusted', False)
+        self._local.trusted = True
+        try:
+            yield
+        finally:
+            self._local.trusted = trusted
+
+    def get_cached(self, top_level_handle):
+        '''
+        Return the cached index of the top level window if it can be
+        trusted without the control set check, None otherwise
+        '''
+        if not (self.trusted or getattr(self._local, 'trusted', False)):
+            return None
+        with self._lock:
+            return self._indexes.get(top_level_handle)
+
+    def get_index(self, top_level_handle, handles, build_names):
+        '''
+        Return the AccessNamesIndex for the top level window.
+        handles - current control handles of the window
+        build_names - callable(handles) -> {handle : [access_name,...]},
+        used when there is no index yet or the control set has changed
+        '''
+        handles = tuple(handles)
+        with self._lock:
+            index = self._indexes.get(top_level_handle)
+            if index is not None and index.handles == handles:
+                return index
+            self._builds[top_level_handle] = self._builds.get(top_level_handle, 0) + 1
+            generation = self._generations.setdefault(top_level_handle, 0)
+            self._building_handles.setdefault(top_level_handle, set()).update(handles)
+        index = None
+        try:
+            index = AccessNamesIndex(handles, build_names(handles))
+        finally:
+            with self._lock:
+                if index is not None and self._generations[top_level_handle] == generation:
+                    self._indexes[top_level_handle] = index
+                self._builds[top_level_handle] -= 1
+                if not self._builds[top_level_handle]:
+                    del self._builds[top_level_handle]
+                    del self._generations[top_level_handle]
+                    del self._building_handles[top_level_handle]
+        return index
+
+    def _bump(self, top_level_handle):
+        #under the lock: the index being built for the window is outdated
+        if top_level_handle in self._generations:
+            self._generations[top_level_handle] += 1
+
+    def invalidate(self, top_level_handle=None):
+        '''
+        Drop the index of the top level window or all the indexes
+        '''
+        with self._lock:
+            if top_level_handle is None:
+                self._indexes.clear()
+                for building_handle in self._generations.keys():
+                    self._bump(building_handle)
+            else:
+                self._indexes.pop(top_level_handle, None)
+                self._bump(top_level_handle)
+
+    def invalidate_handle(self, handle):
+        '''
+        Drop the indexes the control or window takes part in
+        '''
+        with self._lock:
+            for top_level_handle, index in self._indexes.items():
+                if top_level_handle == handle or handle in index:
+                    del self._indexes[top_level_handle]
+            for top_level_handle, handles in self._building_handles.items():
+                if top_level_handle == handle or handle in handles:
+                    self._bump(top_level_handle)
+
+
+class ItemsSnapshot(object):
+    '''
+    Item data of a control with virtual items (list view rows, combobox
+    items). The snapshot is valid while the control reports the same
+    item count and is shared by all the items of the control.
+    '''
+    def __init__(self):
+        self.items_count = None
+        self.items = {}
+        self._lock = threading.Lock()
+
+    def get_items(self, indexes, items_count, fetch_items):
+        '''
+        Return {index : item_data} for the indexes.
+        items_count - current item count of the control
+        fetch_items - callable(indexes) -> {index : item_data}, called for
+        the indexes missing in the snapshot only
+        '''
+        with self._lock:
+            if items_count != self.items_count:
+                self.items = {}
+                self.items_count = items_count
+            missing = [index for index in indexes if index not in self.items]
+        if missing:
+            fetched = fetch_items(missing)
+            with self._lock:
+                if items_count == self.items_count:
+                    self.items.update(fetched)
+        else:
+            fetched = {}
+        result = {}
+        with self._lock:
+            for index in indexes:
+                if index in fetched:
+                    result[index] = fetched[index]
+                elif index in self.items:
+                    result[index] = self.items[index]
+        return result
+
+
+class PropertyCache(object):
+    '''
+    Bounded cache of the objects' properties. An entry lives for ttl
+    seconds, the least recently used entry is evicted when the cache
+    is full. Keys are window handles or (parent key, item id) tuples
+    for the virtual items.
+
+    Properties of a key invalidated while they are being got are
+    returned but not cached, as for AccessNamesCache.
+    '''
+    def __init__(self, max_size=256, ttl=5.0, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = collections.OrderedDict() #key -> (time, properties)
+        self._lock = threading.Lock()
+        self._generations = {} #key being got -> [number of the gets, generation]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, get_properties):
+        '''
+        Return the cached properties of the key or get_properties(),
+        which is cached then
+        '''
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries[key] = entry #most recently used
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            getting = self._generations.setdefault(key, [0, 0])
+            getting[0] += 1
+            generation = getting[1]
+        got = False
+        try:
+            properties = get_properties()
+            got = True
+        finally:
+            with self._lock:
+                if got and getting[1] == generation:
+                    self._entries[key] = (now, properties)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+                getting[0] -= 1
+                if not getting[0]:
+                    del self._generations[key]
+        return properties
+
+    def peek(self, key):
+        '''
+        Return the cached properties of the key if they are still valid,
+        None otherwise
+        '''
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] >= self.ttl:
+                return None
+            del self._entries[key]
+            self._entries[key] = entry #most recently used
+            self.hits += 1
+            return entry[1]
+
+    def invalidate(self, key):
+        '''
+        Drop the entry of the key and of the virtual items under it
+        '''
+        with self._lock:
+            self._entries.pop(key, None)
+            for entry_key in self._entries.keys():
+                if isinstance(entry_key, tuple) and entry_key[0] == key:
+                    del self._entries[entry_key]
+            for getting_key, getting in self._generations.items():
+                if getting_key == key or (isinstance(getting_key, tuple) and getting_key[0] == key):
+                    getting[1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for getting in self._generations.values():
+                getting[1] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_stats(self):
+        '''
+        Return {'hits' : n, 'misses' : n, 'evictions' : n, 'size' : n}
+        '''
+        with self._lock:
+            return {'hits' : self.hits,
+                    'misses' : self.misses,
+                    'evictions' : self.evictions,
+                    'size' : len(self._entries)}
@@ -0,0 +1,265 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+import threading
+
+import backend
+import const
+import proxy
+
+'''
+Whole scripts from recorded actions.
+
+    recorder = codegen.Recorder()
+    recorder.record(button_obj, 102) #Click
+    recorder.record(edit_obj, 102)
+    script = codegen.generate(recorder.steps)
+
+A step keeps the window, the access name of the control and the action
+code, all resolved when the action is recorded: the access name of a
+control is looked up once per recorder. The script finds every window
+once, in a variable of its own, and looks a control up again only when
+the next step acts on another one.
+
+generate_fast() makes scripts for frequent replays. They start with
+RUNTIME_HELPER: windows are found through a handle cache and controls
+by the direct specification recorded with the step - class, control id
+and index path from the window. The pywinauto best match search by the
+access name is the fallback when the specification does not resolve.
+'''
+
+#title, class_name - of the top level window, handle - at the recording time
+#instance - index of the window among the ones of the same title and
+#class, ordered by handle, at the recording time
+WindowRef = collections.namedtuple('WindowRef', 'handle title class_name instance')
+
+#class_name, control_id - of the control
+#index_path - [index among the parent's children,...] from the window down
+ControlSpec = collections.namedtuple('ControlSpec', 'class_name control_id index_path')
+
+#window - WindowRef
+#control - access name of the control the action code refers to as ctrl,
+#None if the code uses window only or the control has no access name
+#spec - ControlSpec of the control, None if the code uses window only
+#action - action name, e.g. 'Click'
+#code - action code, it uses the window and ctrl variables
+Step = collections.namedtuple('Step', 'window control spec action code')
+
+#finds windows and controls for the generate_fast() scripts
+RUNTIME_HELPER = '''
+import pywinauto.controls.HwndWrapper
+import pywinauto.handleprops
+
+_window_handles = {}
+_control_handles = {}
+
+def _is_control(handle, class_name, control_id):
+    return (pywinauto.handleprops.iswindow(handle) and
+            pywinauto.handleprops.classname(handle) == class_name and
+            pywinauto.handleprops.controlid(handle) == control_id)
+
+def _resolve_spec(window_handle, class_name, control_id, index_path):
+    handle = window_handle
+    for index in index_path:
+        children = [child for child in pywinauto.handleprops.children(handle)
+                    if pywinauto.handleprops.parent(child) == handle]
+        if index >= len(children):
+            break
+        handle = children[index]
+    else:
+        if _is_control(handle, class_name, control_id):
+            return handle
+    handles = pywinauto.findwindows.find_windows(parent=window_handle, top_level_only=False,
+                                                 class_name=class_name, control_id=control_id)
+    if len(handles) == 1:
+        return handles[0]
+    return None
+
+def find_window(title, class_name):
+    key = (title, class_name)
+    handle = _window_handles.get(key)
+    if handle is None or not pywinauto.handleprops.iswindow(handle):
+        handle = pywinauto.findwindows.find_windows(title=title, class_name=class_name)[0]
+        _window_handles[key] = handle
+    return pwa_app.window_(handle=handle)
+
+def find_control(window, access_name, class_name, control_id, index_path):
+    key = (window.handle, access_name)
+    handle = _control_handles.get(key)
+    if handle is None or not _is_control(handle, class_name, control_id):
+        handle = _resolve_spec(window.handle, class_name, control_id, index_path)
+        if handle is None:
+            if access_name is None:
+                raise pywinauto.findwindows.WindowNotFoundError()
+            return window[access_name] #best match search
+        _control_handles[key] = handle
+    return pywinauto.controls.HwndWrapper.HwndWrapper(handle)
+
+'''
+
+
+class Recorder(object):
+    '''
+    Records the actions done on the proxy objects as Steps
+    '''
+    def __init__(self):
+        self.steps = []
+        self._windows = {} #handle -> WindowRef
+        self._controls = {} #control handle -> (access name, ControlSpec)
+        self._lock = threading.Lock()
+
+    def record(self, obj, action_id):
+        '''
+        Record the action of the proxy object, return its Step or None
+        if there is no code for it
+        '''
+        code = obj.Get_action_code(action_id)
+        if not code:
+            return None
+        window, control = obj.Get_code_owner()
+        window_ref = self._get_window_ref(window)
+        control_name = spec = None
+        if control is not None:
+            control_name, spec = self._get_control(window_ref, control)
+        step = Step(window_ref, control_name, spec, const.ACTIONS[action_id], code)
+        with self._lock:
+            self.steps.append(step)
+        return step
+
+    def clear(self):
+        with self._lock:
+            self.steps = []
+            self._windows.clear()
+            self._controls.clear()
+
+    def _get_window_ref(self, window):
+        handle = window.handle
+        with self._lock:
+            window_ref = self._windows.get(handle)
+        if window_ref is None:
+            title = window.WindowText()
+            class_name = window.Class()
+            handles = sorted(backend.get_backend().find_windows(title=title, class_name=class_name))
+            instance = handles.index(handle) if handle in handles else 0
+            window_ref = WindowRef(handle, title, class_name, instance)
+            with self._lock:
+                self._windows[handle] = window_ref
+        return window_ref
+
+    def _get_control(self, window_ref, control):
+        '''
+        Return (access name, ControlSpec) of the control, the access
+        name is None if the control has none
+        '''
+        handle = control.handle
+        with self._lock:
+            known = self._controls.get(handle)
+        if known is None:
+            names_index = proxy.get_access_names_index(window_ref.handle)
+            access_names = names_index.get_names(handle)
+            access_name = access_names[0] if access_names else None
+            known = (access_name, ControlSpec(control.Class(), control.ControlID(),
+                                              self._get_index_path(window_ref, control)))
+            with self._lock:
+                self._controls[handle] = known
+        return known
+
+    def _get_index_path(self, window_ref, control):
+        path = []
+        while control.handle != window_ref.handle:
+            parent = control.Parent()
+            if parent is None:
+                return [] #not a descendant of the window, e.g. a destroyed one
+            path.append([child.handle for child in parent.Children()].index(control.handle))
+            control = parent
+        return path[::-1]
+
+
+def _quote(text):
+    if isinstance(text, str):
+        text = text.decode('cp1251', 'replace')
+    return "u'" + text.encode('unicode-escape', 'replace') + "'"
+
+
+def _get_switches(steps):
+    '''
+    Yield (step, window changed, control changed) of the steps. The
+    control is changed if the step uses another ctrl than the previous one.
+    '''
+    current_window = None
+    current_control = None
+    for step in steps:
+        window_key = (step.window.title, step.window.class_name)
+        window_changed = window_key != current_window
+        if window_changed:
+            current_window = window_key
+            current_control = None
+        control_key = (step.control, step.spec)
+        control_changed = step.spec is not None and control_key != current_control
+        if control_changed:
+            current_control = control_key
+        yield step, window_changed, control_changed
+
+
+def generate(steps, header=const.CODE_HEADER):
+    '''
+    Return the script of the steps
+    '''
+    lines = [header]
+    window_vars = {} #(title, class_name) -> variable name
+    for step, window_changed, control_changed in _get_switches(steps):
+        window_key = (step.window.title, step.window.class_name)
+        if window_key not in window_vars:
+            window_var = 'window%d' % (len(window_vars) + 1)
+            window_vars[window_key] = window_var
+            lines.append("w_handle = pywinauto.findwindows.find_windows(title=%s, class_name=%s)[0]\n"
+                         % (_quote(step.window.title), _quote(step.window.class_name)))
+            lines.append('%s = pwa_app.window_(handle=w_handle)\n' % window_var)
+        if window_changed:
+            lines.append('window = %s\n' % window_vars[window_key])
+        if control_changed and step.control is None:
+            #no access name, the control is found by its class and id
+            lines.append('ctrl = window.ChildWindow(class_name=%s, control_id=%r)\n'
+                         % (_quote(step.spec.class_name), step.spec.control_id))
+        elif control_changed:
+            lines.append('ctrl = window[%s]\n' % _quote(step.control))
+        lines.append(step.code)
+    return ''.join(lines)
+
+
+def generate_fast(steps, header=const.CODE_HEADER):
+    '''
+    Return the script of the steps finding the windows and the controls
+    through RUNTIME_HELPER
+    '''
+    lines = [header, RUNTIME_HELPER]
+    for step, window_changed, control_changed in _get_switches(steps):
+        if window_changed:
+            lines.append('window = find_window(%s, %s)\n' % (_quote(step.window.title),
+                                                             _quote(step.window.class_name)))
+        if control_changed:
+            spec = step.spec
+            access_name = 'None' if step.control is None else _quote(step.control)
+            lines.append('ctrl = find_control(window, %s, %s, %r, %r)\n'
+                         % (access_name, _quote(spec.class_name),
+                            spec.control_id, list(spec.index_path)))
+        lines.append(step.code)
+    return ''.join(lines)
@@ -43,5 +43,15 @@ ACTIONS =  {101 : 'Close',
             122 : 'Collapse',
             123 : 'Expand',
             }
+
+#beginning of every generated script
+CODE_HEADER = 'import pywinauto\n\npwa_app = pywinauto.application.Application()\n'
+
+#virtual items (list view rows, combobox items, tabs) loaded at once
+ITEMS_PAGE_SIZE = 100
+
+#properties cache: max number of the objects and seconds an entry lives
+PROPERTIES_CACHE_SIZE = 256
+PROPERTIES_CACHE_TTL = 5.0
             
 VERSION = '0.4.4'
\ No newline at end of file
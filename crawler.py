@@ -0,0 +1,237 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import Queue
+import threading
+import time
+import traceback
+
+import instrument
+import proxy
+import scheduler
+
+'''
+Parallel crawler of the proxy objects tree.
+
+    import crawler
+    snapshot = crawler.Crawler(workers=8, max_depth=None).crawl(window_obj)
+    for node in snapshot.nodes:
+        print node.depth, node.name, node.properties.get('Access names')
+
+Nodes are visited by a worker pool: every visit gets the properties and
+the children of one node. The paged virtual items are loaded completely.
+The windows are assumed not to change during a crawl: the access names
+index of a top level window is built once per crawl.
+'''
+
+#defaults of Crawler
+WORKERS = 8
+NODE_TIMEOUT = 5.0
+
+
+class Node(object):
+    '''
+    Crawled node of a Snapshot
+    '''
+    __slots__ = ('index', 'parent', 'depth', 'name', 'proxy_type', 'handle',
+                 'properties', 'children', 'error')
+
+    def __init__(self, index, parent, depth, name, proxy_type, handle):
+        self.index = index
+        #index of the parent node, None for the root
+        self.parent = parent
+        self.depth = depth
+        self.name = name
+        #proxy class name, e.g. 'Pwa_listview'
+        self.proxy_type = proxy_type
+        #window handle, None for the items without one
+        self.handle = handle
+        self.properties = {}
+        #indexes of the child nodes
+        self.children = []
+        #why the node is incomplete: timeout, exception text
+        self.error = None
+
+    def __repr__(self):
+        return '<Node %d %r %s>' % (self.index, self.name, self.proxy_type)
+
+
+class Snapshot(object):
+    '''
+    Crawled tree. nodes[0] is the root, a parent always precedes its
+    children in nodes.
+    '''
+    def __init__(self, nodes=None):
+        self.nodes = nodes or []
+        self.created = time.time()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def root(self):
+        return self.nodes[0]
+
+    def get_children(self, node):
+        return [self.nodes[index] for index in node.children]
+
+    def get_path(self, node):
+        '''
+        Return [root name, ..., node name]
+        '''
+        path = []
+        while node is not None:
+            path.append(node.name)
+            node = self.nodes[node.parent] if node.parent is not None else None
+        return path[::-1]
+
+    def get_errors(self):
+        return [node for node in self.nodes if node.error is not None]
+
+
+def get_all_subitems(obj):
+    '''
+    Return obj.Get_subitems() with all the pages of the virtual items
+    instead of the "N more items..." placeholder
+    '''
+    subitems = obj.Get_subitems()
+    while subitems and isinstance(subitems[-1][1], proxy.virtual_more_items):
+        subitems = subitems[:-1] + subitems[-1][1].Get_page()
+    return subitems
+
+
+def _get_top_level_handle(obj):
+    '''
+    Return handle of the top level window of obj, None for the objects
+    out of any window (the PC)
+    '''
+    try:
+        return obj.Get_code_owner()[0].handle
+    except Exception:
+        return None
+
+
+class Crawler(object):
+    '''
+    Walks the tree under a proxy object in parallel.
+
+    workers - size of the worker pool, used if pool is None
+    max_depth - children of the nodes at this depth are not crawled,
+    None for no limit
+    node_timeout - seconds a node visit may take. The node of a longer
+    visit gets error 'timeout' and no children, the late result is dropped.
+    with_properties - get GetProperties() of every node
+    '''
+    def __init__(self, workers=WORKERS, max_depth=None, node_timeout=NODE_TIMEOUT,
+                 with_properties=True, pool=None):
+        self.max_depth = max_depth
+        self.node_timeout = node_timeout
+        self.with_properties = with_properties
+        self.pool = pool
+        self.workers = workers
+
+    def crawl(self, obj, name=None):
+        '''
+        Return the Snapshot of the tree under obj
+        '''
+        #the indexes built during the crawl are trusted, drop the older ones
+        #of the crawled window, of all the windows for a crawl of the PC
+        proxy.access_names_cache.invalidate(_get_top_level_handle(obj))
+        own_pool = self.pool is None
+        pool = self.pool or scheduler.WorkerPool(self.workers, name='swapy-crawler')
+        try:
+            return self._crawl(pool, obj, name)
+        finally:
+            if own_pool:
+                #a worker stuck in a timed out visit is left behind
+                pool.shutdown(wait=True, timeout=self.node_timeout)
+
+    def _crawl(self, pool, obj, name):
+        if name is None:
+            name = type(obj).__name__
+        nodes = [self._make_node(0, None, 0, name, obj)]
+        results = Queue.Queue()
+        running = {} #node index -> (visit start time, node)
+        pending = set()
+        stop = threading.Event()
+        watchdog = threading.Thread(target=self._watch, args=(running, results, stop),
+                                    name='swapy-crawler-watchdog')
+        watchdog.daemon = True
+        watchdog.start()
+
+        def visit(node, obj):
+            pending.add(node.index)
+            pool.submit(self._visit, node, obj, running, results)
+
+        try:
+            visit(nodes[0], obj)
+            while pending:
+                node, properties, subitems, error = results.get()
+                if node.index not in pending:
+                    continue #the late result of a timed out visit
+                pending.discard(node.index)
+                running.pop(node.index, None)
+                node.properties = properties
+                node.error = error
+                for child_name, child_obj in subitems:
+                    child = self._make_node(len(nodes), node.index, node.depth + 1,
+                                            child_name, child_obj)
+                    nodes.append(child)
+                    node.children.append(child.index)
+                    visit(child, child_obj)
+        finally:
+            stop.set()
+            watchdog.join()
+        return Snapshot(nodes)
+
+    def _watch(self, running, results, stop):
+        '''
+        Report the visits running longer than node_timeout
+        '''
+        poll = min(self.node_timeout / 2.0, 0.1)
+        while not stop.wait(poll):
+            now = time.time()
+            for index, (start, node) in running.items():
+                if now - start > self.node_timeout and running.pop(index, None) is not None:
+                    results.put((node, {}, [], 'timeout'))
+
+    def _make_node(self, index, parent, depth, name, obj):
+        try:
+            identity = obj.Get_identity()
+        except Exception:
+            identity = None
+        if not isinstance(identity, (int, long)):
+            identity = None
+        return Node(index, parent, depth, name, type(obj).__name__, identity)
+
+    def _visit(self, node, obj, running, results):
+        #worker thread
+        running[node.index] = (time.time(), node)
+        properties = {}
+        subitems = []
+        error = None
+        with instrument.operation('crawl'), proxy.access_names_cache.trust():
+            try:
+                if self.with_properties:
+                    properties = obj.GetProperties()
+                if self.max_depth is None or node.depth < self.max_depth:
+                    subitems = get_all_subitems(obj)
+            except Exception:
+                error = traceback.format_exc().strip().splitlines()[-1]
+        results.put((node, properties, subitems, error))
@@ -0,0 +1,793 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+import random
+import threading
+import time
+
+import backend
+import winevents
+
+'''
+Deterministic in-memory window system for headless profiling.
+
+FakeBackend generates synthetic top level windows with nested controls,
+menus, list views, comboboxes, tabs, toolbars and tree views. Wrappers
+provide the part of the pywinauto interface used by the proxy module.
+Every wrapper call is counted, may be slowed down by a fixed latency and
+may fail with an injected exception. destroy(), rename(), create() and
+reparent() change the windows and report the changes to the event source.
+
+Usage:
+    import backend, fake_backend
+    backend.set_backend(fake_backend.FakeBackend(windows=5, controls=2000))
+'''
+
+#control classes cycled through while a window is filled with controls
+CONTROL_CLASSES = ['Edit', 'Button', 'Static', 'Pane', 'Edit', 'Button',
+                   'ComboBox', 'Static', 'Pane', 'SysListView32', 'Edit',
+                   'SysTabControl32', 'ToolbarWindow32', 'SysTreeView32']
+
+FRIENDLY_CLASS_NAMES = {'#32770' : 'Dialog',
+                        'Pane' : 'Pane',
+                        'SysListView32' : 'ListView',
+                        'SysTabControl32' : 'TabControl',
+                        'ToolbarWindow32' : 'Toolbar',
+                        'SysTreeView32' : 'TreeView',
+                        'Shell_TrayWnd' : 'Shell_TrayWnd'}
+
+
+class FakeInvalidWindowHandle(RuntimeError):
+    '''
+    Raised by the wrappers of destroyed windows
+    '''
+    pass
+
+
+class FakeControl(object):
+    '''
+    Generic window wrapper, stands for pywinauto HwndWrapper
+    '''
+    control_type = 'unknown'
+
+    def __init__(self, fake_backend, handle, parent, class_name, text,
+                 visible=True, enabled=True):
+        self._backend = fake_backend
+        self.handle = handle
+        self.parent = parent
+        self.class_name = class_name
+        self.text = text
+        self.visible = visible
+        self.enabled = enabled
+        self.children = []
+        self.menu = None
+        self.actions = []
+
+    def _call(self, name):
+        self._backend._call(name, self.handle)
+
+    def __eq__(self, other):
+        return getattr(other, 'handle', None) == self.handle
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.handle)
+
+    def __repr__(self):
+        return '<%s %s 0x%x>' % (type(self).__name__, self.class_name, self.handle)
+
+    def WrapperObject(self):
+        self._call('WrapperObject')
+        return self
+
+    def WindowText(self):
+        self._call('WindowText')
+        return self.text
+
+    def Texts(self):
+        self._call('Texts')
+        return [self.text]
+
+    def Class(self):
+        self._call('Class')
+        return self.class_name
+
+    def FriendlyClassName(self):
+        self._call('FriendlyClassName')
+        return FRIENDLY_CLASS_NAMES.get(self.class_name, self.class_name)
+
+    def ControlID(self):
+        self._call('ControlID')
+        return self.handle & 0xffff
+
+    def Rectangle(self):
+        self._call('Rectangle')
+        offset = self.handle & 0xff
+        return (offset, offset, offset + 100, offset + 20)
+
+    def IsVisible(self):
+        self._call('IsVisible')
+        return self.visible and (self.parent is None or self.parent.visible)
+
+    def IsEnabled(self):
+        self._call('IsEnabled')
+        return self.enabled
+
+    def VerifyActionable(self):
+        self._call('VerifyActionable')
+        if not self.visible:
+            raise RuntimeError('Control is not visible')
+        if not self.enabled:
+            raise RuntimeError('Control is not enabled')
+
+    def Parent(self):
+        self._call('Parent')
+        return self.parent
+
+    def TopLevelParent(self):
+        self._call('TopLevelParent')
+        ctrl = self
+        while ctrl.parent is not None:
+            ctrl = ctrl.parent
+        return ctrl
+
+    def Children(self):
+        self._call('Children')
+        return list(self.children)
+
+    def Menu(self):
+        self._call('Menu')
+        return self.menu
+
+    def GetProperties(self):
+        self._call('GetProperties')
+        return {'Class' : self.class_name,
+                'FriendlyClassName' : FRIENDLY_CLASS_NAMES.get(self.class_name, self.class_name),
+                'Texts' : [self.text],
+                'ControlID' : self.handle & 0xffff,
+                'IsVisible' : self.visible,
+                'IsEnabled' : self.enabled,
+                'Rectangle' : self.Rectangle()}
+
+    def DrawOutline(self, colour='green', thickness=2):
+        self._call('DrawOutline')
+
+    def _action(self, name, *args):
+        self._call(name)
+        self.actions.append((name, args))
+
+    def Close(self): self._action('Close')
+    def Click(self, *args, **kwargs): self._action('Click')
+    def ClickInput(self, *args, **kwargs): self._action('ClickInput')
+    def CloseClick(self, *args, **kwargs): self._action('CloseClick')
+    def DoubleClick(self, *args, **kwargs): self._action('DoubleClick')
+    def DoubleClickInput(self, *args, **kwargs): self._action('DoubleClickInput')
+    def DragMouse(self, *args, **kwargs): self._action('DragMouse')
+    def Maximize(self): self._action('Maximize')
+    def Minimize(self): self._action('Minimize')
+    def MoveMouse(self, *args, **kwargs): self._action('MoveMouse')
+    def MoveWindow(self, *args, **kwargs): self._action('MoveWindow')
+    def PressMouse(self, *args, **kwargs): self._action('PressMouse')
+    def PressMouseInput(self, *args, **kwargs): self._action('PressMouseInput')
+    def ReleaseMouse(self, *args, **kwargs): self._action('ReleaseMouse')
+    def ReleaseMouseInput(self, *args, **kwargs): self._action('ReleaseMouseInput')
+    def Restore(self): self._action('Restore')
+    def RightClick(self, *args, **kwargs): self._action('RightClick')
+    def RightClickInput(self, *args, **kwargs): self._action('RightClickInput')
+    def SetFocus(self): self._action('SetFocus')
+
+
+class FakeWindow(FakeControl):
+    '''
+    Top level window, stands for pywinauto WindowSpecification
+    '''
+    control_type = 'window'
+
+
+class FakeComboBox(FakeControl):
+    control_type = 'combobox'
+
+    def __init__(self, *args, **kwargs):
+        self.items_count = kwargs.pop('items_count')
+        FakeControl.__init__(self, *args, **kwargs)
+
+    def ItemCount(self):
+        self._call('ItemCount')
+        return self.items_count
+
+    def ItemTexts(self):
+        self._call('ItemTexts')
+        return [u'Option %d' % i for i in range(self.items_count)]
+
+    def Select(self, item):
+        self._action('Select', item)
+
+
+class FakeListView(FakeControl):
+    control_type = 'listview'
+
+    def __init__(self, *args, **kwargs):
+        self.items_count = kwargs.pop('items_count')
+        FakeControl.__init__(self, *args, **kwargs)
+
+    def ItemCount(self):
+        self._call('ItemCount')
+        return self.items_count
+
+    def ColumnCount(self):
+        self._call('ColumnCount')
+        return 1
+
+    def GetItem(self, item_index, subitem_index=0):
+        self._call('GetItem')
+        if not 0 <= item_index < self.items_count:
+            raise IndexError('There are only %d items in the list view' % self.items_count)
+        return {'text' : u'Row %d' % item_index,
+                'image' : 0,
+                'state' : 0,
+                'item_index' : item_index,
+                'subitem_index' : subitem_index}
+
+    def Items(self):
+        self._call('Items')
+        return [self.GetItem(index) for index in range(self.items_count)]
+
+    def Select(self, item):
+        self._action('Select', item)
+
+
+class FakeTabControl(FakeControl):
+    control_type = 'tab'
+
+    def __init__(self, *args, **kwargs):
+        self.tabs_count = kwargs.pop('tabs_count')
+        FakeControl.__init__(self, *args, **kwargs)
+
+    def TabCount(self):
+        self._call('TabCount')
+        return self.tabs_count
+
+    def GetTabText(self, index):
+        self._call('GetTabText')
+        return u'Tab %d' % index
+
+    def Select(self, tab):
+        self._action('Select', tab)
+
+
+class FakeButtonInfo(object):
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeToolbarButton(object):
+    '''
+    Stands for pywinauto _toolbar_button
+    '''
+    control_type = 'toolbar_button'
+
+    def __init__(self, toolbar_ctrl, index):
+        self.toolbar_ctrl = toolbar_ctrl
+        self.index = index
+        self.info = FakeButtonInfo(u'Button %d' % index)
+        self.actions = []
+
+    def _call(self, name):
+        self.toolbar_ctrl._call(name)
+
+    def IsCheckable(self):
+        self._call('IsCheckable')
+        return self.index % 2 == 0
+
+    def IsChecked(self):
+        self._call('IsChecked')
+        return False
+
+    def IsEnabled(self):
+        self._call('IsEnabled')
+        return True
+
+    def IsPressable(self):
+        self._call('IsPressable')
+        return True
+
+    def IsPressed(self):
+        self._call('IsPressed')
+        return False
+
+    def Rectangle(self):
+        self._call('Rectangle')
+        return (self.index * 24, 0, self.index * 24 + 23, 22)
+
+    def State(self):
+        self._call('State')
+        return 4
+
+    def Style(self):
+        self._call('Style')
+        return 0
+
+    def Click(self, *args, **kwargs):
+        self._call('Click')
+        self.actions.append(('Click', args))
+
+    def ClickInput(self, *args, **kwargs):
+        self._call('ClickInput')
+        self.actions.append(('ClickInput', args))
+
+
+class FakeToolbar(FakeControl):
+    control_type = 'toolbar'
+
+    def __init__(self, *args, **kwargs):
+        buttons_count = kwargs.pop('buttons_count')
+        FakeControl.__init__(self, *args, **kwargs)
+        self.buttons = [FakeToolbarButton(self, i) for i in range(buttons_count)]
+
+    def ButtonCount(self):
+        self._call('ButtonCount')
+        return len(self.buttons)
+
+    def Button(self, button_index):
+        self._call('Button')
+        return self.buttons[button_index]
+
+
+class FakeTreeElement(object):
+    '''
+    Stands for pywinauto _treeview_element
+    '''
+    control_type = 'tree_item'
+
+    def __init__(self, tree_ctrl, text, depth, fanout):
+        self.tree_ctrl = tree_ctrl
+        self.text = text
+        self.children = []
+        if depth > 1:
+            self.children = [FakeTreeElement(tree_ctrl, u'%s.%d' % (text, i), depth - 1, fanout)
+                             for i in range(fanout)]
+        self.actions = []
+
+    def _call(self, name):
+        self.tree_ctrl._call(name)
+
+    def Text(self):
+        self._call('Text')
+        return self.text
+
+    def Children(self):
+        self._call('Children')
+        return list(self.children)
+
+    def Rectangle(self):
+        self._call('Rectangle')
+        return (0, 0, 100, 16)
+
+    def State(self):
+        self._call('State')
+        return 0
+
+    def _action(self, name):
+        self._call(name)
+        self.actions.append((name, ()))
+
+    def Click(self, *args, **kwargs): self._action('Click')
+    def ClickInput(self, *args, **kwargs): self._action('ClickInput')
+    def DoubleClick(self, *args, **kwargs): self._action('DoubleClick')
+    def Select(self): self._action('Select')
+    def Collapse(self): self._action('Collapse')
+    def Expand(self): self._action('Expand')
+
+
+class FakeTreeView(FakeControl):
+    control_type = 'tree_view'
+
+    def __init__(self, *args, **kwargs):
+        roots_count = kwargs.pop('roots_count')
+        depth = kwargs.pop('depth')
+        FakeControl.__init__(self, *args, **kwargs)
+        self.roots = [FakeTreeElement(self, u'Node %d' % i, depth, roots_count)
+                      for i in range(roots_count)]
+
+    def Roots(self):
+        self._call('Roots')
+        return list(self.roots)
+
+    def GetItem(self, path):
+        self._call('GetItem')
+        items = self.roots
+        element = None
+        for text in path:
+            for element in items:
+                if element.text == text:
+                    break
+            else:
+                raise IndexError('No tree item %r' % (path,))
+            items = element.children
+        return element
+
+
+class FakeMenu(object):
+    '''
+    Stands for pywinauto Menu
+    '''
+    control_type = 'menu'
+
+    def __init__(self, ctrl, owner_item, items_count, depth):
+        self.ctrl = ctrl
+        self.owner_item = owner_item
+        self.is_main_menu = owner_item is None
+        self.items = [FakeMenuItem(self, i, depth) for i in range(items_count)]
+
+    def _call(self, name):
+        self.ctrl._call(name)
+
+    def Items(self):
+        self._call('Items')
+        return list(self.items)
+
+    def GetProperties(self):
+        self._call('GetProperties')
+        return {'MenuItems' : [item._properties() for item in self.items]}
+
+
+class FakeMenuItem(object):
+    '''
+    Stands for pywinauto MenuItem
+    '''
+    control_type = 'menu_item'
+
+    def __init__(self, menu, index, depth):
+        self.menu = menu
+        self.index = index
+        self.ctrl = menu.ctrl
+        self.separator = index % 4 == 3
+        self.sub_menu = None
+        if depth > 1 and not self.separator:
+            self.sub_menu = FakeMenu(menu.ctrl, self, 3, depth - 1)
+        self.actions = []
+
+    def _call(self, name):
+        self.menu._call(name)
+
+    def Text(self):
+        self._call('Text')
+        if self.separator:
+            return u''
+        return u'Menu item %d' % self.index
+
+    def Type(self):
+        self._call('Type')
+        if self.separator:
+            return 2048
+        return 0
+
+    def Index(self):
+        self._call('Index')
+        return self.index
+
+    def State(self):
+        self._call('State')
+        return 0
+
+    def SubMenu(self):
+        self._call('SubMenu')
+        return self.sub_menu
+
+    def _properties(self):
+        props = {'Index' : self.index,
+                 'Text' : u'' if self.separator else u'Menu item %d' % self.index,
+                 'Type' : 2048 if self.separator else 0,
+                 'State' : 0}
+        if self.sub_menu:
+            props['MenuItems'] = [item._properties() for item in self.sub_menu.items]
+        return props
+
+    def GetProperties(self):
+        self._call('GetProperties')
+        return self._properties()
+
+    def Click(self, *args, **kwargs):
+        self._call('Click')
+        self.actions.append(('Click', args))
+
+    def Select(self):
+        self._call('Select')
+        self.actions.append(('Select', ()))
+
+
+class FakeBackend(backend.Backend):
+    '''
+    In-memory window system.
+
+    windows - number of the top level windows (a task bar is added to them)
+    controls - number of the controls in every top level window
+    fanout - max number of the children of a container control (Pane)
+    list_items, combo_items, tabs, toolbar_buttons - items of such controls
+    tree_roots, tree_depth - size of the tree views
+    menu_items, menu_depth - size of the windows' menus
+    latency - seconds added to every wrapper call
+    failure_rate - probability of an injected failure_exception per call
+    failing_calls - names of the calls which may fail, all by default
+    seed - seed of the failures generator
+    '''
+    name = 'fake'
+    version = 'fake'
+    InvalidWindowHandle = FakeInvalidWindowHandle
+
+    def __init__(self, windows=3, controls=100, fanout=8,
+                 list_items=200, combo_items=20, tabs=4, toolbar_buttons=6,
+                 tree_roots=3, tree_depth=2, menu_items=4, menu_depth=2,
+                 latency=0.0, failure_rate=0.0, failing_calls=None,
+                 failure_exception=RuntimeError, seed=0):
+        backend.Backend.__init__(self)
+        self.fanout = fanout
+        self.list_items = list_items
+        self.combo_items = combo_items
+        self.tabs = tabs
+        self.toolbar_buttons = toolbar_buttons
+        self.tree_roots = tree_roots
+        self.tree_depth = tree_depth
+        self.menu_items = menu_items
+        self.menu_depth = menu_depth
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failing_calls = failing_calls
+        self.failure_exception = failure_exception
+        self.calls = collections.Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._controls = {}
+        self._destroyed = set()
+        self._next_handle = 0x10000
+        self.events = winevents.SimulatedEventSource()
+        self.taskbar = self._add_control(FakeWindow, None, 'Shell_TrayWnd', u'')
+        self.top_windows = [self.taskbar]
+        for index in range(windows):
+            self.top_windows.append(self._make_window(index, controls))
+
+    #-----tree generation
+    def _add_control(self, control_class, parent, class_name, text, **kwargs):
+        handle = self._next_handle
+        self._next_handle += 1
+        ctrl = control_class(self, handle, parent, class_name, text, **kwargs)
+        self._controls[handle] = ctrl
+        if parent is not None:
+            parent.children.append(ctrl)
+        return ctrl
+
+    def _make_window(self, window_index, controls_count):
+        window = self._add_control(FakeWindow, None, '#32770',
+                                   u'Fake window %d' % window_index)
+        if self.menu_items:
+            window.menu = FakeMenu(window, None, self.menu_items, self.menu_depth)
+        containers = [window]
+        edits_count = 0
+        for i in range(controls_count):
+            parent = containers[min(i // self.fanout, len(containers) - 1)]
+            class_name = CONTROL_CLASSES[i % len(CONTROL_CLASSES)]
+            kwargs = {'visible' : i % 7 != 6,
+                      'enabled' : i % 11 != 10}
+            if class_name == 'Edit':
+                #every other edit box has no text, so it is named by access names
+                edits_count += 1
+                text = u'' if edits_count % 2 else u'Text %d' % i
+                ctrl = self._add_control(FakeControl, parent, class_name, text, **kwargs)
+            elif class_name in ('Button', 'Static'):
+                ctrl = self._add_control(FakeControl, parent, class_name,
+                                         u'%s %d' % (class_name, i), **kwargs)
+            elif class_name == 'Pane':
+                ctrl = self._add_control(FakeControl, parent, class_name, u'', **kwargs)
+                containers.append(ctrl)
+            elif class_name == 'ComboBox':
+                ctrl = self._add_control(FakeComboBox, parent, class_name, u'',
+                                         items_count=self.combo_items, **kwargs)
+            elif class_name == 'SysListView32':
+                ctrl = self._add_control(FakeListView, parent, class_name, u'',
+                                         items_count=self.list_items, **kwargs)
+            elif class_name == 'SysTabControl32':
+                ctrl = self._add_control(FakeTabControl, parent, class_name, u'',
+                                         tabs_count=self.tabs, **kwargs)
+            elif class_name == 'ToolbarWindow32':
+                ctrl = self._add_control(FakeToolbar, parent, class_name, u'',
+                                         buttons_count=self.toolbar_buttons, **kwargs)
+            elif class_name == 'SysTreeView32':
+                ctrl = self._add_control(FakeTreeView, parent, class_name, u'',
+                                         roots_count=self.tree_roots,
+                                         depth=self.tree_depth, **kwargs)
+        return window
+
+    #-----calls accounting
+    def _call(self, name, handle=None):
+        '''
+        Count the call, check the handle, sleep for the latency
+        and raise an injected failure
+        '''
+        with self._lock:
+            self.calls[name] += 1
+            fail = (self.failure_rate and
+                    (self.failing_calls is None or name in self.failing_calls) and
+                    self._random.random() < self.failure_rate)
+            destroyed = handle in self._destroyed
+        if destroyed:
+            raise FakeInvalidWindowHandle('Handle 0x%x is not a vaild window handle' % handle)
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise self.failure_exception('Injected failure of %s' % name)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    #-----windows changes
+    def destroy(self, handle):
+        '''
+        Destroy the window or control with all its descendants
+        '''
+        ctrl = self._controls[handle]
+        descendants = [ctrl] + self._descendants(ctrl)
+        with self._lock:
+            for descendant in descendants:
+                self._destroyed.add(descendant.handle)
+        if ctrl.parent is not None:
+            ctrl.parent.children.remove(ctrl)
+        elif ctrl in self.top_windows:
+            self.top_windows.remove(ctrl)
+        for descendant in reversed(descendants):
+            self.events.emit(winevents.DESTROY, descendant.handle)
+
+    def rename(self, handle, text):
+        '''
+        Change the text of the window or control
+        '''
+        ctrl = self._get_control(handle)
+        ctrl.text = text
+        self._emit(winevents.RENAME, ctrl)
+
+    def create(self, parent_handle, class_name, text, control_class=None, **kwargs):
+        '''
+        Add a control to the parent or a top level window if parent_handle
+        is None. Return the handle.
+        '''
+        parent = None
+        if parent_handle is not None:
+            parent = self._get_control(parent_handle)
+        if control_class is None:
+            control_class = FakeControl if parent is not None else FakeWindow
+        ctrl = self._add_control(control_class, parent, class_name, text, **kwargs)
+        if parent is None:
+            self.top_windows.append(ctrl)
+        self._emit(winevents.CREATE, ctrl)
+        return ctrl.handle
+
+    def reparent(self, handle, parent_handle):
+        '''
+        Move the control to another parent
+        '''
+        ctrl = self._get_control(handle)
+        parent = self._get_control(parent_handle)
+        if ctrl.parent is not None:
+            ctrl.parent.children.remove(ctrl)
+        elif ctrl in self.top_windows:
+            self.top_windows.remove(ctrl)
+        ctrl.parent = parent
+        parent.children.append(ctrl)
+        self._emit(winevents.REPARENT, ctrl)
+
+    def _emit(self, kind, ctrl):
+        top = ctrl
+        while top.parent is not None:
+            top = top.parent
+        parent_handle = None
+        if ctrl.parent is not None:
+            parent_handle = ctrl.parent.handle
+        self.events.emit(kind, ctrl.handle, parent_handle, top.handle)
+
+    def _descendants(self, ctrl):
+        descendants = []
+        stack = list(reversed(ctrl.children))
+        while stack:
+            child = stack.pop()
+            descendants.append(child)
+            stack.extend(reversed(child.children))
+        return descendants
+
+    def _get_control(self, handle):
+        if handle in self._destroyed or handle not in self._controls:
+            raise FakeInvalidWindowHandle('Handle 0x%x is not a vaild window handle' % handle)
+        return self._controls[handle]
+
+    #-----Backend interface
+    def find_windows(self, parent=None, top_level_only=True, **criteria):
+        self._call('find_windows')
+        if parent is None:
+            windows = list(self.top_windows)
+        elif top_level_only:
+            windows = list(self._get_control(parent).children)
+        else:
+            windows = self._descendants(self._get_control(parent))
+        if 'title' in criteria:
+            windows = [w for w in windows if w.text == criteria['title']]
+        if 'class_name' in criteria:
+            windows = [w for w in windows if w.class_name == criteria['class_name']]
+        return [w.handle for w in windows]
+
+    def window(self, handle):
+        return self._get_control(handle)
+
+    def wrap_handle(self, handle):
+        self._call('wrap_handle', handle)
+        return self._get_control(handle)
+
+    def build_unique_dict(self, controls):
+        '''
+        Simplified pywinauto.findbestmatch.build_unique_dict:
+        text, text + friendly class and friendly class names,
+        ambiguous names get 0, 1, 2... suffixes
+        '''
+        self._call('build_unique_dict')
+        candidates = collections.OrderedDict()
+        for ctrl in controls:
+            friendly_class = FRIENDLY_CLASS_NAMES.get(ctrl.class_name, ctrl.class_name)
+            names = [friendly_class]
+            if ctrl.text:
+                names = [ctrl.text, ctrl.text + friendly_class] + names
+            for name in names:
+                candidates.setdefault(name, []).append(ctrl)
+        uniq_names = {}
+        for name, ctrls in candidates.items():
+            if len(ctrls) == 1:
+                uniq_names[name] = ctrls[0]
+                continue
+            uniq_names[name] = ctrls[0]
+            uniq_names[name + '0'] = ctrls[0]
+            for number, ctrl in enumerate(ctrls):
+                uniq_names[name + str(number + 1)] = ctrl
+        return uniq_names
+
+    def exists(self, handle):
+        self._call('exists')
+        return handle in self._controls and handle not in self._destroyed
+
+    def wrapper_classes(self):
+        return dict((wrapper_class.control_type, wrapper_class) for wrapper_class in
+                    (FakeWindow, FakeMenu, FakeMenuItem, FakeComboBox, FakeListView,
+                     FakeTabControl, FakeToolbar, FakeToolbarButton, FakeTreeView,
+                     FakeTreeElement))
+
+    def window_text(self, handle):
+        return self._get_control(handle).WindowText()
+
+    def class_name(self, handle):
+        return self._get_control(handle).Class()
+
+    def is_visible(self, handle):
+        return self._get_control(handle).IsVisible()
+
+    def get_event_source(self):
+        return self.events
+
+    def taskbar_handle(self):
+        self._call('taskbar_handle')
+        return self.taskbar.handle
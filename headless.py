@@ -0,0 +1,178 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import backend
+import codegen
+import const
+import crawler
+import proxy
+
+'''
+Scripting API of the objects browser, without wx.
+
+    import headless
+    notepad = headless.find([u'Untitled - Notepad'])
+    for depth, name, node in headless.walk(notepad, max_depth=2):
+        print '  ' * depth + name
+    edit = headless.find_by_access_name(notepad, 'Edit')
+    print headless.get_properties(edit)['Access names']
+    print headless.get_code([u'Untitled - Notepad', 'Edit'], 'Click')
+
+Objects are found by a path of the names shown in the objects browser,
+from the top level window down. The first object of the name is taken
+if there are several.
+'''
+
+
+#lower case action name -> action id
+ACTION_IDS = dict((action.lower(), action_id) for action_id, action in const.ACTIONS.items())
+
+
+class NotFoundError(LookupError):
+    '''
+    No object for the path or the access name
+    '''
+    pass
+
+
+def _to_unicode(text):
+    if isinstance(text, str):
+        return text.decode('cp1251', 'replace')
+    return text
+
+
+def get_root():
+    '''
+    Return the root object: the list of the top level windows
+    '''
+    return proxy.PC_system(None)
+
+
+def get_subitems(obj):
+    '''
+    Return [(name, obj),...] of the children, the pages of the virtual
+    items are loaded completely
+    '''
+    return crawler.get_all_subitems(obj)
+
+
+def find(path, root=None):
+    '''
+    Return the object of the path - [top level window name, ..., name]
+    '''
+    obj = root or get_root()
+    for depth, name in enumerate(path):
+        name = _to_unicode(name)
+        for child_name, child in get_subitems(obj):
+            if _to_unicode(child_name) == name:
+                obj = child
+                break
+        else:
+            raise NotFoundError('No %r in %r' % (name, list(path[:depth])))
+    return obj
+
+
+def walk(obj, max_depth=None, name=None, workers=crawler.WORKERS):
+    '''
+    Return [(depth, name, crawler.Node),...] of the tree under obj,
+    depth first. The tree is listed by the parallel crawler.
+    '''
+    snapshot = crawler.Crawler(workers=workers, max_depth=max_depth,
+                               with_properties=False).crawl(obj, name)
+    tree = []
+    stack = [snapshot.root()]
+    while stack:
+        node = stack.pop()
+        tree.append((node.depth, node.name, node))
+        stack.extend(reversed(snapshot.get_children(node)))
+    return tree
+
+
+def get_properties(obj):
+    return obj.GetProperties()
+
+
+def find_by_access_name(window, access_name):
+    '''
+    Return the control of the top level window by its access name.
+    Unlike pywinauto, the access name must match exactly.
+    '''
+    window_system = backend.get_backend()
+    index = proxy.get_access_names_index(window.pwa_obj.handle)
+    access_name = _to_unicode(access_name)
+    for handle, names in index.names.items():
+        if access_name in names:
+            control = window_system.wrap_handle(handle)
+            proxy_class = proxy.proxy_registry.get_proxy_class(window_system, control)
+            return proxy_class(control)
+    raise NotFoundError('No control %r in the window' % access_name)
+
+
+def get_action_id(action):
+    '''
+    Return id of the action name, e.g. 'Click'
+    '''
+    try:
+        return ACTION_IDS[action.lower()]
+    except KeyError:
+        raise NotFoundError('No action %r' % action)
+
+
+def get_actions(obj):
+    '''
+    Return names of the actions allowed for the object
+    '''
+    return [action for action_id, action in obj.Get_actions()]
+
+
+def do_action(obj, action):
+    '''
+    Do the action, e.g. 'Click', on the object
+    '''
+    obj.Exec_action(get_action_id(action))
+
+
+def do_actions(steps):
+    '''
+    Do the actions of [(obj, action),...] in order
+    '''
+    action_ids = [(obj, get_action_id(action)) for obj, action in steps]
+    for obj, action_id in action_ids:
+        obj.Exec_action(action_id)
+
+
+def get_code(path, action, root=None, fast=False):
+    '''
+    Return a complete script doing the action on the object of the path.
+    With fast, the script finds the control by its direct specification,
+    see codegen.generate_fast().
+    '''
+    if not path:
+        raise NotFoundError('No top level window in the path')
+    window = find(path[:1], root)
+    obj = find(path[1:], window)
+    if fast:
+        recorder = codegen.Recorder()
+        recorder.record(obj, get_action_id(action))
+        return codegen.generate_fast(recorder.steps)
+    code = const.CODE_HEADER
+    if obj is not window:
+        code += window.Get_lookup_code()
+    return code + obj.Get_code(get_action_id(action))
@@ -0,0 +1,292 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import contextlib
+import json
+import threading
+import time
+
+import backend
+
+'''
+Opt-in instrumentation of the backend calls.
+
+enable() wraps the current backend with InstrumentedBackend. Every
+backend call and every call of a control wrapper made through it is
+counted and timed. The time goes to the SWAPY operation running in the
+calling thread (see operation()).
+
+    import instrument
+    instrument.enable()
+    with instrument.operation('expand node'):
+        obj.Get_subitems()
+    print(instrument.stats.to_json())
+'''
+
+#operation of the calls made outside of any operation() block
+DEFAULT_OPERATION = 'other'
+
+#attribute values returned as is, not wrapped for counting
+_PLAIN_TYPES = (basestring, int, long, float, bool, dict, type(None))
+
+_local = threading.local()
+
+
+def percentile(values, percent):
+    '''
+    Nearest-rank percentile of the values
+    '''
+    ordered = sorted(values)
+    rank = int(round(percent / 100.0 * len(ordered) + 0.5)) - 1
+    return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+
+class CallStats(object):
+    '''
+    Call counters and cumulative latency, by operation and call name
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._data = {}
+
+    def add(self, operation_name, call_name, seconds):
+        with self._lock:
+            calls = self._data.setdefault(operation_name, {})
+            record = calls.setdefault(call_name, [0, 0.0])
+            record[0] += 1
+            record[1] += seconds
+
+    def get_rows(self):
+        '''
+        Return [(operation, call, count, total_seconds),...] sorted by
+        operation and the total time, the slowest first
+        '''
+        with self._lock:
+            rows = [(operation_name, call_name, record[0], record[1])
+                    for operation_name, calls in self._data.items()
+                    for call_name, record in calls.items()]
+        rows.sort(key=lambda row: (row[0], -row[3]))
+        return rows
+
+    def to_dict(self):
+        '''
+        Return {operation : {call : {'count', 'total_ms'}}}
+        '''
+        result = {}
+        for operation_name, call_name, count, seconds in self.get_rows():
+            result.setdefault(operation_name, {})[call_name] = {
+                'count' : count,
+                'total_ms' : seconds * 1000.0}
+        return result
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    def export_json(self, filename):
+        with open(filename, 'w') as json_file:
+            json_file.write(self.to_json())
+
+stats = CallStats()
+
+
+@contextlib.contextmanager
+def operation(name):
+    '''
+    Attribute the backend calls made by the current thread to the operation
+    '''
+    stack = getattr(_local, 'operations', None)
+    if stack is None:
+        stack = _local.operations = []
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def current_operation():
+    stack = getattr(_local, 'operations', None)
+    if stack:
+        return stack[-1]
+    return DEFAULT_OPERATION
+
+
+def _timed_call(call_stats, call_name, func, args, kwargs):
+    start = time.time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        call_stats.add(current_operation(), call_name, time.time() - start)
+
+
+def _wrap(value, call_stats):
+    '''
+    Wrap the value returned by a wrapper for counting
+    '''
+    if isinstance(value, _PLAIN_TYPES) or isinstance(value, CountingWrapper):
+        return value
+    if isinstance(value, list):
+        return [_wrap(item, call_stats) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_wrap(item, call_stats) for item in value)
+    return CountingWrapper(value, call_stats)
+
+
+def unwrap(value):
+    '''
+    Return the original object of a CountingWrapper
+    '''
+    if isinstance(value, CountingWrapper):
+        return object.__getattribute__(value, '_obj')
+    if isinstance(value, list):
+        return [unwrap(item) for item in value]
+    return value
+
+
+class CountingWrapper(object):
+    '''
+    Proxy of a control wrapper, counts and times its method calls.
+    Objects returned by the calls are wrapped as well.
+    '''
+    __slots__ = ('_obj', '_stats')
+
+    def __init__(self, obj, call_stats):
+        object.__setattr__(self, '_obj', obj)
+        object.__setattr__(self, '_stats', call_stats)
+
+    def __getattr__(self, name):
+        obj = object.__getattribute__(self, '_obj')
+        call_stats = object.__getattribute__(self, '_stats')
+        value = getattr(obj, name)
+        if callable(value) and not isinstance(value, type):
+            def counted(*args, **kwargs):
+                args = [unwrap(arg) for arg in args]
+                return _wrap(_timed_call(call_stats, name, value, args, kwargs), call_stats)
+            return counted
+        return _wrap(value, call_stats)
+
+    def __dir__(self):
+        return dir(object.__getattribute__(self, '_obj'))
+
+    def __setattr__(self, name, value):
+        setattr(object.__getattribute__(self, '_obj'), name, value)
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, '_obj') == unwrap(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, '_obj'))
+
+    def __nonzero__(self):
+        return bool(object.__getattribute__(self, '_obj'))
+
+    def __repr__(self):
+        return repr(object.__getattribute__(self, '_obj'))
+
+    def __str__(self):
+        return str(object.__getattribute__(self, '_obj'))
+
+
+class InstrumentedBackend(backend.Backend):
+    '''
+    Backend wrapper which counts and times the calls of the inner backend
+    and of the control wrappers it returns
+    '''
+    def __init__(self, inner, call_stats=None):
+        backend.Backend.__init__(self)
+        self.inner = inner
+        self.stats = call_stats or stats
+        self.name = inner.name
+        self.version = inner.version
+        self.InvalidWindowHandle = inner.InvalidWindowHandle
+
+    def _call(self, call_name, *args, **kwargs):
+        func = getattr(self.inner, call_name)
+        args = [unwrap(arg) for arg in args]
+        return _timed_call(self.stats, call_name, func, args, kwargs)
+
+    def find_windows(self, parent=None, top_level_only=True, **criteria):
+        return self._call('find_windows', parent=parent,
+                          top_level_only=top_level_only, **criteria)
+
+    def window(self, handle):
+        return _wrap(self._call('window', handle), self.stats)
+
+    def wrap_handle(self, handle):
+        return _wrap(self._call('wrap_handle', handle), self.stats)
+
+    def build_unique_dict(self, controls):
+        uniq_names = self._call('build_unique_dict', unwrap(controls))
+        return dict((name, _wrap(ctrl, self.stats)) for name, ctrl in uniq_names.items())
+
+    def exists(self, handle):
+        return self._call('exists', handle)
+
+    def wrapper_classes(self):
+        return self.inner.wrapper_classes()
+
+    def wrapper_class(self, obj):
+        return self.inner.wrapper_class(unwrap(obj))
+
+    def control_type(self, obj):
+        return self.inner.control_type(unwrap(obj))
+
+    def get_event_source(self):
+        return self.inner.get_event_source()
+
+    def window_text(self, handle):
+        return self._call('window_text', handle)
+
+    def class_name(self, handle):
+        return self._call('class_name', handle)
+
+    def is_visible(self, handle):
+        return self._call('is_visible', handle)
+
+    def taskbar_handle(self):
+        return self._call('taskbar_handle')
+
+
+def is_enabled():
+    return isinstance(backend.get_backend(), InstrumentedBackend)
+
+
+def enable():
+    '''
+    Start counting the calls of the current backend
+    '''
+    if not is_enabled():
+        backend.set_backend(InstrumentedBackend(backend.get_backend()))
+
+
+def disable():
+    '''
+    Stop counting, restore the original backend
+    '''
+    current = backend.get_backend()
+    if isinstance(current, InstrumentedBackend):
+        backend.set_backend(current.inner)
@@ -18,22 +18,27 @@
 #    Suite 330,
 #    Boston, MA 02111-1307 USA
 
-import pywinauto
 import sys, os
 import time
-import wx
 import thread
 import exceptions
-import platform
-import warnings
+import backend
+import cache
 from const import *
 
 '''
 proxy module for pywinauto 
 '''
 
+try:
+    WindowsError
+except NameError:
+    WindowsError = OSError #not on Windows, e.g. with the fake backend
 
-pywinauto.timings.Timings.window_find_timeout = 1
+#access names indexes of the top level windows
+access_names_cache = cache.AccessNamesCache()
+#properties of the recently selected objects
+properties_cache = cache.PropertyCache(PROPERTIES_CACHE_SIZE, PROPERTIES_CACHE_TTL)
 
 def resource_path(filename):
     if hasattr(sys, '_MEIPASS'):
@@ -49,23 +54,216 @@ def resource_path(filename):
         filename = os.path.join(os.path.dirname(sys.argv[0]), filename)
     return filename
 
+def _build_access_names(handles):
+    '''
+    Build {handle : [access_name,...]} for the controls of a top level window
+    '''
+    window_system = backend.get_backend()
+    controls = []
+    for handle in handles:
+        try:
+            controls.append(window_system.wrap_handle(handle))
+        except window_system.InvalidWindowHandle:
+            pass #the control has been destroyed meanwhile
+    uniq_names = window_system.build_unique_dict(controls)
+    return cache.invert_unique_dict(uniq_names, lambda ctrl: ctrl.handle)
+
+def get_access_names_index(top_level_handle):
+    '''
+    Return cached AccessNamesIndex of the top level window.
+    The index is rebuilt when the window's control set changes.
+    '''
+    index = access_names_cache.get_cached(top_level_handle)
+    if index is not None:
+        return index
+    handles = backend.get_backend().find_windows(parent=top_level_handle, top_level_only=False)
+    return access_names_cache.get_index(top_level_handle, handles, _build_access_names)
+
+def track_changes(tracker):
+    '''
+    Keep the caches up to date by the windows change events of the
+    winevents.ChangeTracker instead of re-checking them on every use.
+    Call it before tracker.start(), the caches are trusted only once the
+    tracker has started.
+    '''
+    tracker.add_listener(_invalidate_caches, immediate=True)
+    if tracker.active:
+        access_names_cache.trusted = True
+    else:
+        tracker.add_start_listener(_trust_caches)
+
+def _trust_caches():
+    access_names_cache.trusted = True
+
+def _invalidate_caches(event):
+    access_names_cache.invalidate_handle(event.handle)
+    properties_cache.invalidate(event.handle)
+    if event.top is not None:
+        access_names_cache.invalidate(event.top)
+
+class ProxyRegistry(object):
+    '''
+    Proxy classes of the wrapper classes. The proxy class of a wrapper
+    is found by a dict lookup, subclasses of the registered wrappers are
+    resolved by their MRO once and the result is cached.
+    Wrappers of the backend's control types (see Backend.wrapper_classes)
+    are registered on the first lookup with the backend.
+    '''
+    def __init__(self, type_proxies, default_proxy):
+        '''
+        type_proxies - {control type name : proxy class}
+        default_proxy - proxy class of the unknown wrappers
+        '''
+        self.type_proxies = type_proxies
+        self.default_proxy = default_proxy
+        self._proxies = {} #registered, wrapper class -> proxy class
+        self._resolved = {} #wrapper class -> proxy class
+        self._backends = set()
+        self._lock = thread.allocate_lock()
+        
+    def register(self, wrapper_class, proxy_class):
+        with self._lock:
+            self._proxies[wrapper_class] = proxy_class
+            self._resolved.clear() #subclasses may resolve to the new proxy
+            
+    def get_proxy_class(self, window_system, pwa_obj):
+        wrapper_class = window_system.wrapper_class(pwa_obj)
+        try:
+            return self._resolved[wrapper_class]
+        except KeyError:
+            return self._resolve(window_system, wrapper_class)
+            
+    def _resolve(self, window_system, wrapper_class):
+        with self._lock:
+            if id(window_system) not in self._backends:
+                for type_name, backend_class in window_system.wrapper_classes().items():
+                    self._proxies.setdefault(backend_class, self.type_proxies[type_name])
+                self._backends.add(id(window_system))
+            proxy_class = self.default_proxy
+            for base_class in getattr(wrapper_class, '__mro__', (wrapper_class,)):
+                if base_class in self._proxies:
+                    proxy_class = self._proxies[base_class]
+                    break
+            self._resolved[wrapper_class] = proxy_class
+            return proxy_class
+            
+def register_proxy(wrapper_class, proxy_class):
+    '''
+    Use proxy_class (e.g. a SWAPYObject subclass) for the wrappers of
+    wrapper_class and of its subclasses, e.g. for a custom control
+    '''
+    proxy_registry.register(wrapper_class, proxy_class)
+
+class ActionTable(object):
+    '''
+    Actions supported by the wrapper classes. The actions of a class are
+    found once, by its attributes, and cached.
+    '''
+    def __init__(self, actions):
+        '''
+        actions - {action id : wrapper method name}, see const.ACTIONS
+        '''
+        self.actions = actions
+        self._tables = {} #wrapper class -> [(id, action_name),...]
+        self._lock = thread.allocate_lock()
+        
+    def get_actions(self, wrapper_class):
+        '''
+        Return [(id, action_name),...] of the class sorted by the names
+        '''
+        try:
+            return self._tables[wrapper_class]
+        except KeyError:
+            pass
+        table = [(action_id, action) for action_id, action in self.actions.items()
+                 if callable(getattr(wrapper_class, action, None))]
+        table.sort(key=lambda name: name[1].lower())
+        with self._lock:
+            self._tables[wrapper_class] = table
+        return table
+        
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            
+action_table = ActionTable(ACTIONS)
+
+def _sort_by_name(subitem):
+    return subitem[0].lower()
+
+def _sort_by_index(subitem):
+    return subitem[1].pwa_obj.Index()
+
 class SWAPYObject(object):
     '''
     Base proxy class for pywinauto objects.
-    
+    Proxies are created for every node of the tree, so they have no
+    __dict__: derived classes list their own attributes in __slots__.
+    path is set by Pwa_tree on the proxies of the tree view items, whatever
+    proxy class is registered for them: [item text,...] from the root.
     '''
+    __slots__ = ('pwa_obj', 'path')
+    #sort key of Get_subitems() items, (name, swapy_obj) -> key
+    subitems_sort_key = staticmethod(_sort_by_name)
+    
     def __init__(self, pwa_obj):
         '''
         Constructor
         '''
         #original pywinauto object
         self.pwa_obj = pwa_obj
-        default_sort_key = lambda name: name[0].lower()
-        self.subitems_sort_key = default_sort_key
         
     def GetProperties(self):
         '''
-        Return dict of original + additional properies
+        Return dict of original + additional properies.
+        Properties are cached, see Refresh_properties()
+        '''
+        key = self._get_properties_key()
+        if key is None:
+            return self._collect_properties()
+        return dict(properties_cache.get(key, self._collect_properties))
+        
+    def Get_quick_properties(self):
+        '''
+        Return the properties which are cheap to get: handle, class,
+        pwa_type, rectangle. The others come with GetProperties().
+        '''
+        properties = {'pwa_type' : str(backend.get_backend().wrapper_class(self.pwa_obj))}
+        try:
+            wrapper = self.pwa_obj.WrapperObject()
+        except:
+            wrapper = self.pwa_obj
+        try:
+            properties['handle'] = str(wrapper.handle)
+            properties['Class'] = wrapper.Class()
+            properties['Rectangle'] = wrapper.Rectangle()
+        except:
+            pass #not a window, e.g. a menu item
+        return properties
+        
+    def Get_cached_properties(self):
+        '''
+        Return the cached properties or None
+        '''
+        key = self._get_properties_key()
+        if key is None:
+            return None
+        properties = properties_cache.peek(key)
+        if properties is None:
+            return None
+        return dict(properties)
+        
+    def Refresh_properties(self):
+        '''
+        Drop the cached properties, the next GetProperties() gets them anew
+        '''
+        key = self._get_properties_key()
+        if key is not None:
+            properties_cache.invalidate(key)
+            
+    def _collect_properties(self):
+        '''
+        Get the properties from the control
         Can be owerridden for non pywinauto obects
         '''
         properties = {}
@@ -101,53 +299,95 @@ class SWAPYObject(object):
         '''
         subitems += self._get_additional_children()
         subitems.sort(key=self.subitems_sort_key)
-        #encode names
-        subitems_encoded = []
-        for (name, obj) in subitems:
-            name = name.encode('cp1251', 'replace')
-            subitems_encoded.append((name, obj))
-        return subitems_encoded
+        return self._encode_subitems(subitems)
         
     def Exec_action(self, action_id):
         '''
         Execute action on the control
         '''
         action = ACTIONS[action_id]
-        #print('self.pwa_obj.'+action+'()')
-        exec('self.pwa_obj.'+action+'()')
+        try:
+            getattr(self.pwa_obj, action)()
+        finally:
+            self.Refresh_properties() #the action may change the control
         return 0
         
     def Get_actions(self):
         '''
         return allowed actions for this object. [(id,action_name),...]
         '''
-        allowed_actions = []
         try:
-            obj_actions = dir(self.pwa_obj.WrapperObject())
+            wrapper = self.pwa_obj.WrapperObject()
         except:
-            obj_actions = dir(self.pwa_obj)
-        for id, action in ACTIONS.items():
-            if action in obj_actions:
-                allowed_actions.append((id,action))
-        allowed_actions.sort(key=lambda name: name[1].lower())
-        return allowed_actions
+            wrapper = self.pwa_obj
+        #not type(): the wrapper may be instrument.CountingWrapper
+        wrapper_class = backend.get_backend().wrapper_class(wrapper)
+        return list(action_table.get_actions(wrapper_class))
         
     def Get_code(self, action_id):
         '''
         Generate code for pywinauto module
         '''
+        return self.Get_lookup_code() + self.Get_action_code(action_id)
+        
+    def Get_lookup_code(self):
+        '''
+        Return code finding the object, it sets the variable the action
+        code uses. Empty for the items of an already found control.
+        '''
+        code = "\
+ctrl = window['"+self.Get_access_name().encode('unicode-escape', 'replace')+"']\n"
+        return code
+        
+    def Get_action_code(self, action_id):
+        '''
+        Return code doing the action, it uses the window and ctrl variables
+        '''
         action = ACTIONS[action_id]
         code = "\
-ctrl = window['"+self._get_additional_properties()['Access names'][0].encode('unicode-escape', 'replace')+"']\n\
 ctrl."+action+"()\n"
         return code
         
+    def Get_code_owner(self):
+        '''
+        Return (top level window, control) wrappers the code refers to
+        as window and ctrl, control is None if the code uses window only
+        '''
+        return self.pwa_obj.TopLevelParent(), self.pwa_obj
+        
+    def Get_access_name(self):
+        '''
+        Return the shortest access name of the control
+        '''
+        names_index = self._get_access_names_index(self.pwa_obj.TopLevelParent().handle)
+        return names_index.get_names(self.pwa_obj.handle)[0]
+        
+    def Get_identity(self):
+        '''
+        Return a key which identifies the object among its siblings
+        and stays the same between refreshes, None if there is no such key
+        '''
+        try:
+            return self.pwa_obj.handle
+        except:
+            return None
+        
     def Highlight_control(self): 
         if self._check_visibility():
           thread.start_new_thread(self._highlight_control,(3,))
         return 0
         
         
+    def _get_properties_key(self):
+        '''
+        Return the key of the object in the properties cache,
+        None if the properties should not be cached
+        '''
+        identity = self.Get_identity()
+        if isinstance(identity, (int, long)):
+            return identity #window handle
+        return None
+        
     def _get_properies(self):
         '''
         Get original pywinauto's object properties
@@ -165,7 +405,6 @@ ctrl."+action+"()\n"
         Can be overridden by derived class
         '''
         additional_properties = {}
-        pwa_app = pywinauto.application.Application()
         #-----Access names
         try:
             #parent_obj = self.pwa_obj.Parent()
@@ -174,22 +413,16 @@ ctrl."+action+"()\n"
             pass
         else:
             try:
-                #all_controls = parent_obj.Children()
-                all_controls = [pwa_app.window_(handle=ch) for ch in pywinauto.findwindows.find_windows(parent=parent_obj.handle, top_level_only=False)]
+                names_index = self._get_access_names_index(parent_obj.handle)
             except:
                 pass
             else:
-                access_names = []
-                uniq_names = pywinauto.findbestmatch.build_unique_dict(all_controls)
-                for uniq_name, obj in uniq_names.items():
-                    if uniq_name != '' and obj.WrapperObject() == self.pwa_obj:
-                      access_names.append(uniq_name)
-                access_names.sort(key=len)
+                access_names = list(names_index.get_names(self.pwa_obj.handle))
                 additional_properties.update({'Access names' : access_names})
         #-----
         
         #-----pwa_type
-        additional_properties.update({'pwa_type' : str(type(self.pwa_obj))})
+        additional_properties.update({'pwa_type' : str(backend.get_backend().wrapper_class(self.pwa_obj))})
         #---
         
         #-----handle
@@ -208,7 +441,7 @@ ctrl."+action+"()\n"
         def _get_name_control(control):
           try:
               texts = control.Texts()
-          except exceptions.WindowsError:
+          except WindowsError:
             texts = ['Unknown control name2!'] #workaround for WindowsError: [Error 0] ...
           except exceptions.RuntimeError:
             texts = ['Unknown control name3!'] #workaround for RuntimeError: GetButtonInfo failed for button with command id 256
@@ -216,13 +449,10 @@ ctrl."+action+"()\n"
             texts.remove('')
           text = ', '.join(texts)
           if not text:
-            u_names = []
-            for uniq_name, obj in uniq_names.items():
-              if uniq_name != '' and obj.WrapperObject() == control:
-              #if uniq_name != '' and obj == control:
-                u_names.append(uniq_name)
+            if not names_index:
+              names_index.append(self._get_access_names_index(parent_obj.handle))
+            u_names = names_index[0].get_names(control.handle)
             if u_names:
-              u_names.sort(key=len)
               name = u_names[-1]
             else:
               name = 'Unknown control name1!'
@@ -230,21 +460,30 @@ ctrl."+action+"()\n"
             name = text
           return (name, self._get_swapy_object(control))
         
-        pwa_app = pywinauto.application.Application()
         try:
           parent_obj = self.pwa_obj.TopLevelParent()
-        except pywinauto.controls.HwndWrapper.InvalidWindowHandle:
+        except backend.get_backend().InvalidWindowHandle:
           #For non visible windows
           #...
           #InvalidWindowHandle: Handle 0x262710 is not a vaild window handle
           parent_obj = self.pwa_obj
         children = self.pwa_obj.Children()
-        visible_controls = [pwa_app.window_(handle=ch) for ch in pywinauto.findwindows.find_windows(parent=parent_obj.handle, top_level_only=False)]
-        uniq_names = pywinauto.findbestmatch.build_unique_dict(visible_controls)
-        #uniq_names = pywinauto.findbestmatch.build_unique_dict(children)
+        names_index = [] #built on the first unnamed child only
         names_children = map(_get_name_control, children)
         return names_children
         
+    def _encode_subitems(self, subitems):
+        '''
+        Encode names of [(name, swapy_obj),...]
+        '''
+        subitems_encoded = []
+        for (name, obj) in subitems:
+            name = name.encode('cp1251', 'replace')
+            subitems_encoded.append((name, obj))
+        return subitems_encoded
+        
+    def _get_access_names_index(self, top_level_handle):
+        return get_access_names_index(top_level_handle)
         
     def _get_additional_children(self):
         '''
@@ -257,58 +496,11 @@ ctrl."+action+"()\n"
         '''
         Check self pywinauto object type
         '''
-        if type(obj) == pywinauto.application.WindowSpecification:
-            return 'window'
-        elif type(obj) == pywinauto.controls.menuwrapper.Menu:
-            return 'menu'
-        elif type(obj) == pywinauto.controls.menuwrapper.MenuItem:
-            return 'menu_item'
-        elif type(obj) == pywinauto.controls.win32_controls.ComboBoxWrapper:
-            return 'combobox'
-        elif type(obj) == pywinauto.controls.common_controls.ListViewWrapper:
-            return 'listview'
-        elif type(obj) == pywinauto.controls.common_controls.TabControlWrapper:
-            return 'tab'
-        elif type(obj) == pywinauto.controls.common_controls.ToolbarWrapper:
-            return 'toolbar'
-        elif type(obj) == pywinauto.controls.common_controls._toolbar_button:
-            return 'toolbar_button'
-        elif type(obj) == pywinauto.controls.common_controls.TreeViewWrapper:
-            return 'tree_view'
-        elif type(obj) == pywinauto.controls.common_controls._treeview_element:
-            return 'tree_item'
-        elif 1==0:
-            return 'other'
-        else:
-            return 'unknown'
+        return backend.get_backend().control_type(obj)
         
     def _get_swapy_object(self, pwa_obj):
-        pwa_type = self._get_pywinobj_type(pwa_obj)
-        #print pwa_type
-        if pwa_type == 'smt_NEW':
-            return smt_NEW(pwa_obj)
-        if pwa_type == 'window':
-            return Pwa_window(pwa_obj)
-        if pwa_type == 'menu':
-            return Pwa_menu(pwa_obj)
-        if pwa_type == 'menu_item':
-            return Pwa_menu_item(pwa_obj)
-        if pwa_type == 'combobox':
-            return Pwa_combobox(pwa_obj)
-        if pwa_type == 'listview':
-            return Pwa_listview(pwa_obj)
-        if pwa_type == 'tab':
-            return Pwa_tab(pwa_obj)
-        if pwa_type == 'toolbar':
-            return Pwa_toolbar(pwa_obj)
-        if pwa_type == 'toolbar_button':
-            return Pwa_toolbar_button(pwa_obj)
-        if pwa_type == 'tree_view':
-            return Pwa_tree(pwa_obj)
-        if pwa_type == 'tree_item':
-            return Pwa_tree_item(pwa_obj)
-        else:
-            return SWAPYObject(pwa_obj)
+        proxy_class = proxy_registry.get_proxy_class(backend.get_backend(), pwa_obj)
+        return proxy_class(pwa_obj)
             
     def _highlight_control(self, repeat = 1):
         while repeat > 0:
@@ -352,28 +544,63 @@ ctrl."+action+"()\n"
 
         try:
             handle_ = self.pwa_obj.handle
-            obj = pywinauto.application.WindowSpecification({'handle': handle_})
         except:
             is_exist = False
         else:
-            is_exist = obj.Exists()
+            is_exist = backend.get_backend().exists(handle_)
         return is_exist
         
         
 
 class VirtualSWAPYObject(SWAPYObject):
-    def __init__(self, parent, index):
+    '''
+    Item of a control which has no wrapper of its own,
+    e.g. a list view row. The item is its own pwa_obj.
+    '''
+    __slots__ = ('parent', 'index', 'item_data')
+    
+    def __init__(self, parent, index, item_data=None):
         self.parent = parent
         self.index = index
-        self.pwa_obj = self
-        self._check_visibility = self.parent._check_visibility
-        self._check_actionable = self.parent._check_actionable
-        self._check_existence = self.parent._check_existence
+        #item data remembered when the parent enumerated its items
+        self.item_data = item_data
+        
+    @property
+    def pwa_obj(self):
+        return self
+        
+    def _check_visibility(self):
+        return self.parent._check_visibility()
+        
+    def _check_actionable(self):
+        return self.parent._check_actionable()
+        
+    def _check_existence(self):
+        return self.parent._check_existence()
         
     def Select(self):
         self.parent.pwa_obj.Select(self.index)
+        
+    def Get_identity(self):
+        return (self.__class__.__name__, self.index)
+        
+    def Refresh_properties(self):
+        SWAPYObject.Refresh_properties(self)
+        self.parent.Refresh_properties() #e.g. the selected item of the parent
+        
+    def _get_properties_key(self):
+        parent_key = self.parent._get_properties_key()
+        if parent_key is None:
+            return None
+        return (parent_key, self.Get_identity())
     
-    def Get_code(self, action_id):
+    def Get_lookup_code(self):
+        return ''
+        
+    def Get_code_owner(self):
+        return self.parent.Get_code_owner()
+        
+    def Get_action_code(self, action_id):
         '''
         Generate code for pywinauto module
         '''
@@ -389,6 +616,9 @@ ctrl."+action+"("+arg+")\n"
     
     def _get_properies(self):
         return {}
+        
+    def Get_quick_properties(self):
+        return {} #item data comes from the parent, it is not cheap
     
     def Get_subitems(self):
         return []
@@ -402,46 +632,129 @@ ctrl."+action+"("+arg+")\n"
         return '#---Not implemented yet.---\n'
     '''
         
+class PagedSWAPYObject(SWAPYObject):
+    '''
+    Base proxy class for controls with virtual items (list view rows,
+    combobox items, tabs). Items are fetched page by page, the rest of
+    them is represented by a virtual_more_items placeholder.
+    '''
+    __slots__ = ('items_snapshot',)
+    
+    def __init__(self, pwa_obj):
+        SWAPYObject.__init__(self, pwa_obj)
+        #item data shared by all the virtual items of the control
+        self.items_snapshot = cache.ItemsSnapshot()
+        
+    def Get_subitems(self, items_count=ITEMS_PAGE_SIZE):
+        '''
+        Return list of children - [(control_text, swapy_obj),...]
+        Real children are sorted by name, the first items_count virtual
+        items (at least a page, e.g. as many as already shown) follow them
+        in the control's order.
+        '''
+        subitems = self._get_children()
+        subitems.sort(key=self.subitems_sort_key)
+        subitems += self._get_additional_children(max(items_count, ITEMS_PAGE_SIZE))
+        return self._encode_subitems(subitems)
+        
+    def Get_page(self, start, count=ITEMS_PAGE_SIZE):
+        '''
+        Return [(item_text, swapy_obj),...] of the items from start to
+        start + count and a placeholder for the remaining items, if any
+        '''
+        items_count = self._get_items_count()
+        stop = min(start + count, items_count)
+        page = self._get_items(start, stop)
+        if stop < items_count:
+            more_text = '%d more items...' % (items_count - stop)
+            page.append((more_text, virtual_more_items(self, stop)))
+        return page
+        
+    def _get_additional_children(self, items_count=ITEMS_PAGE_SIZE):
+        '''
+        The first items_count virtual items
+        '''
+        return self.Get_page(0, items_count)
+        
+    def _get_items_data(self, indexes, items_count=None):
+        '''
+        Return {index : item_data} from the items snapshot.
+        Only the items missing in the snapshot are fetched from the control,
+        the snapshot is dropped when the control's item count changes.
+        '''
+        if items_count is None:
+            items_count = self._get_items_count()
+        return self.items_snapshot.get_items(indexes, items_count, self._fetch_items)
+        
+    def _fetch_items(self, indexes):
+        '''
+        Return {index : item_data} fetched from the control.
+        Should be overridden in derived classes which use _get_items_data
+        '''
+        return {}
+        
+    def _get_items_count(self):
+        '''
+        Return number of the virtual items.
+        Should be overridden in derived classes
+        '''
+        return 0
+        
+    def _get_items(self, start, stop):
+        '''
+        Return [(item_text, swapy_obj),...] for the items in range(start, stop).
+        Should be overridden in derived classes
+        '''
+        return []
+        
+class virtual_more_items(VirtualSWAPYObject):
+    '''
+    Placeholder for the not yet loaded virtual items of a PagedSWAPYObject.
+    self.index is the index of the first not loaded item.
+    '''
+    __slots__ = ('loaded',)
+    
+    def __init__(self, parent, index):
+        VirtualSWAPYObject.__init__(self, parent, index)
+        self.loaded = False
+        
+    def Get_page(self):
+        '''
+        Return the next page of the parent's items, encoded as Get_subitems does
+        '''
+        return self._encode_subitems(self.parent.Get_page(self.index))
+        
+    def _get_properies(self):
+        return {'Index' : self.index,
+                'Items left' : self.parent._get_items_count() - self.index}
+        
+    def Get_actions(self):
+        return []
+        
+    def Get_action_code(self, action_id):
+        return ''
+        
     
 class PC_system(SWAPYObject):
+    __slots__ = ()
     handle = 0
     
+    def Get_identity(self):
+        return 'PC'
+    
     def Get_subitems(self):
         '''
         returns [(window_text, swapy_obj),...]
         '''
         #windows--------------------
         windows = []
-        try_count = 3
-        app = pywinauto.application.Application()
-        for i in range(try_count):
-          try:
-            handles = pywinauto.findwindows.find_windows()
-          except exceptions.OverflowError: # workaround for OverflowError: array too large
-            time.sleep(1)
-          except exceptions.MemoryError:# workaround for MemoryError
-            time.sleep(1)
-          else:
-            break
-        else:
-          #TODO: add swapy exception: Could not get windows list
-          handles = []
-        #we have to find taskbar in windows list
-        warnings.filterwarnings("ignore", category=FutureWarning) #ignore future warning in taskbar module
-        from pywinauto import taskbar
-        taskbar_handle = taskbar.TaskBarHandle()
-        for w_handle in handles:
-            wind = app.window_(handle=w_handle)
-            if w_handle == taskbar_handle:
-                texts = ['TaskBar']
-            else:
-                texts = wind.Texts()
-            while texts.count(''):
-                texts.remove('')
-            title = ', '.join(texts)
+        window_system = backend.get_backend()
+        for window_info in window_system.get_windows_enumerator().enum_windows():
+            title = window_info.title
             if not title:
-                title = 'Window#%s' % w_handle
+                title = 'Window#%s' % window_info.handle
             title = title.encode('cp1251', 'replace')
+            wind = window_system.window(window_info.handle)
             windows.append((title, self._get_swapy_object(wind)))
         windows.sort(key=lambda name: name[0].lower())
         #-----------------------
@@ -451,19 +764,30 @@ class PC_system(SWAPYObject):
         return windows
 
     def _get_properies(self):
+        import platform
         info = { 'Platform' : platform.platform(), \
                 'Processor' : platform.processor(), \
-                'PC name' : platform.node() }
+                'PC name' : self.Get_pc_name() }
                 
         return info
         
+    def Get_quick_properties(self):
+        return {'PC name' : self.Get_pc_name()}
+        
+    def Get_pc_name(self):
+        import platform
+        return platform.node()
+        
     def Get_actions(self):
         '''
         No actions for PC_system
         '''
         return []
         
-    def Get_code(self, action_id):
+    def Get_lookup_code(self):
+        return ''
+        
+    def Get_action_code(self, action_id):
         '''
         No code for PC_system
         '''
@@ -482,7 +806,108 @@ class PC_system(SWAPYObject):
     def _check_existence(self):
         return True
 
+class Offline_object(SWAPYObject):
+    '''
+    Node of a snapshot file (see snapshot module). Read only: the node
+    has no actions and no code, it is decoded from the file when shown.
+    '''
+    __slots__ = ('snapshot_file', 'index')
+    
+    def __init__(self, snapshot_file, index):
+        SWAPYObject.__init__(self, None)
+        self.snapshot_file = snapshot_file
+        self.index = index
+        
+    def GetProperties(self):
+        return self.snapshot_file.get_properties(self.index)
+        
+    def Get_quick_properties(self):
+        return self.GetProperties()
+        
+    def Get_cached_properties(self):
+        return self.GetProperties() #decoding is cheap, no need to wait for it
+        
+    def Refresh_properties(self):
+        pass
+        
+    def Get_subitems(self):
+        snapshot_file = self.snapshot_file
+        return [(snapshot_file.get_name(index), Offline_object(snapshot_file, index))
+                for index in snapshot_file.get_children(self.index)]
+                
+    def Get_identity(self):
+        return ('offline', self.index)
+        
+    def Exec_action(self, action_id):
+        return 0
+        
+    def Get_actions(self):
+        return []
+        
+    def Get_lookup_code(self):
+        return ''
+        
+    def Get_action_code(self, action_id):
+        return ''
+        
+    def Highlight_control(self): 
+        return 0
+        
+    def _get_properties_key(self):
+        return None
+        
+    def _check_visibility(self):
+        return True
+        
+    def _check_actionable(self):
+        return True
+        
+    def _check_existence(self):
+        return True
+        
+class Offline_system(PC_system):
+    '''
+    Root of an opened snapshot file, stands for PC_system
+    '''
+    __slots__ = ('snapshot_file',)
+    
+    def __init__(self, snapshot_file):
+        PC_system.__init__(self, None)
+        self.snapshot_file = snapshot_file
+        
+    def Get_identity(self):
+        return ('offline', self.snapshot_file.path)
+        
+    def Get_subitems(self):
+        return [(self.snapshot_file.get_name(0), Offline_object(self.snapshot_file, 0))]
+        
+    def GetProperties(self):
+        header = self.snapshot_file.header
+        return {'Snapshot' : self.snapshot_file.path,
+                'Nodes' : len(self.snapshot_file),
+                'Created' : time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['created'])),
+                'PC name' : header['pc_name'],
+                'Platform' : header['platform']}
+                
+    def Get_quick_properties(self):
+        return self.GetProperties()
+        
+    def Get_cached_properties(self):
+        return self.GetProperties()
+        
+    def Refresh_properties(self):
+        pass
+        
+def open_snapshot(path):
+    '''
+    Return Offline_system root of the snapshot file
+    '''
+    import snapshot
+    return Offline_system(snapshot.SnapshotFile(path))
+    
 class Pwa_window(SWAPYObject):
+    __slots__ = ()
+    
     def _get_additional_children(self):
         '''
         Add menu object as children
@@ -494,18 +919,34 @@ class Pwa_window(SWAPYObject):
             additional_children += menu_child
         return additional_children
         
-    def Get_code(self, action_id):
+    def Get_action_code(self, action_id):
         '''
         winod code
         '''
         action = ACTIONS[action_id]
         code = "\
-w_handle = pywinauto.findwindows.find_windows(title=u'"+ self.pwa_obj.WindowText().encode('unicode-escape', 'replace') +"', class_name='"+ self.pwa_obj.Class() +"')[0]\n\
-window = pwa_app.window_(handle=w_handle)\n\
 window."+action+"()\n"
         return code
         
+    def Get_code_owner(self):
+        return self.pwa_obj, None
+        
+    def Get_lookup_code(self):
+        '''
+        Return code finding the window, it sets the window variable
+        the code of the controls uses
+        '''
+        code = "\
+w_handle = pywinauto.findwindows.find_windows(title=u'"+ self.pwa_obj.WindowText().encode('unicode-escape', 'replace') +"', class_name='"+ self.pwa_obj.Class() +"')[0]\n\
+window = pwa_app.window_(handle=w_handle)\n"
+        return code
+        
 class Pwa_menu(SWAPYObject):
+    __slots__ = ()
+    subitems_sort_key = staticmethod(_sort_by_index) #sorts items by indexes
+
+    def Get_identity(self):
+        return 'menu'
 
     def _check_visibility(self):
         is_visible = False
@@ -541,7 +982,6 @@ class Pwa_menu(SWAPYObject):
         #print(self.pwa_obj.is_main_menu)
         #print(self.pwa_obj.owner_item)
         
-        self.subitems_sort_key = lambda obj: obj[1].pwa_obj.Index() #sorts items by indexes
         additional_children = []
         menu_items = self.pwa_obj.Items()
         for menu_item in menu_items:
@@ -567,6 +1007,11 @@ class Pwa_menu(SWAPYObject):
         return 0
         
 class Pwa_menu_item(Pwa_menu):
+    __slots__ = ()
+    subitems_sort_key = staticmethod(_sort_by_name)
+
+    def Get_identity(self):
+        return ('menu_item', self.pwa_obj.Index())
 
     def _check_actionable(self):
         if self.pwa_obj.State() == 3: #grayed
@@ -606,7 +1051,13 @@ class Pwa_menu_item(Pwa_menu):
             owner_item = menu.owner_item
         return '->'.join(path[::-1])
         
-    def Get_code(self, action_id):
+    def Get_lookup_code(self):
+        return ''
+        
+    def Get_code_owner(self):
+        return self.pwa_obj.ctrl.TopLevelParent(), None
+        
+    def Get_action_code(self, action_id):
         '''
         Generate code for pywinauto module
         '''
@@ -616,67 +1067,107 @@ window.MenuItem(u'"+self.get_menuitems_path().encode('unicode-escape', 'replace'
 "
         return code
         
-class Pwa_combobox(SWAPYObject):
-    def _get_additional_children(self):
+class Pwa_combobox(PagedSWAPYObject):
+    __slots__ = ()
+    
+    def _get_items_count(self):
+        return self.pwa_obj.ItemCount()
+        
+    def _fetch_items(self, indexes):
+        '''
+        All the texts come in one call, so keep them all
+        '''
+        return dict(enumerate(self.pwa_obj.ItemTexts()))
+        
+    def _get_items(self, start, stop):
         '''
         Add ComboBox items as children
         '''
-        additional_children = []
-        items_texts = self.pwa_obj.ItemTexts()
-        for item_name in items_texts:
-            additional_children += [(item_name, virtual_combobox_item(self, item_name))]
-        return additional_children
+        items = []
+        items_texts = self._get_items_data(range(start, stop))
+        for index in range(start, stop):
+            item_name = items_texts.get(index, u'')
+            items += [(item_name, virtual_combobox_item(self, index, item_name))]
+        return items
     
 class virtual_combobox_item(VirtualSWAPYObject):
+    __slots__ = ()
 
     def _get_properies(self):
-        index = None
-        text = self.index
-        for i, name in enumerate(self.parent.pwa_obj.ItemTexts()):
-            if name == text:
-                index = i
-                break
-        return {'Index' : index, 'Text' : text.encode('unicode-escape', 'replace')}
-        
-class Pwa_listview(SWAPYObject):
-    def _get_additional_children(self):
+        text = self.item_data
+        return {'Index' : self.index, 'Text' : text.encode('unicode-escape', 'replace')}
+        
+    def Get_action_code(self, action_id):
+        '''
+        Generate code for pywinauto module, select the item by the text
+        '''
+        action = ACTIONS[action_id]
+        arg = "u'"+self.item_data.encode('unicode-escape', 'replace')+"'"
+        code = "\
+ctrl."+action+"("+arg+")\n"
+        return code
+        
+class Pwa_listview(PagedSWAPYObject):
+    __slots__ = ()
+    
+    def _get_items_count(self):
+        return self.pwa_obj.ItemCount()
+        
+    def _fetch_items(self, indexes):
+        items = {}
+        for index in indexes:
+            items[index] = self.pwa_obj.GetItem(index)
+        return items
+        
+    def _get_items(self, start, stop):
         '''
         Add SysListView32 items as children
         '''
-        additional_children = []
-        for index in range(self.pwa_obj.ItemCount()):
-            item = self.pwa_obj.GetItem(index)
-            additional_children += [(item['text'], virtual_listview_item(self, index))]
-        return additional_children
+        items = []
+        items_data = self._get_items_data(range(start, stop))
+        for index in range(start, stop):
+            item = items_data[index]
+            items += [(item['text'], virtual_listview_item(self, index, item))]
+        return items
     
 class virtual_listview_item(VirtualSWAPYObject):
+    __slots__ = ()
 
     def _get_properies(self):
+        '''
+        Single row from the parent's snapshot, fetched again only if
+        the list view's item count has changed
+        '''
         item_properties = {'Index' : self.index}
-        for index, item_props in enumerate(self.parent.pwa_obj.Items()):
-            if index == self.index:
-                item_properties.update(item_props)
-                break
+        items_data = self.parent._get_items_data([self.index])
+        item_properties.update(items_data.get(self.index, self.item_data or {}))
         return item_properties
 
-class Pwa_tab(SWAPYObject):
-    def _get_additional_children(self):
+class Pwa_tab(PagedSWAPYObject):
+    __slots__ = ()
+    
+    def _get_items_count(self):
+        return self.pwa_obj.TabCount()
+        
+    def _get_items(self, start, stop):
         '''
         Add TabControl items as children
         '''
-        additional_children = []
-        for index in range(self.pwa_obj.TabCount()):
+        items = []
+        for index in range(start, stop):
             text = self.pwa_obj.GetTabText(index)
-            additional_children += [(text, virtual_tab_item(self, index))]
-        return additional_children
+            items += [(text, virtual_tab_item(self, index))]
+        return items
     
 class virtual_tab_item(VirtualSWAPYObject):
+    __slots__ = ()
 
     def _get_properies(self):
         item_properties = {'Index' : self.index}
         return item_properties
 
 class Pwa_toolbar(SWAPYObject):
+    __slots__ = ()
 
     def _get_additional_children(self):
         '''
@@ -704,7 +1195,11 @@ class Pwa_toolbar(SWAPYObject):
         return []
         
 class Pwa_toolbar_button(SWAPYObject):
+    __slots__ = ()
     
+    def Get_identity(self):
+        return ('button', self.pwa_obj.index)
+        
     def _check_visibility(self):
         is_visible = False
         try:
@@ -725,11 +1220,10 @@ class Pwa_toolbar_button(SWAPYObject):
     def _check_existence(self):
         try:
             handle_ = self.pwa_obj.toolbar_ctrl.handle
-            obj = pywinauto.application.WindowSpecification({'handle': handle_})
         except:
             is_exist = False
         else:
-            is_exist = obj.Exists()
+            is_exist = backend.get_backend().exists(handle_)
         return is_exist
         
     def _get_children(self):
@@ -752,7 +1246,14 @@ class Pwa_toolbar_button(SWAPYObject):
         pass
         return 0
         
-    def Get_code(self, action_id):
+    def Get_lookup_code(self):
+        return ''
+        
+    def Get_code_owner(self):
+        toolbar = self.pwa_obj.toolbar_ctrl
+        return toolbar.TopLevelParent(), toolbar
+        
+    def Get_action_code(self, action_id):
         '''
         Generate code for pywinauto module
         '''
@@ -763,6 +1264,7 @@ ctrl.Button("+arg+")."+action+"()\n"
         return code
         
 class Pwa_tree(SWAPYObject):
+    __slots__ = ()
 
     def _get_additional_children(self):
         '''
@@ -784,6 +1286,10 @@ class Pwa_tree(SWAPYObject):
         return 0
 
 class Pwa_tree_item(SWAPYObject):
+    __slots__ = () #path is a slot of SWAPYObject
+
+    def Get_identity(self):
+        return ('tree_item', tuple(self.path))
 
     def _get_properies(self):
         o = self.pwa_obj
@@ -823,11 +1329,33 @@ class Pwa_tree_item(SWAPYObject):
             additional_children += sub_item
         return additional_children
     
-    def Get_code(self, action_id):
+    def Get_lookup_code(self):
+        return ''
+        
+    def Get_code_owner(self):
+        tree = self.pwa_obj.tree_ctrl
+        return tree.TopLevelParent(), tree
+        
+    def Get_action_code(self, action_id):
         '''
         Generate code for pywinauto module
         '''
         action = ACTIONS[action_id]
         code = "\
 ctrl.GetItem("+str(self.path)+")."+action+"()\n"
-        return code        
\ No newline at end of file
+        return code        
+
+#proxy classes of the backends' control types
+TYPE_PROXIES = {'window' : Pwa_window,
+                'menu' : Pwa_menu,
+                'menu_item' : Pwa_menu_item,
+                'combobox' : Pwa_combobox,
+                'listview' : Pwa_listview,
+                'tab' : Pwa_tab,
+                'toolbar' : Pwa_toolbar,
+                'toolbar_button' : Pwa_toolbar_button,
+                'tree_view' : Pwa_tree,
+                'tree_item' : Pwa_tree_item,
+                }
+
+proxy_registry = ProxyRegistry(TYPE_PROXIES, SWAPYObject)
@@ -0,0 +1,336 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import ast
+import collections
+import json
+import re
+import threading
+import time
+import traceback
+
+import backend
+import const
+import instrument
+import proxy
+import scheduler
+
+'''
+Replay of the action steps against the live windows.
+
+    steps = replay.from_recording(recorder.steps)
+    replay.save_steps('smoke.json', steps)
+    ...
+    player = replay.Player(delay=0.1, timeout=5.0)
+    results = player.run_parallel(replay.group_by_window(replay.load_steps('smoke.json')))
+    print replay.format_report(results)
+
+A step is a locator and an action of const.ACTIONS. A locator is
+resolved to a window handle and a control handle once, the handles are
+cached by the player and checked for existence on the next use. A
+control is found by its recorded specification (index path, class and
+control id) first and by its access name then. Steps of different
+top level windows may run in parallel, the steps of a group run in
+order with delay seconds between them.
+'''
+
+#title, class_name - of the top level window
+#instance - index of the window among the ones of the same title and
+#class, ordered by handle
+#access_name - of the control, None for an action on the window or
+#for a control without one
+#spec - codegen.ControlSpec of the control, None for an action on the window
+Locator = collections.namedtuple('Locator', 'title class_name instance access_name spec')
+
+#action - name of const.ACTIONS, args - tuple of the action arguments
+Step = collections.namedtuple('Step', 'locator action args')
+
+#index - of the step in its group
+#resolve_time, action_time - seconds to find the target and to do the action
+#error - text of the exception, None if the step has passed
+StepResult = collections.namedtuple('StepResult', 'group index step resolve_time action_time error')
+
+#action code of a recorded step replay can do: "ctrl.Select(0)\n"
+RECORDED_ACTION = re.compile(r'^(window|ctrl)\.(\w+)\((.*)\)\n$')
+
+#seconds between the tries of a locator which does not resolve yet
+RETRY_INTERVAL = 0.05
+
+
+def _freeze_spec(spec):
+    '''
+    Return the ControlSpec with the index path in a tuple, the locators
+    are the keys of the cache
+    '''
+    import codegen
+    if spec is None:
+        return None
+    class_name, control_id, index_path = spec
+    return codegen.ControlSpec(class_name, control_id, tuple(index_path))
+
+
+def _get_control_name(locator):
+    '''
+    Return text naming the locator target in the messages
+    '''
+    if locator.access_name is not None:
+        return locator.access_name
+    if locator.spec is not None:
+        return '%s#%s' % (locator.spec.class_name, locator.spec.control_id)
+    return 'window'
+
+
+class LocatorError(LookupError):
+    '''
+    The window or the control of a locator is not found
+    '''
+    pass
+
+
+def from_recording(recorded_steps):
+    '''
+    Return Steps of codegen.Recorder steps. Only the actions called on
+    the window or the control itself can be replayed, ValueError is
+    raised for the ones on their items (menu items, tree view items, ...).
+    '''
+    steps = []
+    for recorded in recorded_steps:
+        match = RECORDED_ACTION.match(recorded.code)
+        if match is None or match.group(2) != recorded.action:
+            raise ValueError('Can not replay %r' % recorded.code)
+        args = ast.literal_eval('(%s,)' % match.group(3)) if match.group(3) else ()
+        window = recorded.window
+        if match.group(1) == 'window':
+            locator = Locator(window.title, window.class_name, window.instance, None, None)
+        else:
+            locator = Locator(window.title, window.class_name, window.instance,
+                              recorded.control, _freeze_spec(recorded.spec))
+        steps.append(Step(locator, recorded.action, args))
+    return steps
+
+
+def save_steps(path, steps):
+    data = []
+    for step in steps:
+        locator = step.locator
+        data.append({'title' : locator.title,
+                     'class_name' : locator.class_name,
+                     'instance' : locator.instance,
+                     'access_name' : locator.access_name,
+                     'spec' : locator.spec and list(locator.spec),
+                     'action' : step.action,
+                     'args' : list(step.args)})
+    with open(path, 'w') as steps_file:
+        json.dump(data, steps_file, indent=1)
+
+
+def load_steps(path):
+    with open(path) as steps_file:
+        data = json.load(steps_file)
+    steps = []
+    for item in data:
+        locator = Locator(item['title'], item['class_name'], item.get('instance', 0),
+                          item.get('access_name'), _freeze_spec(item.get('spec')))
+        steps.append(Step(locator, item['action'], tuple(item.get('args', ()))))
+    return steps
+
+
+def group_by_window(steps):
+    '''
+    Split the steps into the lists of the same top level window,
+    keeping their order
+    '''
+    groups = collections.OrderedDict()
+    for step in steps:
+        locator = step.locator
+        groups.setdefault((locator.title, locator.class_name, locator.instance), []).append(step)
+    return groups.values()
+
+
+class LocatorCache(object):
+    '''
+    Window and control handles of the locators
+    '''
+    def __init__(self):
+        self._windows = {} #(title, class_name, instance) -> handle
+        self._controls = {} #(window handle, access_name, spec) -> handle
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+            self._controls.clear()
+
+    def resolve(self, locator):
+        '''
+        Return the wrapper of the locator target or raise LocatorError
+        '''
+        window_system = backend.get_backend()
+        window_key = (locator.title, locator.class_name, locator.instance)
+        with self._lock:
+            window_handle = self._windows.get(window_key)
+        if window_handle is None or not window_system.exists(window_handle):
+            handles = sorted(window_system.find_windows(title=locator.title,
+                                                        class_name=locator.class_name))
+            if locator.instance >= len(handles):
+                raise LocatorError('No window %r of class %r, instance %d'
+                                   % (locator.title, locator.class_name, locator.instance))
+            window_handle = handles[locator.instance]
+            with self._lock:
+                self._windows[window_key] = window_handle
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+        if locator.access_name is None and locator.spec is None:
+            return window_system.window(window_handle)
+
+        control_key = (window_handle, locator.access_name, locator.spec)
+        with self._lock:
+            handle = self._controls.get(control_key)
+        if handle is not None and window_system.exists(handle):
+            with self._lock:
+                self.hits += 1
+            return window_system.wrap_handle(handle)
+        handle = self._find_control(window_system, window_handle, locator)
+        with self._lock:
+            self._controls[control_key] = handle
+            self.misses += 1
+        return window_system.wrap_handle(handle)
+
+    def _find_control(self, window_system, window_handle, locator):
+        spec = locator.spec
+        if spec is not None:
+            try:
+                control = window_system.wrap_handle(window_handle)
+                for index in spec.index_path:
+                    control = control.Children()[index]
+                if control.Class() == spec.class_name and control.ControlID() == spec.control_id:
+                    return control.handle
+            except (IndexError, window_system.InvalidWindowHandle):
+                pass #the window has changed, try the access name
+        if locator.access_name is not None:
+            names_index = proxy.get_access_names_index(window_handle)
+            for handle, names in names_index.names.items():
+                if locator.access_name in names:
+                    return handle
+        raise LocatorError('No control %r in the window %r' % (_get_control_name(locator),
+                                                               locator.title))
+
+
+class Player(object):
+    '''
+    Runs the steps.
+
+    delay - seconds between the steps of a group
+    timeout - seconds a locator is tried to be resolved, e.g. while the
+    window is being opened
+    stop_on_error - skip the rest of the group after a failed step
+    '''
+    def __init__(self, delay=0.0, timeout=5.0, stop_on_error=True, cache=None):
+        self.delay = delay
+        self.timeout = timeout
+        self.stop_on_error = stop_on_error
+        self.cache = cache or LocatorCache()
+
+    def run(self, steps, group=0):
+        '''
+        Run the steps in order, return [StepResult,...]
+        '''
+        results = []
+        failed = False
+        for index, step in enumerate(steps):
+            if failed and self.stop_on_error:
+                results.append(StepResult(group, index, step, 0.0, 0.0, 'skipped'))
+                continue
+            if index and self.delay:
+                time.sleep(self.delay)
+            result = self._run_step(group, index, step)
+            failed = failed or result.error is not None
+            results.append(result)
+        return results
+
+    def run_parallel(self, groups, workers=8):
+        '''
+        Run every group of the steps (e.g. of group_by_window()) in order,
+        the groups in parallel. Return [StepResult,...] group by group.
+        '''
+        pool = scheduler.WorkerPool(min(workers, len(groups)) or 1, name='swapy-replay')
+        try:
+            tasks = [pool.submit(self.run, steps, group) for group, steps in enumerate(groups)]
+            results = []
+            for task in tasks:
+                results.extend(task.get())
+            return results
+        finally:
+            pool.shutdown(wait=True)
+
+    def _resolve(self, locator):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                return self.cache.resolve(locator)
+            except LocatorError:
+                if time.time() >= deadline:
+                    raise
+            time.sleep(RETRY_INTERVAL)
+
+    def _run_step(self, group, index, step):
+        start = time.time()
+        resolve_time = 0.0
+        try:
+            if step.action not in const.ACTIONS.values():
+                raise ValueError('Unknown action %r' % step.action)
+            target = self._resolve(step.locator)
+            resolve_time = time.time() - start
+            getattr(target, step.action)(*step.args)
+        except Exception:
+            error = traceback.format_exc().strip().splitlines()[-1]
+            if not resolve_time:
+                resolve_time = time.time() - start
+            return StepResult(group, index, step, resolve_time, 0.0, error)
+        return StepResult(group, index, step, resolve_time, time.time() - start - resolve_time, None)
+
+
+def format_report(results):
+    '''
+    Return text of the step latencies and their percentiles
+    '''
+    lines = ['%5s %5s %-40s %10s %10s  %s' % ('group', 'step', 'target', 'find ms', 'action ms', 'error')]
+    for result in results:
+        locator = result.step.locator
+        title = locator.title if not locator.instance else '%s#%d' % (locator.title, locator.instance)
+        target = '%s / %s.%s' % (title, _get_control_name(locator), result.step.action)
+        lines.append('%5d %5d %-40s %10.2f %10.2f  %s' % (result.group, result.index, target[:40],
+                                                          result.resolve_time * 1000,
+                                                          result.action_time * 1000,
+                                                          result.error or ''))
+    passed = [result for result in results if result.error is None]
+    if passed:
+        totals = [result.resolve_time + result.action_time for result in passed]
+        lines.append('%d passed, %d failed; step ms p50 %.2f, p90 %.2f, max %.2f'
+                     % (len(passed), len(results) - len(passed),
+                        instrument.percentile(totals, 50) * 1000,
+                        instrument.percentile(totals, 90) * 1000, max(totals) * 1000))
+    else:
+        lines.append('0 passed, %d failed' % len(results))
+    return '\n'.join(lines)
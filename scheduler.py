@@ -0,0 +1,230 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import Queue
+import threading
+import time
+import traceback
+
+'''
+Background work for the UI: a bounded worker pool and a latest-wins
+scheduler on top of it
+'''
+
+
+class Token(object):
+    '''
+    Cancellation flag of a scheduled job.
+    Long jobs may check token.cancelled to stop early.
+    '''
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Task(object):
+    '''
+    Result holder of a job submitted to WorkerPool
+    '''
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.token = Token()
+        self.result = None
+        self.exception = None
+        self._done = threading.Event()
+
+    def run(self):
+        if not self.token.cancelled:
+            try:
+                self.result = self.func(*self.args, **self.kwargs)
+            except Exception as exc:
+                self.exception = exc
+        self._done.set()
+
+    def cancel(self):
+        '''
+        The task is skipped if it has not started yet
+        '''
+        self.token.cancel()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        '''
+        Return True if the task has finished within the timeout
+        '''
+        self._done.wait(timeout)
+        return self._done.is_set()
+
+    def get(self, timeout=None):
+        '''
+        Return the result or raise the task's exception.
+        Raise Queue.Empty if the task has not finished within the timeout.
+        '''
+        if not self.wait(timeout):
+            raise Queue.Empty('The task has not finished in %s seconds' % timeout)
+        if self.exception is not None:
+            raise self.exception
+        return self.result
+
+
+class WorkerPool(object):
+    '''
+    Fixed number of daemon threads executing submitted tasks in order
+    '''
+    def __init__(self, workers=4, name='swapy-worker'):
+        self._tasks = Queue.Queue()
+        self._threads = []
+        for i in range(workers):
+            worker = threading.Thread(target=self._work, name='%s-%d' % (name, i))
+            worker.daemon = True
+            worker.start()
+            self._threads.append(worker)
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            task.run()
+
+    def submit(self, func, *args, **kwargs):
+        '''
+        Schedule func(*args, **kwargs), return its Task
+        '''
+        task = Task(func, args, kwargs)
+        self._tasks.put(task)
+        return task
+
+    def map(self, func, items):
+        '''
+        Run func for every item in parallel, return the list of Tasks
+        '''
+        return [self.submit(func, item) for item in items]
+
+    def shutdown(self, wait=False, timeout=None):
+        '''
+        Stop the workers after the submitted tasks. With wait, return
+        when they are stopped or, if timeout is given, in timeout seconds.
+        '''
+        for worker in self._threads:
+            self._tasks.put(None)
+        if wait:
+            deadline = None if timeout is None else time.time() + timeout
+            for worker in self._threads:
+                if deadline is None:
+                    worker.join()
+                else:
+                    worker.join(max(deadline - time.time(), 0))
+
+
+def _call_now(func, *args):
+    func(*args)
+
+
+class LatestWinsScheduler(object):
+    '''
+    Per target coalescing of the jobs. Every target (e.g. the properties
+    list or the objects tree) has at most one running and one pending job.
+    A newer job replaces the pending one and cancels the running one,
+    results of the cancelled jobs are dropped.
+
+    deliver(func, *args) hands the results over to the UI thread,
+    e.g. wx.CallAfter. Results are delivered in place by default.
+    Exceptions of the jobs are printed, and delivered to on_error if the
+    job has one.
+    '''
+    def __init__(self, pool, deliver=_call_now):
+        self.pool = pool
+        self.deliver = deliver
+        self._lock = threading.Lock()
+        self._running = {} #target -> Token
+        self._pending = {} #target -> (Token, work, on_done, on_error)
+
+    def submit(self, target, work, on_done=None, on_error=None):
+        '''
+        Schedule work(token) for the target. on_done(result), or
+        on_error(exception) if work raises, is delivered unless the job
+        has been cancelled or superseded. Return the Token.
+        '''
+        token = Token()
+        with self._lock:
+            running = self._running.get(target)
+            if running is not None:
+                running.cancel()
+                pending = self._pending.get(target)
+                if pending is not None:
+                    pending[0].cancel()
+                self._pending[target] = (token, work, on_done, on_error)
+                return token
+            self._running[target] = token
+        self.pool.submit(self._run, target, token, work, on_done, on_error)
+        return token
+
+    def cancel(self, target):
+        '''
+        Cancel the running and the pending jobs of the target
+        '''
+        with self._lock:
+            running = self._running.get(target)
+            if running is not None:
+                running.cancel()
+            pending = self._pending.pop(target, None)
+            if pending is not None:
+                pending[0].cancel()
+
+    def cancel_all(self):
+        with self._lock:
+            targets = list(self._running.keys())
+        for target in targets:
+            self.cancel(target)
+
+    def _run(self, target, token, work, on_done, on_error):
+        try:
+            if not token.cancelled:
+                result = work(token)
+                if on_done is not None and not token.cancelled:
+                    self.deliver(self._deliver, token, on_done, result)
+        except Exception as exc:
+            traceback.print_exc()
+            if on_error is not None and not token.cancelled:
+                self.deliver(self._deliver, token, on_error, exc)
+        finally:
+            self._next(target)
+
+    def _deliver(self, token, on_done, result):
+        #the job could be superseded while the result was on the way
+        if not token.cancelled:
+            on_done(result)
+
+    def _next(self, target):
+        with self._lock:
+            pending = self._pending.pop(target, None)
+            if pending is None:
+                del self._running[target]
+                return
+            token, work, on_done, on_error = pending
+            self._running[target] = token
+        self.pool.submit(self._run, target, token, work, on_done, on_error)
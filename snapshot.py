@@ -0,0 +1,244 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+import json
+import mmap
+import platform
+import struct
+
+'''
+Snapshot files: crawler.Snapshot on disk.
+
+    snapshot.save(crawler.Crawler().crawl(window_obj, 'Notepad'), 'notepad.swapy')
+    snapshot_file = snapshot.SnapshotFile('notepad.swapy')
+    root = snapshot_file.get_node(0)
+    for index in snapshot_file.get_children(0):
+        print snapshot_file.get_name(index), snapshot_file.get_properties(index)
+
+Layout, little-endian:
+    MAGIC, version (uint16), header length (uint32)
+    header - JSON: nodes count, proxy type names, sections offsets,
+             properties section length, ...
+    nodes section - a fixed size record per node, see NODE_RECORD
+    names section - node names, raw bytes
+    properties section - JSON object of every node's properties
+
+Nodes are stored breadth first, so the children of a node are
+consecutive records. The file is memory-mapped and only the header is
+read on open: records, names and properties are decoded when asked for.
+'''
+
+MAGIC = 'SWAPYSNP'
+VERSION = 1
+PREAMBLE = struct.Struct('<8sHI')
+
+#parent (-1 for the root), first child, children count, proxy type id,
+#handle (-1 if none), name offset, name length, properties offset,
+#properties length
+NODE_RECORD = struct.Struct('<iIIHqIIII')
+
+#property with the crawl error of an incomplete node
+ERROR_PROPERTY = 'Crawl error'
+
+#decoded NODE_RECORD, parent is None for the root, handle is None if none
+NodeInfo = collections.namedtuple('NodeInfo', 'parent first_child child_count proxy_type handle')
+
+
+class SnapshotFormatError(ValueError):
+    '''
+    Not a snapshot file or a snapshot of an unsupported version
+    '''
+    pass
+
+
+def _to_json_value(value):
+    '''
+    Make a property value JSON serializable. Values of the other
+    types (rectangles, fonts, ...) are kept as their text.
+    '''
+    if isinstance(value, str):
+        return value.decode('cp1251', 'replace')
+    if value is None or isinstance(value, (unicode, bool, int, long, float)):
+        return value
+    if isinstance(value, dict):
+        return dict((unicode(_to_json_value(key)), _to_json_value(item))
+                    for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(item) for item in value]
+    try:
+        return unicode(value)
+    except Exception:
+        return repr(value).decode('cp1251', 'replace')
+
+
+def _breadth_first(nodes):
+    '''
+    Return crawler nodes in breadth first order
+    '''
+    order = [nodes[0]]
+    for node in order: #order grows while it is iterated
+        order.extend(nodes[index] for index in node.children)
+    return order
+
+
+def save(crawled, path, title=None):
+    '''
+    Write crawler.Snapshot to the path
+    '''
+    order = _breadth_first(crawled.nodes)
+    new_indexes = dict((node.index, new_index) for new_index, node in enumerate(order))
+    types = []
+    type_ids = {}
+    records = []
+    names = []
+    names_length = 0
+    properties = []
+    properties_length = 0
+    next_child = 1
+    for node in order:
+        if node.proxy_type not in type_ids:
+            type_ids[node.proxy_type] = len(types)
+            types.append(node.proxy_type)
+        name = node.name
+        if isinstance(name, unicode):
+            name = name.encode('cp1251', 'replace')
+        node_properties = _to_json_value(node.properties)
+        if node.error is not None:
+            node_properties[ERROR_PROPERTY] = _to_json_value(node.error)
+        node_properties = json.dumps(node_properties, separators=(',', ':'))
+        parent = -1 if node.parent is None else new_indexes[node.parent]
+        handle = -1 if node.handle is None else node.handle
+        records.append(NODE_RECORD.pack(parent, next_child, len(node.children),
+                                        type_ids[node.proxy_type], handle,
+                                        names_length, len(name),
+                                        properties_length, len(node_properties)))
+        next_child += len(node.children)
+        names.append(name)
+        names_length += len(name)
+        properties.append(node_properties)
+        properties_length += len(node_properties)
+
+    sections = {}
+    offset = 0
+    for section, length in (('nodes', NODE_RECORD.size * len(records)),
+                            ('names', names_length),
+                            ('properties', properties_length)):
+        sections[section] = offset
+        offset += length
+    header = json.dumps({'nodes' : len(records),
+                         'types' : types,
+                         'sections' : sections,
+                         'properties_length' : properties_length,
+                         'title' : _to_json_value(title or order[0].name),
+                         'created' : crawled.created,
+                         'pc_name' : platform.node(),
+                         'platform' : platform.platform()})
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        snapshot_file.write(header)
+        for chunks in (records, names, properties):
+            snapshot_file.write(''.join(chunks))
+
+
+class SnapshotFile(object):
+    '''
+    Read only, memory-mapped snapshot file
+    '''
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as snapshot_file:
+            preamble = snapshot_file.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size:
+                raise SnapshotFormatError('%s is not a snapshot file' % path)
+            magic, version, header_length = PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise SnapshotFormatError('%s is not a snapshot file' % path)
+            if version != VERSION:
+                raise SnapshotFormatError('Unsupported snapshot version %d' % version)
+            try:
+                self.header = json.loads(snapshot_file.read(header_length))
+                base = PREAMBLE.size + header_length
+                sections = self.header['sections']
+                self._nodes_offset = base + sections['nodes']
+                self._names_offset = base + sections['names']
+                self._properties_offset = base + sections['properties']
+                self._end = self._properties_offset + self.header['properties_length']
+                self.types = self.header['types']
+                self.title = self.header['title']
+            except (ValueError, KeyError, TypeError):
+                raise SnapshotFormatError('%s has a corrupt header' % path)
+            self._map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < self._end:
+            self._map.close()
+            raise SnapshotFormatError('%s is truncated' % path)
+
+    def __len__(self):
+        return self.header['nodes']
+
+    def close(self):
+        self._map.close()
+
+    def _get_record(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError('No node %d in the snapshot' % index)
+        return NODE_RECORD.unpack_from(self._map, self._nodes_offset + index * NODE_RECORD.size)
+
+    def get_node(self, index):
+        '''
+        Return NodeInfo of the node
+        '''
+        (parent, first_child, child_count, type_id, handle,
+         name_offset, name_length, properties_offset, properties_length) = self._get_record(index)
+        return NodeInfo(None if parent < 0 else parent, first_child, child_count,
+                        self.types[type_id], None if handle < 0 else handle)
+
+    def get_children(self, index):
+        '''
+        Return indexes of the children of the node
+        '''
+        record = self._get_record(index)
+        return range(record[1], record[1] + record[2])
+
+    def get_name(self, index):
+        '''
+        Return the node name as it is shown in the objects browser
+        '''
+        record = self._get_record(index)
+        offset = self._names_offset + record[5]
+        return self._map[offset:offset + record[6]]
+
+    def get_properties(self, index):
+        record = self._get_record(index)
+        offset = self._properties_offset + record[7]
+        try:
+            return json.loads(self._map[offset:offset + record[8]])
+        except ValueError:
+            raise SnapshotFormatError('%s has corrupt properties of the node %d' % (self.path, index))
+
+    def get_path(self, index):
+        '''
+        Return [root name, ..., node name]
+        '''
+        path = []
+        while index is not None:
+            path.append(self.get_name(index))
+            index = self.get_node(index).parent
+        return path[::-1]
@@ -0,0 +1,326 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+
+import crawler
+import snapshot
+
+'''
+Differences between two snapshots of a window tree, e.g. of two builds
+of the application under test.
+
+    diff = snapshot_diff.diff_snapshots(snapshot.SnapshotFile('build1.swapy'),
+                                        snapshot.SnapshotFile('build2.swapy'))
+    for change in diff.changes:
+        print change.kind, change.old_path, change.new_path
+
+Handles differ from run to run, so the nodes are matched by the class,
+the name, the place in the tree and the access names:
+    1. children of the matched nodes are matched by class and name
+    2. the rest of them by class and a common access name, or by class
+    if there is one such child left on both sides
+    3. the nodes left in the whole tree are matched by class and a name
+    or an access name unique on both sides, then their children go
+    through 1-2 again
+Every step is a single pass over the nodes left, so the diff of two
+100k nodes trees takes about as long as reading them.
+'''
+
+ADDED = 'added'
+REMOVED = 'removed'
+RENAMED = 'renamed'
+MOVED = 'moved'
+#the shortest access name, the one Get_code uses, has changed
+ACCESS_NAME = 'access name'
+
+#old, new - node indexes, None for the missing side
+#old_path, new_path - [root name, ..., node name], None for the missing side
+Change = collections.namedtuple('Change', 'kind old new old_path new_path')
+
+
+def _to_unicode(text):
+    if isinstance(text, str):
+        return text.decode('cp1251', 'replace')
+    return unicode(text)
+
+
+class _Tree(object):
+    '''
+    The node data the matching needs, in plain lists
+    '''
+    def __init__(self, parents, names, classes, access_names):
+        self.parents = parents
+        self.names = names
+        self.classes = classes
+        self.access_names = access_names
+        self.children = [[] for name in names]
+        for index, parent in enumerate(parents):
+            if parent is not None:
+                self.children[parent].append(index)
+
+    def __len__(self):
+        return len(self.names)
+
+    def get_path(self, index):
+        path = []
+        while index is not None:
+            path.append(self.names[index])
+            index = self.parents[index]
+        return path[::-1]
+
+
+def _load(tree):
+    '''
+    Return _Tree of a snapshot.SnapshotFile or a crawler.Snapshot
+    '''
+    parents = []
+    names = []
+    classes = []
+    access_names = []
+    if isinstance(tree, crawler.Snapshot):
+        for node in tree.nodes:
+            parents.append(node.parent)
+            names.append(_to_unicode(node.name))
+            properties = node.properties
+            classes.append(_to_unicode(properties.get('Class', node.proxy_type)))
+            access_names.append([_to_unicode(name)
+                                 for name in properties.get('Access names', [])])
+    else:
+        for index in range(len(tree)):
+            node = tree.get_node(index)
+            parents.append(node.parent)
+            names.append(_to_unicode(tree.get_name(index)))
+            properties = tree.get_properties(index)
+            classes.append(properties.get('Class', node.proxy_type))
+            access_names.append(properties.get('Access names', []))
+    return _Tree(parents, names, classes, access_names)
+
+
+class SnapshotDiff(object):
+    '''
+    Result of diff_snapshots()
+    '''
+    def __init__(self, old_tree, new_tree, matches, changes):
+        self.old_tree = old_tree
+        self.new_tree = new_tree
+        #old node index -> new node index
+        self.matches = matches
+        self.changes = changes
+
+    def get_changes(self, kind):
+        return [change for change in self.changes if change.kind == kind]
+
+    def get_counts(self):
+        '''
+        Return {kind : number of changes}
+        '''
+        counts = dict.fromkeys([ADDED, REMOVED, RENAMED, MOVED, ACCESS_NAME], 0)
+        for change in self.changes:
+            counts[change.kind] += 1
+        return counts
+
+
+class _Matcher(object):
+    def __init__(self, old_tree, new_tree):
+        self.old_tree = old_tree
+        self.new_tree = new_tree
+        self.matches = {} #old -> new
+        self.matched_new = set()
+
+    def match(self):
+        old_tree, new_tree = self.old_tree, self.new_tree
+        if not len(old_tree) or not len(new_tree):
+            return self.matches
+        self._add(0, 0)
+        queue = [(0, 0)]
+        while queue:
+            self._match_children(queue)
+            queue = self._match_leftovers()
+        return self.matches
+
+    def _add(self, old, new):
+        self.matches[old] = new
+        self.matched_new.add(new)
+
+    def _match_children(self, queue):
+        '''
+        Match the children of the matched pairs in the queue, and of the
+        pairs matched on the way
+        '''
+        old_tree, new_tree = self.old_tree, self.new_tree
+        for old, new in queue: #queue grows while it is iterated
+            old_children = [child for child in old_tree.children[old]
+                            if child not in self.matches]
+            new_children = [child for child in new_tree.children[new]
+                            if child not in self.matched_new]
+            if not old_children or not new_children:
+                continue
+            #by class and name, in order for the duplicates
+            by_name = collections.defaultdict(collections.deque)
+            for child in new_children:
+                by_name[(new_tree.classes[child], new_tree.names[child])].append(child)
+            old_left = []
+            for child in old_children:
+                candidates = by_name.get((old_tree.classes[child], old_tree.names[child]))
+                if candidates:
+                    new_child = candidates.popleft()
+                    self._add(child, new_child)
+                    queue.append((child, new_child))
+                else:
+                    old_left.append(child)
+            if not old_left:
+                continue
+            new_left = [child for child in new_children if child not in self.matched_new]
+            #by class and a common access name
+            by_access_name = {}
+            for child in new_left:
+                for name in new_tree.access_names[child]:
+                    by_access_name.setdefault((new_tree.classes[child], name), child)
+            old_rest = []
+            for child in old_left:
+                for name in old_tree.access_names[child]:
+                    new_child = by_access_name.get((old_tree.classes[child], name))
+                    if new_child is not None and new_child not in self.matched_new:
+                        self._add(child, new_child)
+                        queue.append((child, new_child))
+                        break
+                else:
+                    old_rest.append(child)
+            #by class if it is the only one left on both sides
+            old_by_class = collections.defaultdict(list)
+            for child in old_rest:
+                old_by_class[old_tree.classes[child]].append(child)
+            new_by_class = collections.defaultdict(list)
+            for child in new_left:
+                if child not in self.matched_new:
+                    new_by_class[new_tree.classes[child]].append(child)
+            for class_name, old_same in old_by_class.items():
+                new_same = new_by_class.get(class_name)
+                if len(old_same) == 1 and new_same and len(new_same) == 1:
+                    self._add(old_same[0], new_same[0])
+                    queue.append((old_same[0], new_same[0]))
+
+    def _match_leftovers(self):
+        '''
+        Match the nodes left in the whole trees by a key unique on both
+        sides. Return the new pairs.
+        '''
+        old_tree, new_tree = self.old_tree, self.new_tree
+        old_left = [index for index in range(len(old_tree)) if index not in self.matches]
+        new_left = [index for index in range(len(new_tree)) if index not in self.matched_new]
+        pairs = []
+        for get_keys in (self._name_keys, self._access_name_keys):
+            old_keys = self._unique_keys(old_tree, old_left, get_keys)
+            new_keys = self._unique_keys(new_tree, new_left, get_keys)
+            for key, old in old_keys.items():
+                new = new_keys.get(key)
+                if new is not None and old not in self.matches and new not in self.matched_new:
+                    self._add(old, new)
+                    pairs.append((old, new))
+            old_left = [index for index in old_left if index not in self.matches]
+            new_left = [index for index in new_left if index not in self.matched_new]
+        return pairs
+
+    @staticmethod
+    def _name_keys(tree, index):
+        return [(tree.classes[index], tree.names[index])]
+
+    @staticmethod
+    def _access_name_keys(tree, index):
+        return [(tree.classes[index], name) for name in tree.access_names[index]]
+
+    @staticmethod
+    def _unique_keys(tree, indexes, get_keys):
+        '''
+        Return {key : index} of the keys only one of the nodes has
+        '''
+        found = {}
+        for index in indexes:
+            for key in get_keys(tree, index):
+                found[key] = None if key in found else index
+        return dict((key, index) for key, index in found.items() if index is not None)
+
+
+def diff_snapshots(old_snapshot, new_snapshot):
+    '''
+    Return SnapshotDiff of two snapshot.SnapshotFile or crawler.Snapshot
+    objects
+    '''
+    old_tree = _load(old_snapshot)
+    new_tree = _load(new_snapshot)
+    matches = _Matcher(old_tree, new_tree).match()
+    changes = []
+    for old in range(len(old_tree)):
+        new = matches.get(old)
+        if new is None:
+            changes.append(Change(REMOVED, old, None, old_tree.get_path(old), None))
+            continue
+        kinds = []
+        old_parent = old_tree.parents[old]
+        if old_parent is not None and matches.get(old_parent) != new_tree.parents[new]:
+            kinds.append(MOVED)
+        if old_tree.names[old] != new_tree.names[new]:
+            kinds.append(RENAMED)
+        old_names = old_tree.access_names[old]
+        new_names = new_tree.access_names[new]
+        if old_names and new_names and old_names[0] != new_names[0]:
+            kinds.append(ACCESS_NAME)
+        if kinds:
+            old_path = old_tree.get_path(old)
+            new_path = new_tree.get_path(new)
+            for kind in kinds:
+                changes.append(Change(kind, old, new, old_path, new_path))
+    matched_new = set(matches.values())
+    for new in range(len(new_tree)):
+        if new not in matched_new:
+            changes.append(Change(ADDED, None, new, None, new_tree.get_path(new)))
+    return SnapshotDiff(old_tree, new_tree, matches, changes)
+
+
+def diff_files(old_path, new_path):
+    '''
+    Return SnapshotDiff of two snapshot files
+    '''
+    old_snapshot = snapshot.SnapshotFile(old_path)
+    try:
+        new_snapshot = snapshot.SnapshotFile(new_path)
+        try:
+            return diff_snapshots(old_snapshot, new_snapshot)
+        finally:
+            new_snapshot.close()
+    finally:
+        old_snapshot.close()
+
+
+def format_change(diff, change):
+    '''
+    Return a line of text for the change of the diff
+    '''
+    if change.kind == ADDED:
+        return '+ %s' % ' / '.join(change.new_path)
+    if change.kind == REMOVED:
+        return '- %s' % ' / '.join(change.old_path)
+    if change.kind == ACCESS_NAME:
+        return '~ %s: %s: %s -> %s' % (change.kind, ' / '.join(change.new_path),
+                                       diff.old_tree.access_names[change.old][0],
+                                       diff.new_tree.access_names[change.new][0])
+    return '~ %s: %s -> %s' % (change.kind, ' / '.join(change.old_path),
+                               ' / '.join(change.new_path))
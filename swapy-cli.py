@@ -0,0 +1,184 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Objects browser from the command line, without wx.
+
+    swapy-cli.py tree --depth 1
+    swapy-cli.py props "Untitled - Notepad" Edit
+    swapy-cli.py find "Untitled - Notepad" Edit
+    swapy-cli.py code --action Click "Untitled - Notepad" Edit
+    swapy-cli.py do --action Click "Untitled - Notepad" Edit
+    swapy-cli.py do --record smoke.json --action Click "Untitled - Notepad" Edit
+    swapy-cli.py replay --delay 0.1 --parallel 8 smoke.json
+    swapy-cli.py snapshot notepad.swapy "Untitled - Notepad"
+
+An object is given by the path of its names in the objects browser,
+no path means the list of the top level windows.
+'''
+
+import argparse
+import os
+import sys
+
+import backend
+import headless
+import snapshot
+
+
+def _print(text):
+    if isinstance(text, unicode):
+        text = text.encode('utf-8', 'replace')
+    print(text)
+
+
+def tree_command(args):
+    obj = headless.find(args.path)
+    name = args.path[-1] if args.path else 'PC'
+    for depth, node_name, node in headless.walk(obj, args.depth, name):
+        _print('  ' * depth + node_name + (' (%s)' % node.error if node.error else ''))
+
+
+def props_command(args):
+    properties = headless.get_properties(headless.find(args.path))
+    for name in sorted(properties):
+        _print(u'%s: %s' % (name, properties[name]))
+
+
+def find_command(args):
+    window = headless.find(args.path[:1])
+    obj = headless.find_by_access_name(window, args.path[1])
+    properties = headless.get_properties(obj)
+    for name in ('Class', 'Texts', 'Rectangle', 'Access names'):
+        if name in properties:
+            _print(u'%s: %s' % (name, properties[name]))
+
+
+def code_command(args):
+    _print(headless.get_code(args.path, args.action, fast=args.fast))
+
+
+def actions_command(args):
+    for action in headless.get_actions(headless.find(args.path)):
+        _print(action)
+
+
+def do_command(args):
+    obj = headless.find(args.path)
+    if args.record:
+        import codegen
+        import replay
+        recorder = codegen.Recorder()
+        recorder.record(obj, headless.get_action_id(args.action))
+        new_steps = replay.from_recording(recorder.steps) #before the action, it may close the window
+    headless.do_action(obj, args.action)
+    if args.record:
+        steps = replay.load_steps(args.record) if os.path.exists(args.record) else []
+        replay.save_steps(args.record, steps + new_steps)
+
+
+def replay_command(args):
+    import replay
+    player = replay.Player(delay=args.delay, timeout=args.timeout,
+                           stop_on_error=not args.keep_going)
+    steps = replay.load_steps(args.file)
+    if args.parallel > 1:
+        results = player.run_parallel(replay.group_by_window(steps), args.parallel)
+    else:
+        results = player.run(steps)
+    _print(replay.format_report(results))
+    if any(result.error for result in results):
+        return 1
+
+
+def snapshot_command(args):
+    import crawler
+    obj = headless.find(args.path)
+    name = args.path[-1] if args.path else None
+    crawled = crawler.Crawler(max_depth=args.depth).crawl(obj, name)
+    snapshot.save(crawled, args.file)
+    _print('%d nodes, %d errors' % (len(crawled), len(crawled.get_errors())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backend', choices=['pywinauto', 'fake'], default='pywinauto',
+                        help='window system, fake is a synthetic one for trying out')
+    commands = parser.add_subparsers()
+
+    command = commands.add_parser('tree', help='list the tree under the object')
+    command.add_argument('--depth', type=int, default=None, help='max depth to list')
+    command.add_argument('path', nargs='*')
+    command.set_defaults(func=tree_command)
+
+    command = commands.add_parser('props', help='print the object properties')
+    command.add_argument('path', nargs='*')
+    command.set_defaults(func=props_command)
+
+    command = commands.add_parser('find', help='find a control by an access name')
+    command.add_argument('path', nargs=2, metavar=('window', 'access_name'))
+    command.set_defaults(func=find_command)
+
+    command = commands.add_parser('actions', help='list the object actions')
+    command.add_argument('path', nargs='+')
+    command.set_defaults(func=actions_command)
+
+    command = commands.add_parser('code', help='print a script doing the action')
+    command.add_argument('--action', default='Click', help='action name, Click by default')
+    command.add_argument('--fast', action='store_true',
+                         help='find the control by its class, id and place in the window')
+    command.add_argument('path', nargs='+')
+    command.set_defaults(func=code_command)
+
+    command = commands.add_parser('do', help='do the action on the object')
+    command.add_argument('--action', default='Click', help='action name, Click by default')
+    command.add_argument('--record', metavar='FILE', help='append the step to a replay file')
+    command.add_argument('path', nargs='+')
+    command.set_defaults(func=do_command)
+
+    command = commands.add_parser('snapshot', help='save a snapshot of the object tree')
+    command.add_argument('--depth', type=int, default=None, help='max depth to save')
+    command.add_argument('file')
+    command.add_argument('path', nargs='*')
+    command.set_defaults(func=snapshot_command)
+
+    command = commands.add_parser('replay', help='replay the steps of a file saved by do --record')
+    command.add_argument('--delay', type=float, default=0.0, help='seconds between the steps')
+    command.add_argument('--timeout', type=float, default=5.0,
+                         help='seconds to wait for a window or a control')
+    command.add_argument('--parallel', type=int, default=1, metavar='N',
+                         help='replay the steps of N top level windows at once')
+    command.add_argument('--keep-going', action='store_true', help='do not stop on a failed step')
+    command.add_argument('file')
+    command.set_defaults(func=replay_command)
+
+    args = parser.parse_args()
+    if args.backend == 'fake':
+        import fake_backend
+        backend.set_backend(fake_backend.FakeBackend())
+    try:
+        return args.func(args) or 0
+    except (headless.NotFoundError, ValueError) as error:
+        sys.stderr.write('%s\n' % error)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+'''
+Compare two SWAPY snapshot files.
+
+    swapy-diff.py build1.swapy build2.swapy
+
+Prints the added (+), removed (-) and changed (~) controls. The exit
+code is 1 if there are differences, 0 otherwise.
+'''
+
+import argparse
+import sys
+
+import snapshot
+import snapshot_diff
+
+KINDS = [snapshot_diff.ADDED, snapshot_diff.REMOVED, snapshot_diff.RENAMED,
+         snapshot_diff.MOVED, snapshot_diff.ACCESS_NAME]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('old', help='snapshot of the old build')
+    parser.add_argument('new', help='snapshot of the new build')
+    parser.add_argument('--kind', choices=KINDS, action='append',
+                        help='report the changes of the kind only, may be repeated')
+    parser.add_argument('--summary', action='store_true',
+                        help='print the numbers of the changes only')
+    args = parser.parse_args()
+    try:
+        diff = snapshot_diff.diff_files(args.old, args.new)
+    except (IOError, snapshot.SnapshotFormatError) as error:
+        sys.stderr.write('%s\n' % error)
+        return 2
+    kinds = args.kind or KINDS
+    changes = [change for change in diff.changes if change.kind in kinds]
+    if not args.summary:
+        for change in changes:
+            print(snapshot_diff.format_change(diff, change).encode('utf-8', 'replace'))
+    counts = diff.get_counts()
+    print('%s' % ', '.join('%d %s' % (counts[kind], kind) for kind in kinds))
+    return 1 if changes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+import threading
+import traceback
+
+'''
+Window change notifications.
+
+An event source reports windows being created, destroyed, renamed and
+reparented. ChangeTracker spreads the events to the caches (at once, in
+the source thread) and to the UI (coalesced, through deliver).
+
+    tracker = ChangeTracker(backend.get_backend().get_event_source(),
+                            deliver=wx.CallAfter)
+    tracker.add_listener(on_events)
+    tracker.start()
+'''
+
+CREATE = 'create'
+DESTROY = 'destroy'
+RENAME = 'rename'
+REPARENT = 'reparent'
+
+#kind - one of the above
+#handle - handle of the window
+#parent - handle of the parent window, None for a top level window or unknown
+#top - handle of the top level window, None if unknown (e.g. destroyed window)
+WindowEvent = collections.namedtuple('WindowEvent', 'kind handle parent top')
+
+#-----WinEvent constants
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_NAMECHANGE = 0x800C
+EVENT_OBJECT_PARENTCHANGE = 0x800F
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+GA_PARENT = 1
+GA_ROOT = 2
+WM_QUIT = 0x0012
+
+EVENT_KINDS = {EVENT_OBJECT_CREATE : CREATE,
+               EVENT_OBJECT_DESTROY : DESTROY,
+               EVENT_OBJECT_NAMECHANGE : RENAME,
+               EVENT_OBJECT_PARENTCHANGE : REPARENT}
+#-----
+
+#seconds to wait for the hooks thread to install the hooks
+START_TIMEOUT = 5.0
+
+
+class EventSourceError(RuntimeError):
+    '''
+    The event source could not start reporting
+    '''
+    pass
+
+
+class EventSource(object):
+    '''
+    Source of WindowEvent objects
+    '''
+    def start(self, callback):
+        '''
+        Start reporting, callback(event) may be called from any thread.
+        Raise EventSourceError if the events can't be reported.
+        '''
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class WinEventSource(EventSource):
+    '''
+    Out of context WinEvent hooks. The hooks and their message loop
+    live in a dedicated thread. Windows of the SWAPY process are skipped.
+    '''
+    def __init__(self):
+        self._callback = None
+        self._thread = None
+        self._thread_id = None
+        self._started = threading.Event()
+        self._error = None #why the hooks are not installed
+        self._abandoned = False #start() has given up waiting
+
+    def start(self, callback):
+        self._callback = callback
+        self._thread = threading.Thread(target=self._run, name='swapy-winevents')
+        self._thread.daemon = True
+        self._thread.start()
+        if not self._started.wait(START_TIMEOUT):
+            self._abandoned = True
+            raise EventSourceError('The WinEvent hooks are not installed in %s seconds'
+                                   % START_TIMEOUT)
+        if self._error is not None:
+            raise EventSourceError(self._error)
+
+    def stop(self):
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join()
+            self._thread_id = None
+
+    def _run(self):
+        try:
+            import ctypes
+            from ctypes import wintypes
+            hooks = self._install_hooks()
+        except Exception as exc:
+            traceback.print_exc()
+            self._error = 'Failed to install the WinEvent hooks: %s' % exc
+            self._started.set()
+            return
+        if self._abandoned:
+            self._remove_hooks(hooks)
+            return
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self._started.set()
+        user32 = self._user32
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        self._remove_hooks(hooks)
+
+    def _remove_hooks(self, hooks):
+        for hook in hooks:
+            self._user32.UnhookWinEvent(hook)
+
+    def _install_hooks(self):
+        '''
+        Return the hook handles, raise EventSourceError if any of the
+        hooks is not installed
+        '''
+        import ctypes
+        from ctypes import wintypes
+        user32 = self._user32 = ctypes.windll.user32
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+        user32.GetAncestor.restype = wintypes.HWND
+        user32.GetDesktopWindow.restype = wintypes.HWND
+        desktop = user32.GetDesktopWindow()
+
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD,
+                                          wintypes.HWND, wintypes.LONG, wintypes.LONG,
+                                          wintypes.DWORD, wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+            if not hwnd or id_object != OBJID_WINDOW or id_child != CHILDID_SELF:
+                return #not a window itself, e.g. a caret or a list item
+            kind = EVENT_KINDS.get(event)
+            parent = top = None
+            if kind != DESTROY:
+                parent = user32.GetAncestor(hwnd, GA_PARENT)
+                if parent == desktop:
+                    parent = None
+                top = user32.GetAncestor(hwnd, GA_ROOT)
+            try:
+                self._callback(WindowEvent(kind, hwnd, parent, top))
+            except Exception:
+                traceback.print_exc()
+
+        #keep the reference, the hooks call it until they are removed
+        self._proc = WinEventProc(on_event)
+        hooks = []
+        for first, last in [(EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY),
+                            (EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE),
+                            (EVENT_OBJECT_PARENTCHANGE, EVENT_OBJECT_PARENTCHANGE)]:
+            hook = user32.SetWinEventHook(first, last, None, self._proc, 0, 0,
+                                          WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS)
+            if not hook:
+                self._remove_hooks(hooks)
+                raise EventSourceError('SetWinEventHook failed for the events 0x%X-0x%X'
+                                       % (first, last))
+            hooks.append(hook)
+        return hooks
+
+
+class SimulatedEventSource(EventSource):
+    '''
+    Event source fed by emit(), used by the fake backend.
+    Events are reported in the emitting thread.
+    '''
+    def __init__(self):
+        self._callback = None
+
+    def start(self, callback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    def emit(self, kind, handle, parent=None, top=None):
+        callback = self._callback
+        if callback is not None:
+            callback(WindowEvent(kind, handle, parent, top))
+
+
+def _call_now(func, *args):
+    func(*args)
+
+
+class ChangeTracker(object):
+    '''
+    Spreads the events of an event source.
+
+    Immediate listeners get every event in the source thread, they are
+    meant for the caches invalidation. Other listeners get lists of
+    events through deliver(func, *args), e.g. wx.CallAfter. A burst of
+    events is coalesced into one list, repeated events are dropped.
+    '''
+    def __init__(self, source, deliver=_call_now):
+        self.source = source
+        self.deliver = deliver
+        self.active = False
+        self._immediate_listeners = []
+        self._listeners = []
+        self._start_listeners = []
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_set = set()
+
+    def add_listener(self, listener, immediate=False):
+        '''
+        listener(event) if immediate, listener([event,...]) otherwise
+        '''
+        if immediate:
+            self._immediate_listeners.append(listener)
+        else:
+            self._listeners.append(listener)
+
+    def add_start_listener(self, listener):
+        '''
+        listener() once the source has started reporting
+        '''
+        self._start_listeners.append(listener)
+
+    def start(self):
+        '''
+        Start the source, EventSourceError is raised if it fails
+        '''
+        self.source.start(self._on_event)
+        self.active = True
+        for listener in self._start_listeners:
+            listener()
+
+    def stop(self):
+        self.active = False
+        self.source.stop()
+
+    def _on_event(self, event):
+        #source thread
+        for listener in self._immediate_listeners:
+            try:
+                listener(event)
+            except Exception:
+                traceback.print_exc()
+        with self._lock:
+            if event in self._pending_set:
+                return
+            self._pending_set.add(event)
+            self._pending.append(event)
+            if len(self._pending) > 1:
+                return #the flush is on the way
+        self.deliver(self._flush)
+
+    def _flush(self):
+        with self._lock:
+            events = self._pending
+            self._pending = []
+            self._pending_set = set()
+        for listener in self._listeners:
+            listener(events)
@@ -0,0 +1,99 @@
+# GUI object/properties browser.
+# Copyright (C) 2011 Matiychuk D.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation; either version 2.1
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the
+#    Free Software Foundation, Inc.,
+#    59 Temple Place,
+#    Suite 330,
+#    Boston, MA 02111-1307 USA
+
+import collections
+import time
+
+'''
+Bulk enumeration of the top level windows
+'''
+
+#number of find_windows attempts and the delay before the first retry
+TRY_COUNT = 3
+RETRY_DELAY = 0.05
+
+#only what PC_system.Get_subitems shows: every field is a cross-process
+#call per window
+WindowInfo = collections.namedtuple('WindowInfo', 'handle title')
+
+
+class WindowsEnumerator(object):
+    '''
+    Collects handle and title of all the top level windows in one pass.
+
+    provider is an object with the methods
+        find_windows() -> [handle,...]
+        window_text(handle) -> text
+        taskbar_handle() -> handle of the task bar window
+    '''
+    def __init__(self, provider, try_count=TRY_COUNT, retry_delay=RETRY_DELAY):
+        self.provider = provider
+        self.try_count = try_count
+        self.retry_delay = retry_delay
+        self._taskbar_handle = None
+
+    def get_handles(self):
+        '''
+        Return top level window handles.
+        find_windows fails from time to time with OverflowError: array too
+        large or MemoryError, retry it with a short exponential backoff.
+        '''
+        delay = self.retry_delay
+        for i in range(self.try_count):
+            try:
+                return self.provider.find_windows()
+            except (OverflowError, MemoryError):
+                if i < self.try_count - 1:
+                    time.sleep(delay)
+                    delay *= 2
+        #TODO: add swapy exception: Could not get windows list
+        return []
+
+    def get_taskbar_handle(self, handles):
+        '''
+        Return the task bar handle. The handle is asked once and asked
+        again only when it disappears from the windows list
+        (e.g. explorer.exe has been restarted).
+        '''
+        if self._taskbar_handle is None or self._taskbar_handle not in handles:
+            try:
+                self._taskbar_handle = self.provider.taskbar_handle()
+            except Exception:
+                self._taskbar_handle = None
+        return self._taskbar_handle
+
+    def enum_windows(self):
+        '''
+        Return [WindowInfo,...] for all the top level windows
+        '''
+        provider = self.provider
+        handles = self.get_handles()
+        taskbar_handle = self.get_taskbar_handle(handles)
+        windows = []
+        for handle in handles:
+            if handle == taskbar_handle:
+                title = u'TaskBar'
+            else:
+                try:
+                    title = provider.window_text(handle)
+                except Exception:
+                    title = u'' #the window has been closed meanwhile
+            windows.append(WindowInfo(handle, title or u''))
+        return windows